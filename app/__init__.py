@@ -1,6 +1,8 @@
 from flask import Flask
 from .config import Config
 from .database import init_app as db_init_app
+from .migrations import init_app as migrations_init_app
+from .cli import init_app as cli_init_app
 from .routes.auth import auth_bp
 from .routes.main import main_bp
 from .routes.crops import crops_bp
@@ -17,6 +19,7 @@ def create_app(config_class=Config):
 
     # ── Database ───────────────────────────────────────────────────────────────
     db_init_app(app)
+    migrations_init_app(app)
 
     # ── Blueprints ─────────────────────────────────────────────────────────────
     app.register_blueprint(auth_bp)
@@ -24,4 +27,7 @@ def create_app(config_class=Config):
     app.register_blueprint(crops_bp)
     app.register_blueprint(irrigation_bp)
 
+    # ── CLI jobs ───────────────────────────────────────────────────────────────
+    cli_init_app(app)
+
     return app
@@ -0,0 +1,194 @@
+"""
+CLI commands — scheduled jobs run via `flask --app run <command>`.
+"""
+import click
+from flask.cli import with_appcontext
+
+
+@click.command("sweep-missed")
+@click.option("--recalculate/--no-recalculate", default=True,
+              help="Recalculate queued crops after the sweep.")
+@click.option("--extend/--no-extend", default=True,
+              help="Roll schedule windows forward after the sweep.")
+@with_appcontext
+def sweep_missed_command(recalculate, extend):
+    """Mark overdue pending irrigations as missed for every farmer (nightly)."""
+    from app.services.advanced_scheduler import (
+        sweep_missed_irrigations, process_recalc_queue, extend_schedule_windows,
+    )
+
+    counts = sweep_missed_irrigations()
+    click.echo(f"Marked {sum(counts.values())} irrigation(s) missed across {len(counts)} crop(s).")
+
+    if recalculate:
+        processed = process_recalc_queue()
+        click.echo(f"Recalculated {processed} queued schedule(s).")
+
+    if extend:
+        extended = extend_schedule_windows()
+        click.echo(f"Extended the schedule window of {extended} crop(s).")
+
+
+@click.command("extend-schedules")
+@with_appcontext
+def extend_schedules_command():
+    """Roll every crop's materialized schedule window forward (daily)."""
+    from app.services.advanced_scheduler import extend_schedule_windows
+
+    extended = extend_schedule_windows()
+    click.echo(f"Extended the schedule window of {extended} crop(s).")
+
+
+@click.command("regenerate-schedules")
+@click.option("--workers", type=int, default=None,
+              help="Worker processes (default: CPU count, 1 = no pool).")
+@click.option("--chunk-size", type=int, default=500, show_default=True,
+              help="Crops per worker task (farmers are never split).")
+@with_appcontext
+def regenerate_schedules_command(workers, chunk_size):
+    """Regenerate remaining-season schedules for all active crops."""
+    from app.services.batch_scheduler import regenerate_all_schedules
+
+    report = regenerate_all_schedules(workers=workers, chunk_size=chunk_size)
+    click.echo(
+        f"Regenerated {report['crops']} crop schedule(s) in {report['seconds']}s "
+        f"({report['crops_per_second']} crops/s): {report['inserted']} inserted, "
+        f"{report['updated']} updated, {report['deleted']} deleted."
+    )
+
+
+@click.command("refresh-forecasts")
+@with_appcontext
+def refresh_forecasts_command():
+    """Fetch district forecasts and recalculate crops whose water balance shifted."""
+    from app.services.forecast_events import refresh_district_forecasts
+
+    for report in refresh_district_forecasts():
+        if report["error"]:
+            click.echo(f"{report['district']}: forecast fetch failed ({report['error']}).", err=True)
+            continue
+        click.echo(
+            f"{report['district']}: {len(report['recalculated'])} of "
+            f"{report['checked']} crop(s) recalculated."
+        )
+
+
+@click.command("compare-strategies")
+@click.argument("crop_name")
+@click.option("--duration", type=int, default=None,
+              help="Growth duration in days (default: the crop's usual duration).")
+@click.option("--moisture", type=float, default=60.0, show_default=True,
+              help="Starting soil moisture (%).")
+@click.option("--texture", type=click.Choice(["Sandy", "Loamy", "Clayey"]),
+              default="Loamy", show_default=True, help="Soil texture class.")
+def compare_strategies_command(crop_name, duration, moisture, texture):
+    """Benchmark the scheduling strategies on one crop's full season."""
+    from datetime import date
+    from app.services.ml_engine import get_crop_duration
+    from app.services.schedule_engine import build_context, compare_strategies
+    from app.services.soil_hydraulics import get_soil_hydraulics
+
+    duration = duration or get_crop_duration(crop_name)
+    context = build_context(
+        crop_name, date.today(), duration, soil=get_soil_hydraulics(texture)
+    )
+    for name, report in compare_strategies(context, moisture).items():
+        click.echo(
+            f"{name:<10} {report['irrigations']:>4} irrigation(s) "
+            f"{report['total_water']:>9.2f} water  {report['milliseconds']:.3f} ms"
+        )
+
+
+@click.command("migrate")
+@click.option("--target", type=int, default=None,
+              help="Stop at this migration version (default: latest).")
+@with_appcontext
+def migrate_command(target):
+    """Apply pending schema migrations."""
+    from app.migrations import current_version, migrate
+
+    try:
+        applied = migrate(target)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    if applied:
+        click.echo(f"Applied migration(s) {', '.join(map(str, applied))}.")
+    click.echo(f"Schema is at version {current_version()}.")
+
+
+@click.command("check-indexes")
+@with_appcontext
+def check_indexes_command():
+    """EXPLAIN QUERY PLAN the model queries; fail if one misses its index."""
+    from app.migrations import check_indexes
+
+    try:
+        results = check_indexes()
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+
+    failed = 0
+    for index, used, plan in results:
+        click.echo(f"{'ok  ' if used else 'MISS'} {index:<26} {' | '.join(plan)}")
+        failed += not used
+    if failed:
+        raise SystemExit(1)
+
+
+@click.command("bench-history")
+@click.option("--rows", type=int, default=2_000_000, show_default=True,
+              help="Synthetic IrrigationHistory rows.")
+@click.option("--crops", type=int, default=500, show_default=True,
+              help="Crops the rows are spread over.")
+def bench_history_command(rows, crops):
+    """Benchmark IrrigationHistory date lookups on a synthetic table."""
+    from app.services.query_benchmark import benchmark_history_queries
+
+    for label, plan, milliseconds in benchmark_history_queries(rows, crops):
+        click.echo(f"{milliseconds:>9.3f} ms  {label}\n             {plan}")
+
+
+@click.command("rebuild-summaries")
+@with_appcontext
+def rebuild_summaries_command():
+    """Recompute FarmerSummary / CropSummary from the source tables (backfill)."""
+    from app.models.summary import rebuild_summaries
+
+    farmers = rebuild_summaries()
+    click.echo(f"Rebuilt dashboard summaries for {farmers} farmer(s).")
+
+
+@click.command("archive-old-records")
+@click.option("--days", type=int, default=None,
+              help="Retention horizon in days (default: ARCHIVE_AFTER_DAYS).")
+@click.option("--batch-size", type=int, default=None,
+              help="Rows per transaction (default: ARCHIVE_BATCH_SIZE).")
+@click.option("--max-batches", type=int, default=None,
+              help="Stop after this many batches per table (default: until done).")
+@with_appcontext
+def archive_old_records_command(days, batch_size, max_batches):
+    """Move old irrigation history and schedules to archive tables (nightly)."""
+    from app.services.archival import run_retention
+
+    try:
+        result = run_retention(days, batch_size, max_batches)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--days")
+    click.echo(
+        f"Archived {result['history']} history and {result['schedules']} schedule "
+        f"row(s) older than {result['cutoff']}."
+    )
+
+
+def init_app(app):
+    """Register CLI commands with the Flask app."""
+    app.cli.add_command(sweep_missed_command)
+    app.cli.add_command(extend_schedules_command)
+    app.cli.add_command(regenerate_schedules_command)
+    app.cli.add_command(refresh_forecasts_command)
+    app.cli.add_command(compare_strategies_command)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(check_indexes_command)
+    app.cli.add_command(bench_history_command)
+    app.cli.add_command(rebuild_summaries_command)
+    app.cli.add_command(archive_old_records_command)
@@ -10,13 +10,40 @@ class Config:
     # ── Security ──────────────────────────────────────────────────────────────
     SECRET_KEY = os.environ.get("SECRET_KEY", "eco_farming_secret_key_2024_change_in_prod")
 
-    # ── MySQL Database ────────────────────────────────────────────────────────
+    # ── Database ──────────────────────────────────────────────────────────────
+    DB_BACKEND = os.environ.get("DB_BACKEND", "sqlite")  # sqlite | mysql | postgresql
+    DB_PATH = os.environ.get("DB_PATH", os.path.join(BASE_DIR, "data", "farming.db"))
+    # Apply migrations on startup. Unset = on for sqlite only: migrations are
+    # SQLite DDL, and a mysql / postgresql schema is provisioned separately.
+    AUTO_MIGRATE = {"1": True, "0": False}.get(os.environ.get("AUTO_MIGRATE", ""))
+
+    # SQLite tuning (DB_BACKEND = sqlite)
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_CACHE_SIZE_KB = int(os.environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    SQLITE_FOREIGN_KEYS = os.environ.get("SQLITE_FOREIGN_KEYS", "1") != "0"
+    # Reuse one connection per thread across requests instead of reconnecting
+    SQLITE_PERSISTENT_CONNECTIONS = os.environ.get("SQLITE_PERSISTENT_CONNECTIONS", "1") != "0"
+
+    # MySQL / PostgreSQL connection (DB_BACKEND = mysql | postgresql)
     DB_HOST = os.environ.get("DB_HOST", "localhost")
     DB_PORT = int(os.environ.get("DB_PORT", 3399))
     DB_NAME = os.environ.get("DB_NAME", "smart_farm")
     DB_USER = os.environ.get("DB_USER", "farm_use")
     DB_PASSWORD = os.environ.get("DB_PASSWORD", "farming_secure_password_2024")
 
+    # Connection pool, one per worker. Unset = on for mysql / postgresql, off
+    # for sqlite (which reuses one connection per thread, see above).
+    # Pool metrics: /health/db/pool (login required).
+    DB_POOL = {"1": True, "0": False}.get(os.environ.get("DB_POOL", ""))
+    DB_POOL_MIN_SIZE = int(os.environ.get("DB_POOL_MIN_SIZE", 1))
+    DB_POOL_MAX_SIZE = int(os.environ.get("DB_POOL_MAX_SIZE", 10))
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5.0))             # wait for a free connection (s)
+    DB_POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", 1800))  # recycle after (s)
+    DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "1") != "0"           # health check on checkout
+
     # ── ML Models ─────────────────────────────────────────────────────────────
     MODEL_DIR = os.path.join(BASE_DIR, "models")
 
@@ -27,5 +54,13 @@ class Config:
     # ── Pagination ────────────────────────────────────────────────────────────
     HISTORY_PER_PAGE = 10
 
+    # ── Retention ─────────────────────────────────────────────────────────────
+    # History and settled schedule rows older than this move to archive tables
+    ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 365))
+    ARCHIVE_BATCH_SIZE = int(os.environ.get("ARCHIVE_BATCH_SIZE", 1000))        # rows per transaction
+    ARCHIVE_BATCH_PAUSE_MS = int(os.environ.get("ARCHIVE_BATCH_PAUSE_MS", 50))  # let other writers in
+
     # ── Irrigation Scheduling ─────────────────────────────────────────────────
     SCHEDULE_DAYS = 30  # Generate 30-day irrigation schedule
+    # Recalculate a crop when a new forecast shifts its projected water balance by more than this (mm)
+    FORECAST_RECALC_THRESHOLD_MM = float(os.environ.get("FORECAST_RECALC_THRESHOLD_MM", 5.0))
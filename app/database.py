@@ -1,28 +1,304 @@
-import sqlite3
+"""
+Database access — one query API over SQLite, MySQL or PostgreSQL.
+
+Config.DB_BACKEND selects the backend ("sqlite", "mysql" or "postgresql").
+Queries are written in SQLite syntax with ``?`` placeholders; each
+statement is rewritten once for the active dialect and the translation is
+cached. translate() covers placeholders, NOW() / datetime('now') and
+``INSERT ... ON CONFLICT(...) DO UPDATE SET col = excluded.col`` upserts
+(ON DUPLICATE KEY UPDATE / VALUES(col) on MySQL). Anything else must be
+portable as written: no RETURNING, no SQLite-only functions (and on
+PostgreSQL execute_db() cannot report a SERIAL id, as psycopg2 has no
+lastrowid). The schema
+itself (app.migrations) is SQLite DDL; other backends are provisioned
+separately.
+"""
+import itertools
 import os
-from flask import g
+import re
+import sqlite3
+import threading
 from contextlib import contextmanager
+from functools import lru_cache
+from typing import NamedTuple
+
+from flask import current_app, g
+
+from app.db_pool import ConnectionPool
+
+
+class Dialect(NamedTuple):
+    name: str
+    placeholder: str   # DB-API paramstyle marker
+    percent: str       # a literal % (pyformat drivers need %%)
+    now_local: str     # NOW() / datetime('now','localtime')
+    now_utc: str       # datetime('now')
+    upsert: str        # ON CONFLICT(...) DO UPDATE SET (None = native)
+    excluded: str      # excluded.<column> in an upsert's SET list
+
+
+DIALECTS = {
+    "sqlite": Dialect("sqlite", "?", "%", "datetime('now','localtime')", "datetime('now')",
+                      None, "excluded.{}"),
+    "mysql": Dialect("mysql", "%s", "%%", "NOW()", "UTC_TIMESTAMP()",
+                     "ON DUPLICATE KEY UPDATE", "VALUES({})"),
+    "postgresql": Dialect("postgresql", "%s", "%%", "LOCALTIMESTAMP", "(NOW() AT TIME ZONE 'UTC')",
+                          None, "excluded.{}"),
+}
+
+# Time functions and upsert clauses first, then quoted literals (copied
+# through, % escaped), then placeholders and bare %.
+_TOKEN = re.compile(
+    r"datetime\(\s*'now'\s*(?P<local>,\s*'localtime'\s*)?\)"
+    r"|(?P<now>NOW\(\s*\))"
+    r"|(?P<upsert>\bON\s+CONFLICT\s*\([^)]*\)\s*DO\s+UPDATE\s+SET\b)"
+    r"|(?P<excluded>\bexcluded\.(?P<column>\w+))"
+    r"|(?P<literal>'(?:[^']|'')*'|\"[^\"]*\")"
+    r"|(?P<param>%s|\?)"
+    r"|(?P<percent>%)",
+    re.IGNORECASE,
+)
+
+
+@lru_cache(maxsize=1024)
+def translate(query: str, dialect_name: str = "sqlite") -> str:
+    """Rewrite placeholders, NOW() / datetime('now') and upserts for a dialect."""
+    dialect = DIALECTS[dialect_name]
+
+    def replace(match):
+        if match.group("literal"):
+            return match.group("literal").replace("%", dialect.percent)
+        if match.group("param"):
+            return dialect.placeholder
+        if match.group("percent"):
+            return dialect.percent
+        if match.group("upsert"):
+            return dialect.upsert or match.group("upsert")
+        if match.group("excluded"):
+            return dialect.excluded.format(match.group("column"))
+        if match.group("now") or match.group("local"):
+            return dialect.now_local
+        return dialect.now_utc
+
+    return _TOKEN.sub(replace, query)
+
+
+# Names for PostgreSQL server-side (named) cursors
+_stream_ids = itertools.count(1)
+
 
-# 🔥 Absolute path to your real database
-DB_PATH = r"C:\Users\Shara\OneDrive\Desktop\ecofriendly_anti\ecofriendly_anti\data\farming.db"
+class Connection:
+    """A DB-API connection that translates every statement for its dialect."""
+
+    def __init__(self, raw, dialect: Dialect):
+        self.raw = raw
+        self.dialect = dialect
+        self.depth = 0  # open transaction() blocks
+
+    def execute(self, query, args=()):
+        cur = self.raw.cursor()
+        cur.execute(translate(query, self.dialect.name), tuple(args))
+        return cur
+
+    def executemany(self, query, seq_of_args):
+        cur = self.raw.cursor()
+        cur.executemany(translate(query, self.dialect.name), [tuple(a) for a in seq_of_args])
+        return cur
+
+    def stream(self, query, args=()):
+        """
+        Execute a SELECT on a cursor that reads rows from the server as they
+        are fetched. PyMySQL and psycopg2 cursors otherwise buffer the whole
+        result client-side; an sqlite3 cursor already steps lazily.
+        """
+        if self.dialect.name == "mysql":
+            from pymysql.cursors import SSDictCursor
+            cur = self.raw.cursor(SSDictCursor)
+        elif self.dialect.name == "postgresql":
+            cur = self.raw.cursor(name=f"stream_{next(_stream_ids)}")
+        else:
+            cur = self.raw.cursor()
+        cur.execute(translate(query, self.dialect.name), tuple(args))
+        return cur
+
+    def begin(self):
+        """
+        Open a transaction explicitly. sqlite3 would only BEGIN at the first
+        write, and a SAVEPOINT issued before that would start (and on
+        RELEASE, commit) a transaction of its own. IMMEDIATE takes the write
+        lock up front so a read-then-write block cannot fail to upgrade.
+        """
+        if self.dialect.name == "sqlite" and not self.raw.in_transaction:
+            self.raw.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+
+# ── Backends ───────────────────────────────────────────────────────────────────
+
+def _connect_sqlite(config):
+    path = config["DB_PATH"]
+    # Ensure database folder exists
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # sqlite3 keeps its own per-connection cache of prepared statements.
+    # Pooled connections move between request threads.
+    conn = sqlite3.connect(
+        path, cached_statements=256, check_same_thread=not pool_enabled(config)
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in sqlite_pragmas(config):
+        conn.execute(pragma)
+    return conn
+
+
+def sqlite_pragmas(config) -> list:
+    """
+    PRAGMAs run on every new SQLite connection. WAL lets readers proceed
+    while one writer commits, and synchronous=NORMAL skips the per-commit
+    fsync that WAL does not need for durability against app crashes.
+    """
+    pragmas = [
+        f"PRAGMA busy_timeout = {int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",
+        f"PRAGMA foreign_keys = {'ON' if config.get('SQLITE_FOREIGN_KEYS', True) else 'OFF'}",
+    ]
+    journal_mode = config.get("SQLITE_JOURNAL_MODE")
+    if journal_mode:
+        pragmas.append(f"PRAGMA journal_mode = {journal_mode}")
+    synchronous = config.get("SQLITE_SYNCHRONOUS")
+    if synchronous:
+        pragmas.append(f"PRAGMA synchronous = {synchronous}")
+    if config.get("SQLITE_CACHE_SIZE_KB"):
+        pragmas.append(f"PRAGMA cache_size = -{int(config['SQLITE_CACHE_SIZE_KB'])}")
+    if config.get("SQLITE_MMAP_SIZE"):
+        pragmas.append(f"PRAGMA mmap_size = {int(config['SQLITE_MMAP_SIZE'])}")
+    return pragmas
+
+
+def _connect_mysql(config):
+    try:
+        import pymysql
+        from pymysql.cursors import DictCursor
+    except ImportError:
+        raise RuntimeError("DB_BACKEND=mysql requires the PyMySQL package")
+    return pymysql.connect(
+        host=config["DB_HOST"],
+        port=config["DB_PORT"],
+        user=config["DB_USER"],
+        password=config["DB_PASSWORD"],
+        database=config["DB_NAME"],
+        cursorclass=DictCursor,
+        autocommit=False,
+    )
+
+
+def _connect_postgresql(config):
+    try:
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+    except ImportError:
+        raise RuntimeError("DB_BACKEND=postgresql requires the psycopg2 package")
+    return psycopg2.connect(
+        host=config["DB_HOST"],
+        port=config["DB_PORT"],
+        user=config["DB_USER"],
+        password=config["DB_PASSWORD"],
+        dbname=config["DB_NAME"],
+        cursor_factory=RealDictCursor,
+    )
+
+
+BACKENDS = {
+    "sqlite": _connect_sqlite,
+    "mysql": _connect_mysql,
+    "postgresql": _connect_postgresql,
+}
+
+
+def get_dialect(config=None) -> Dialect:
+    """Dialect of the configured backend."""
+    config = config if config is not None else current_app.config
+    backend = config.get("DB_BACKEND", "sqlite")
+    try:
+        return DIALECTS[backend]
+    except KeyError:
+        raise RuntimeError(f"Unknown DB_BACKEND: {backend}")
+
+
+def pool_enabled(config) -> bool:
+    """DB_POOL, or automatically for networked backends when unset."""
+    enabled = config.get("DB_POOL")
+    if enabled is None:
+        return config.get("DB_BACKEND", "sqlite") != "sqlite"
+    return bool(enabled)
+
+
+def connect(config=None) -> Connection:
+    """Open a new connection to the configured backend."""
+    config = config if config is not None else current_app.config
+    dialect = get_dialect(config)
+    return Connection(BACKENDS[dialect.name](config), dialect)
+
+
+def persistent_enabled(config) -> bool:
+    """Long-lived per-thread connections (SQLite without a pool)."""
+    return (
+        config.get("DB_BACKEND", "sqlite") == "sqlite"
+        and bool(config.get("SQLITE_PERSISTENT_CONNECTIONS"))
+        and not pool_enabled(config)
+    )
+
+
+# One SQLite connection per thread (and process), reused across requests
+_thread_local = threading.local()
+
+
+def _thread_connection(config) -> Connection:
+    key = (os.getpid(), config["DB_PATH"])
+    conn = getattr(_thread_local, "connections", {}).get(key)
+    if conn is None:
+        if not hasattr(_thread_local, "connections"):
+            _thread_local.connections = {}
+        conn = _thread_local.connections[key] = connect(config)
+    return conn
 
 
 def get_db():
-    """Get or create SQLite connection stored on Flask's g object."""
+    """Get (or check out / reuse) the connection stored on Flask's g."""
     if "db" not in g:
-        # Ensure database folder exists
-        os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-
-        g.db = sqlite3.connect(DB_PATH)
-        g.db.row_factory = sqlite3.Row
+        pool = current_app.extensions.get("db_pool")
+        if pool:
+            g.db = pool.acquire()
+        elif persistent_enabled(current_app.config):
+            g.db = _thread_connection(current_app.config)
+        else:
+            g.db = connect()
     return g.db
 
 
 def close_db(e=None):
-    """Close DB connection at end of request."""
+    """Return the connection to the pool (or close it) at end of request."""
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        pool = current_app.extensions.get("db_pool")
+        if pool:
+            pool.release(db)
+        elif persistent_enabled(current_app.config):
+            db.rollback()  # keep the thread's connection, not its open transaction
+        else:
+            db.close()
+
+
+def pool_stats():
+    """Connection pool metrics for this worker, or None when not pooled."""
+    pool = current_app.extensions.get("db_pool")
+    return pool.stats() if pool else None
 
 
 def query_db(query, args=(), one=False):
@@ -34,28 +310,88 @@ def query_db(query, args=(), one=False):
     return (rows[0] if rows else None) if one else rows
 
 
+def iter_query(query, args=(), batch_size: int = 500):
+    """
+    Yield the rows of a SELECT in fetchmany() batches, so at most
+    batch_size rows are in memory however large the result is.
+    """
+    cur = get_db().stream(query, args)
+    try:
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cur.close()
+
+
 def execute_db(query, args=()):
-    """Execute INSERT / UPDATE / DELETE and commit."""
+    """Execute INSERT / UPDATE / DELETE and commit (at block exit inside transaction())."""
     db = get_db()
     cur = db.execute(query, args)
-    db.commit()
+    if not db.depth:
+        db.commit()
     last_id = cur.lastrowid
     cur.close()
     return last_id
 
 
+def executemany_db(query, seq_of_args):
+    """Execute one statement per parameter tuple and commit once. Returns rows affected."""
+    db = get_db()
+    cur = db.executemany(query, seq_of_args)
+    if not db.depth:
+        db.commit()
+    count = cur.rowcount
+    cur.close()
+    return count
+
+
 @contextmanager
 def transaction():
-    """Context manager for safe transactions."""
+    """
+    Group statements into one atomic commit. execute_db() / executemany_db()
+    inside the block defer their commit to its exit. A nested block runs as
+    a SAVEPOINT: if it raises, only its own statements are rolled back.
+    """
     db = get_db()
+    depth = db.depth
+    savepoint = f"sp_{depth}"
+    if depth:
+        db.execute(f"SAVEPOINT {savepoint}")
+    else:
+        db.begin()
+    db.depth = depth + 1
     try:
         yield db
-        db.commit()
-    except Exception:
-        db.rollback()
+    except BaseException:
+        db.depth = depth
+        if depth:
+            db.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            db.execute(f"RELEASE SAVEPOINT {savepoint}")
+        else:
+            db.rollback()
         raise
+    db.depth = depth
+    if depth:
+        db.execute(f"RELEASE SAVEPOINT {savepoint}")
+    else:
+        db.commit()
 
 
 def init_app(app):
-    """Register teardown with Flask app."""
-    app.teardown_appcontext(close_db)
\ No newline at end of file
+    """Register teardown (and the worker's connection pool) with Flask app."""
+    config = app.config
+    get_dialect(config)  # fail fast on a misconfigured backend
+    if pool_enabled(config):
+        # Connections open lazily, so a pre-fork master opens none
+        app.extensions["db_pool"] = ConnectionPool(
+            lambda: connect(config),
+            min_size=config.get("DB_POOL_MIN_SIZE", 1),
+            max_size=config.get("DB_POOL_MAX_SIZE", 10),
+            timeout=config.get("DB_POOL_TIMEOUT", 5.0),
+            max_lifetime=config.get("DB_POOL_MAX_LIFETIME", 1800.0),
+            pre_ping=config.get("DB_POOL_PRE_PING", True),
+        )
+    app.teardown_appcontext(close_db)
@@ -0,0 +1,216 @@
+"""
+Connection pool — reuse database connections across requests.
+
+One pool per worker process (rebuilt after a fork). Checkout hands out an
+idle connection when there is one, opens a new one below max_size, and
+otherwise waits up to `timeout` seconds for a connection to come back.
+Connections are health-checked on checkout and retired after
+`max_lifetime` seconds.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(RuntimeError):
+    """No connection became free within the pool's wait timeout."""
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 5.0, max_lifetime: float = 1800.0,
+                 pre_ping: bool = True):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size, max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self._lock = threading.Condition()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = deque()        # (connection, created_at), most recent last
+        self._created_at = {}       # id(connection) -> created_at, checked out ones
+        self._size = 0              # open connections, idle + checked out
+        self._filled = False
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "opened": 0,
+            "recycled": 0,
+            "broken": 0,
+            "peak_in_use": 0,
+        }
+
+    # ── Checkout / checkin ────────────────────────────────────────────────────
+
+    def acquire(self):
+        """Check out a healthy connection (raises PoolTimeout when exhausted)."""
+        if self._pid != os.getpid():
+            # Forked worker: inherited sockets belong to the parent
+            with self._lock:
+                self._reset()
+        if not self._filled:
+            self._fill()
+
+        started = time.monotonic()
+        waited = False
+        with self._lock:
+            while True:
+                if self._idle:
+                    conn, created_at = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn = None
+                    break
+                remaining = self.timeout - (time.monotonic() - started)
+                if remaining <= 0:
+                    self._metrics["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection free after {self.timeout:g}s "
+                        f"({self.max_size} in use)"
+                    )
+                waited = True
+                self._lock.wait(remaining)
+
+            wait = time.monotonic() - started
+            metrics = self._metrics
+            metrics["checkouts"] += 1
+            if waited:
+                metrics["waits"] += 1
+                metrics["wait_seconds"] += wait
+                metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], wait)
+
+        if conn is not None and not self._usable(conn, created_at):
+            conn = None
+        if conn is None:
+            try:
+                conn, created_at = self._open()
+            except Exception:
+                self._discard(None)
+                raise
+
+        with self._lock:
+            self._created_at[id(conn)] = created_at
+            in_use = len(self._created_at)
+            self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], in_use)
+        return conn
+
+    def release(self, conn, broken: bool = False):
+        """Return a connection; uncommitted work is rolled back."""
+        with self._lock:
+            created_at = self._created_at.pop(id(conn), None)
+        if created_at is None:
+            conn.close()  # not ours (opened before a fork or already released)
+            return
+        if not broken:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+        if broken or self._expired(created_at):
+            self._count("broken" if broken else "recycled")
+            self._discard(conn)
+            return
+        with self._lock:
+            self._idle.append((conn, created_at))
+            self._lock.notify()
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _open(self):
+        conn = self._connect()
+        self._count("opened")
+        return conn, time.monotonic()
+
+    def _count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def _fill(self):
+        """Open min_size connections once per process."""
+        with self._lock:
+            if self._filled:
+                return
+            self._filled = True
+        while True:
+            with self._lock:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                entry = self._open()
+            except Exception:
+                self._discard(None)
+                raise
+            with self._lock:
+                self._idle.append(entry)
+
+    def _expired(self, created_at: float) -> bool:
+        return bool(self.max_lifetime) and time.monotonic() - created_at > self.max_lifetime
+
+    def _usable(self, conn, created_at: float) -> bool:
+        """Retire expired connections and ping the rest (if pre_ping)."""
+        if self._expired(created_at):
+            self._count("recycled")
+            self._close_quietly(conn)
+            return False
+        if self.pre_ping:
+            try:
+                conn.execute("SELECT 1").close()
+            except Exception:
+                self._count("broken")
+                self._close_quietly(conn)
+                return False
+        return True
+
+    def _discard(self, conn):
+        """Close a connection and free its slot."""
+        if conn is not None:
+            self._close_quietly(conn)
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+
+    def stats(self) -> dict:
+        """Pool size, utilization and checkout wait metrics."""
+        with self._lock:
+            in_use = len(self._created_at)
+            stats = dict(self._metrics)
+            stats.update(
+                size=self._size,
+                idle=len(self._idle),
+                in_use=in_use,
+                max_size=self.max_size,
+                utilization=round(in_use / self.max_size, 3),
+                avg_wait_seconds=round(stats["wait_seconds"] / stats["waits"], 4) if stats["waits"] else 0.0,
+            )
+        stats["wait_seconds"] = round(stats["wait_seconds"], 4)
+        stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 4)
+        return stats
+
+    def close(self):
+        """Close idle connections (checked-out ones close on release)."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for conn, _ in idle:
+            self._close_quietly(conn)
@@ -0,0 +1,693 @@
+"""
+Schema migrations — numbered, applied in order, recorded in SchemaMigrations.
+
+create_app() brings the database up to date on startup (Config.AUTO_MIGRATE);
+`flask migrate` does the same from the command line. A new table or index
+is a new entry at the end of MIGRATIONS — never edit one that has shipped.
+Statements are SQLite DDL (AUTOINCREMENT, triggers, EXPLAIN QUERY PLAN), so
+migrations only run with DB_BACKEND = sqlite; a MySQL / PostgreSQL schema
+is provisioned separately (see MYSQL_SETUP.md).
+"""
+from flask import current_app
+
+from app.database import get_dialect, query_db, execute_db, transaction
+
+MIGRATIONS = [
+    (1, "Core tables", [
+        """
+        CREATE TABLE IF NOT EXISTS Farmers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            location TEXT NOT NULL,
+            phone TEXT,
+            email TEXT,
+            last_login DATETIME,
+            created_at DATETIME DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Crops (
+            id              INTEGER  PRIMARY KEY AUTOINCREMENT,
+            farmer_id       INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_name       TEXT     NOT NULL,
+            field_name      TEXT     NOT NULL DEFAULT 'My Field',
+            planting_date   DATE     NOT NULL,
+            growth_duration INTEGER  NOT NULL DEFAULT 100,
+            status          TEXT     NOT NULL DEFAULT 'active'
+                                     CHECK(status IN ('active','harvested')),
+            created_at      DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS SoilRecords (
+            id             INTEGER  PRIMARY KEY AUTOINCREMENT,
+            farmer_id      INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_id        INTEGER  REFERENCES Crops(id) ON DELETE SET NULL,
+            N              REAL     NOT NULL,
+            P              REAL     NOT NULL,
+            K              REAL     NOT NULL,
+            ph             REAL     NOT NULL,
+            moisture       REAL     NOT NULL,
+            sand           REAL     NOT NULL DEFAULT 0,
+            clay           REAL     NOT NULL DEFAULT 0,
+            soil_fertility TEXT     NOT NULL DEFAULT '',
+            recorded_at    DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS IrrigationHistory (
+            id                INTEGER  PRIMARY KEY AUTOINCREMENT,
+            farmer_id         INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_id           INTEGER  REFERENCES Crops(id) ON DELETE SET NULL,
+            city              TEXT     NOT NULL DEFAULT '',
+            stage             TEXT     NOT NULL DEFAULT '',
+            days_after_sowing INTEGER  NOT NULL DEFAULT 0,
+            et0               REAL     NOT NULL DEFAULT 0.0,
+            kc                REAL     NOT NULL DEFAULT 1.0,
+            water_required    REAL     NOT NULL DEFAULT 0.0,
+            decision          TEXT     NOT NULL DEFAULT '',
+            recorded_at       DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_crops_farmer ON Crops(farmer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_soil_farmer  ON SoilRecords(farmer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_soil_crop    ON SoilRecords(crop_id)",
+        "CREATE INDEX IF NOT EXISTS idx_irr_farmer   ON IrrigationHistory(farmer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_irr_crop     ON IrrigationHistory(crop_id)",
+    ]),
+
+    (2, "IrrigationSchedule with one row per crop and date", [
+        """
+        CREATE TABLE IF NOT EXISTS IrrigationSchedule (
+            id             INTEGER  PRIMARY KEY AUTOINCREMENT,
+            farmer_id      INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_id        INTEGER  NOT NULL REFERENCES Crops(id) ON DELETE CASCADE,
+            scheduled_date DATE     NOT NULL,
+            water_amount   REAL     NOT NULL DEFAULT 0.0,
+            status         TEXT     NOT NULL DEFAULT 'pending'
+                                    CHECK(status IN ('pending','completed','missed','skipped')),
+            reason         TEXT,
+            completed_at   DATETIME,
+            created_at     DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        # Databases created before the unique key may hold duplicates: keep the newest
+        """
+        DELETE FROM IrrigationSchedule
+        WHERE id NOT IN (
+            SELECT MAX(id) FROM IrrigationSchedule GROUP BY crop_id, scheduled_date
+        )
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_sched_crop_date
+            ON IrrigationSchedule(crop_id, scheduled_date)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_sched_status_date
+            ON IrrigationSchedule(status, scheduled_date)
+        """,
+    ]),
+
+    (3, "Scheduler state, recalculation queue and forecasts", [
+        # Crops whose schedules need recalculating (filled by the missed-irrigation sweep)
+        """
+        CREATE TABLE IF NOT EXISTS ScheduleRecalcQueue (
+            crop_id      INTEGER  PRIMARY KEY REFERENCES Crops(id) ON DELETE CASCADE,
+            farmer_id    INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            missed_count INTEGER  NOT NULL DEFAULT 0,
+            enqueued_at  DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        # Simulator state where a crop's materialized schedule window ends;
+        # later rows are projected from it on read
+        """
+        CREATE TABLE IF NOT EXISTS ScheduleState (
+            crop_id             INTEGER  PRIMARY KEY REFERENCES Crops(id) ON DELETE CASCADE,
+            farmer_id           INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            next_day            INTEGER  NOT NULL,
+            moisture            REAL     NOT NULL,
+            last_irrigation_day INTEGER  NOT NULL,
+            base_et0            REAL     NOT NULL DEFAULT 5.0,
+            window_end          DATE     NOT NULL,
+            updated_at          DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        # Every fetched district forecast (JSON list of {date, temp, humidity, rain})
+        """
+        CREATE TABLE IF NOT EXISTS DistrictForecasts (
+            id         INTEGER  PRIMARY KEY AUTOINCREMENT,
+            district   TEXT     NOT NULL,
+            forecast   TEXT     NOT NULL,
+            fetched_at DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        # Forecast each crop's current schedule was computed with
+        """
+        CREATE TABLE IF NOT EXISTS ScheduleForecasts (
+            crop_id     INTEGER  PRIMARY KEY REFERENCES Crops(id) ON DELETE CASCADE,
+            forecast_id INTEGER  NOT NULL REFERENCES DistrictForecasts(id),
+            updated_at  DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_state_window ON ScheduleState(window_end)",
+        "CREATE INDEX IF NOT EXISTS idx_forecast_district ON DistrictForecasts(district, id)",
+    ]),
+
+    # Composite indexes shaped like the model queries (equality columns
+    # first, then the ORDER BY / range column). They replace the
+    # single-column indexes, which are their prefixes.
+    (4, "Composite indexes for model queries", [
+        # get_crops_by_farmer(): farmer_id = ? AND status = ? ORDER BY planting_date
+        "CREATE INDEX IF NOT EXISTS idx_crops_farmer_status ON Crops(farmer_id, status, planting_date)",
+        # get_latest_soil_for_crop(): crop_id = ? ORDER BY recorded_at DESC LIMIT 1
+        "CREATE INDEX IF NOT EXISTS idx_soil_crop_time ON SoilRecords(crop_id, recorded_at)",
+        # get_soil_records_for_farmer(): farmer_id = ? ORDER BY recorded_at DESC
+        "CREATE INDEX IF NOT EXISTS idx_soil_farmer_time ON SoilRecords(farmer_id, recorded_at)",
+        # get_history_for_crop() / get_last_irrigation_date()
+        "CREATE INDEX IF NOT EXISTS idx_irr_crop_time ON IrrigationHistory(crop_id, recorded_at)",
+        # get_history_for_farmer(): farmer_id = ? ORDER BY recorded_at DESC LIMIT ?
+        "CREATE INDEX IF NOT EXISTS idx_irr_farmer_time ON IrrigationHistory(farmer_id, recorded_at)",
+        # get_missed_count() / get_upcoming_schedule(): farmer_id, status, date range
+        """
+        CREATE INDEX IF NOT EXISTS idx_sched_farmer_status
+            ON IrrigationSchedule(farmer_id, status, scheduled_date)
+        """,
+        "DROP INDEX IF EXISTS idx_crops_farmer",
+        "DROP INDEX IF EXISTS idx_soil_crop",
+        "DROP INDEX IF EXISTS idx_soil_farmer",
+        "DROP INDEX IF EXISTS idx_irr_crop",
+        "DROP INDEX IF EXISTS idx_irr_farmer",
+    ]),
+
+    # Latest reading per crop: the index order matches ORDER BY recorded_at
+    # DESC, id DESC, so the lookup reads one index entry with no sort step,
+    # and it covers the id subquery of get_latest_soil_for_crops()
+    (5, "Covering index for latest soil readings", [
+        """
+        CREATE INDEX IF NOT EXISTS idx_soil_crop_latest
+            ON SoilRecords(crop_id, recorded_at DESC, id DESC)
+        """,
+        "DROP INDEX IF EXISTS idx_soil_crop_time",
+    ]),
+
+    # Dashboard counters kept current by triggers on every write path
+    # (models, services, raw route SQL and FK cascades), so dashboards read
+    # one row instead of aggregating IrrigationHistory / IrrigationSchedule.
+    # Increments upsert; decrements only UPDATE, so a cascade that already
+    # removed the summary row never recreates it.
+    (6, "Per-farmer and per-crop summary tables", [
+        """
+        CREATE TABLE IF NOT EXISTS FarmerSummary (
+            farmer_id      INTEGER  PRIMARY KEY REFERENCES Farmers(id) ON DELETE CASCADE,
+            history_events INTEGER  NOT NULL DEFAULT 0,
+            saved_events   INTEGER  NOT NULL DEFAULT 0,
+            water_used     REAL     NOT NULL DEFAULT 0.0,
+            scheduled      INTEGER  NOT NULL DEFAULT 0,
+            completed      INTEGER  NOT NULL DEFAULT 0,
+            missed         INTEGER  NOT NULL DEFAULT 0,
+            pending        INTEGER  NOT NULL DEFAULT 0,
+            skipped        INTEGER  NOT NULL DEFAULT 0,
+            updated_at     DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS CropSummary (
+            crop_id        INTEGER  PRIMARY KEY REFERENCES Crops(id) ON DELETE CASCADE,
+            farmer_id      INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            history_events INTEGER  NOT NULL DEFAULT 0,
+            saved_events   INTEGER  NOT NULL DEFAULT 0,
+            water_used     REAL     NOT NULL DEFAULT 0.0,
+            scheduled      INTEGER  NOT NULL DEFAULT 0,
+            completed      INTEGER  NOT NULL DEFAULT 0,
+            missed         INTEGER  NOT NULL DEFAULT 0,
+            pending        INTEGER  NOT NULL DEFAULT 0,
+            skipped        INTEGER  NOT NULL DEFAULT 0,
+            updated_at     DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_history_summary_insert
+        AFTER INSERT ON IrrigationHistory
+        BEGIN
+            INSERT INTO FarmerSummary (farmer_id, history_events, saved_events, water_used)
+            VALUES (NEW.farmer_id, 1, NEW.water_required = 0, NEW.water_required)
+            ON CONFLICT(farmer_id) DO UPDATE SET
+                history_events = history_events + 1,
+                saved_events   = saved_events + excluded.saved_events,
+                water_used     = water_used + excluded.water_used,
+                updated_at     = excluded.updated_at;
+            INSERT INTO CropSummary (crop_id, farmer_id, history_events, saved_events, water_used)
+            SELECT NEW.crop_id, NEW.farmer_id, 1, NEW.water_required = 0, NEW.water_required
+            WHERE NEW.crop_id IS NOT NULL
+            ON CONFLICT(crop_id) DO UPDATE SET
+                history_events = history_events + 1,
+                saved_events   = saved_events + excluded.saved_events,
+                water_used     = water_used + excluded.water_used,
+                updated_at     = excluded.updated_at;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_history_summary_delete
+        AFTER DELETE ON IrrigationHistory
+        BEGIN
+            UPDATE FarmerSummary SET
+                history_events = history_events - 1,
+                saved_events   = saved_events - (OLD.water_required = 0),
+                water_used     = water_used - OLD.water_required,
+                updated_at     = datetime('now','localtime')
+            WHERE farmer_id = OLD.farmer_id;
+            UPDATE CropSummary SET
+                history_events = history_events - 1,
+                saved_events   = saved_events - (OLD.water_required = 0),
+                water_used     = water_used - OLD.water_required,
+                updated_at     = datetime('now','localtime')
+            WHERE crop_id = OLD.crop_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_history_summary_update
+        AFTER UPDATE OF farmer_id, crop_id, water_required ON IrrigationHistory
+        BEGIN
+            UPDATE FarmerSummary SET
+                history_events = history_events - 1,
+                saved_events   = saved_events - (OLD.water_required = 0),
+                water_used     = water_used - OLD.water_required
+            WHERE farmer_id = OLD.farmer_id;
+            UPDATE CropSummary SET
+                history_events = history_events - 1,
+                saved_events   = saved_events - (OLD.water_required = 0),
+                water_used     = water_used - OLD.water_required
+            WHERE crop_id = OLD.crop_id;
+            INSERT INTO FarmerSummary (farmer_id, history_events, saved_events, water_used)
+            VALUES (NEW.farmer_id, 1, NEW.water_required = 0, NEW.water_required)
+            ON CONFLICT(farmer_id) DO UPDATE SET
+                history_events = history_events + 1,
+                saved_events   = saved_events + excluded.saved_events,
+                water_used     = water_used + excluded.water_used,
+                updated_at     = excluded.updated_at;
+            INSERT INTO CropSummary (crop_id, farmer_id, history_events, saved_events, water_used)
+            SELECT NEW.crop_id, NEW.farmer_id, 1, NEW.water_required = 0, NEW.water_required
+            WHERE NEW.crop_id IS NOT NULL
+            ON CONFLICT(crop_id) DO UPDATE SET
+                history_events = history_events + 1,
+                saved_events   = saved_events + excluded.saved_events,
+                water_used     = water_used + excluded.water_used,
+                updated_at     = excluded.updated_at;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_schedule_summary_insert
+        AFTER INSERT ON IrrigationSchedule
+        BEGIN
+            INSERT INTO FarmerSummary (farmer_id, scheduled, completed, missed, pending, skipped)
+            VALUES (NEW.farmer_id, 1, NEW.status = 'completed', NEW.status = 'missed',
+                    NEW.status = 'pending', NEW.status = 'skipped')
+            ON CONFLICT(farmer_id) DO UPDATE SET
+                scheduled  = scheduled + 1,
+                completed  = completed + excluded.completed,
+                missed     = missed + excluded.missed,
+                pending    = pending + excluded.pending,
+                skipped    = skipped + excluded.skipped,
+                updated_at = excluded.updated_at;
+            INSERT INTO CropSummary (crop_id, farmer_id, scheduled, completed, missed, pending, skipped)
+            VALUES (NEW.crop_id, NEW.farmer_id, 1, NEW.status = 'completed', NEW.status = 'missed',
+                    NEW.status = 'pending', NEW.status = 'skipped')
+            ON CONFLICT(crop_id) DO UPDATE SET
+                scheduled  = scheduled + 1,
+                completed  = completed + excluded.completed,
+                missed     = missed + excluded.missed,
+                pending    = pending + excluded.pending,
+                skipped    = skipped + excluded.skipped,
+                updated_at = excluded.updated_at;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_schedule_summary_delete
+        AFTER DELETE ON IrrigationSchedule
+        BEGIN
+            UPDATE FarmerSummary SET
+                scheduled  = scheduled - 1,
+                completed  = completed - (OLD.status = 'completed'),
+                missed     = missed - (OLD.status = 'missed'),
+                pending    = pending - (OLD.status = 'pending'),
+                skipped    = skipped - (OLD.status = 'skipped'),
+                updated_at = datetime('now','localtime')
+            WHERE farmer_id = OLD.farmer_id;
+            UPDATE CropSummary SET
+                scheduled  = scheduled - 1,
+                completed  = completed - (OLD.status = 'completed'),
+                missed     = missed - (OLD.status = 'missed'),
+                pending    = pending - (OLD.status = 'pending'),
+                skipped    = skipped - (OLD.status = 'skipped'),
+                updated_at = datetime('now','localtime')
+            WHERE crop_id = OLD.crop_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_schedule_summary_update
+        AFTER UPDATE OF farmer_id, crop_id, status ON IrrigationSchedule
+        WHEN OLD.status IS NOT NEW.status
+          OR OLD.crop_id IS NOT NEW.crop_id
+          OR OLD.farmer_id IS NOT NEW.farmer_id
+        BEGIN
+            UPDATE FarmerSummary SET
+                scheduled  = scheduled - 1,
+                completed  = completed - (OLD.status = 'completed'),
+                missed     = missed - (OLD.status = 'missed'),
+                pending    = pending - (OLD.status = 'pending'),
+                skipped    = skipped - (OLD.status = 'skipped')
+            WHERE farmer_id = OLD.farmer_id;
+            UPDATE CropSummary SET
+                scheduled  = scheduled - 1,
+                completed  = completed - (OLD.status = 'completed'),
+                missed     = missed - (OLD.status = 'missed'),
+                pending    = pending - (OLD.status = 'pending'),
+                skipped    = skipped - (OLD.status = 'skipped')
+            WHERE crop_id = OLD.crop_id;
+            INSERT INTO FarmerSummary (farmer_id, scheduled, completed, missed, pending, skipped)
+            VALUES (NEW.farmer_id, 1, NEW.status = 'completed', NEW.status = 'missed',
+                    NEW.status = 'pending', NEW.status = 'skipped')
+            ON CONFLICT(farmer_id) DO UPDATE SET
+                scheduled  = scheduled + 1,
+                completed  = completed + excluded.completed,
+                missed     = missed + excluded.missed,
+                pending    = pending + excluded.pending,
+                skipped    = skipped + excluded.skipped,
+                updated_at = excluded.updated_at;
+            INSERT INTO CropSummary (crop_id, farmer_id, scheduled, completed, missed, pending, skipped)
+            VALUES (NEW.crop_id, NEW.farmer_id, 1, NEW.status = 'completed', NEW.status = 'missed',
+                    NEW.status = 'pending', NEW.status = 'skipped')
+            ON CONFLICT(crop_id) DO UPDATE SET
+                scheduled  = scheduled + 1,
+                completed  = completed + excluded.completed,
+                missed     = missed + excluded.missed,
+                pending    = pending + excluded.pending,
+                skipped    = skipped + excluded.skipped,
+                updated_at = excluded.updated_at;
+        END
+        """,
+        # Backfill from the existing rows
+        """
+        INSERT INTO FarmerSummary
+            (farmer_id, history_events, saved_events, water_used,
+             scheduled, completed, missed, pending, skipped)
+        SELECT farmer_id, SUM(history_events), SUM(saved_events), SUM(water_used),
+               SUM(scheduled), SUM(completed), SUM(missed), SUM(pending), SUM(skipped)
+        FROM (
+            SELECT farmer_id, COUNT(*) AS history_events,
+                   SUM(water_required = 0) AS saved_events, SUM(water_required) AS water_used,
+                   0 AS scheduled, 0 AS completed, 0 AS missed, 0 AS pending, 0 AS skipped
+            FROM IrrigationHistory GROUP BY farmer_id
+            UNION ALL
+            SELECT farmer_id, 0, 0, 0, COUNT(*), SUM(status = 'completed'),
+                   SUM(status = 'missed'), SUM(status = 'pending'), SUM(status = 'skipped')
+            FROM IrrigationSchedule GROUP BY farmer_id
+        )
+        WHERE farmer_id IN (SELECT id FROM Farmers)
+        GROUP BY farmer_id
+        """,
+        """
+        INSERT INTO CropSummary
+            (crop_id, farmer_id, history_events, saved_events, water_used,
+             scheduled, completed, missed, pending, skipped)
+        SELECT s.crop_id, c.farmer_id, SUM(history_events), SUM(saved_events), SUM(water_used),
+               SUM(scheduled), SUM(completed), SUM(missed), SUM(pending), SUM(skipped)
+        FROM (
+            SELECT crop_id, COUNT(*) AS history_events,
+                   SUM(water_required = 0) AS saved_events, SUM(water_required) AS water_used,
+                   0 AS scheduled, 0 AS completed, 0 AS missed, 0 AS pending, 0 AS skipped
+            FROM IrrigationHistory WHERE crop_id IS NOT NULL GROUP BY crop_id
+            UNION ALL
+            SELECT crop_id, 0, 0, 0, COUNT(*), SUM(status = 'completed'),
+                   SUM(status = 'missed'), SUM(status = 'pending'), SUM(status = 'skipped')
+            FROM IrrigationSchedule GROUP BY crop_id
+        ) s
+        JOIN Crops c ON c.id = s.crop_id
+        GROUP BY s.crop_id
+        """,
+    ]),
+
+    # Retention (services/archival.py): rows past ARCHIVE_AFTER_DAYS move
+    # to archive tables tagged by season, and monthly rollups keep the
+    # analytics totals. Archive inserts count into the summaries exactly as
+    # the hot-table deletes count out, so lifetime totals do not change.
+    # Archived rows go with their farmer but outlive a deleted crop.
+    (7, "Archive and rollup tables for old history and schedules", [
+        # Oldest-first batches seek these instead of scanning the hot tables
+        "CREATE INDEX IF NOT EXISTS idx_irr_time ON IrrigationHistory(recorded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_sched_date ON IrrigationSchedule(scheduled_date)",
+        """
+        CREATE TABLE IF NOT EXISTS IrrigationHistoryArchive (
+            id                INTEGER  PRIMARY KEY,
+            farmer_id         INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_id           INTEGER,
+            city              TEXT     NOT NULL DEFAULT '',
+            stage             TEXT     NOT NULL DEFAULT '',
+            days_after_sowing INTEGER  NOT NULL DEFAULT 0,
+            et0               REAL     NOT NULL DEFAULT 0.0,
+            kc                REAL     NOT NULL DEFAULT 1.0,
+            water_required    REAL     NOT NULL DEFAULT 0.0,
+            decision          TEXT     NOT NULL DEFAULT '',
+            recorded_at       DATETIME NOT NULL,
+            season            TEXT     NOT NULL,
+            archived_at       DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_irr_archive_season ON IrrigationHistoryArchive(season)",
+        """
+        CREATE INDEX IF NOT EXISTS idx_irr_archive_farmer_time
+            ON IrrigationHistoryArchive(farmer_id, recorded_at)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS IrrigationScheduleArchive (
+            id             INTEGER  PRIMARY KEY,
+            farmer_id      INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_id        INTEGER  NOT NULL,
+            scheduled_date DATE     NOT NULL,
+            water_amount   REAL     NOT NULL DEFAULT 0.0,
+            status         TEXT     NOT NULL,
+            reason         TEXT,
+            completed_at   DATETIME,
+            created_at     DATETIME,
+            season         TEXT     NOT NULL,
+            archived_at    DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_sched_archive_season ON IrrigationScheduleArchive(season)",
+        """
+        CREATE INDEX IF NOT EXISTS idx_sched_archive_crop_date
+            ON IrrigationScheduleArchive(crop_id, scheduled_date)
+        """,
+        # Monthly totals of archived rows; crop_id 0 = history without a crop
+        """
+        CREATE TABLE IF NOT EXISTS IrrigationRollups (
+            farmer_id       INTEGER  NOT NULL REFERENCES Farmers(id) ON DELETE CASCADE,
+            crop_id         INTEGER  NOT NULL DEFAULT 0,
+            month           TEXT     NOT NULL,
+            history_events  INTEGER  NOT NULL DEFAULT 0,
+            saved_events    INTEGER  NOT NULL DEFAULT 0,
+            water_used      REAL     NOT NULL DEFAULT 0.0,
+            scheduled       INTEGER  NOT NULL DEFAULT 0,
+            completed       INTEGER  NOT NULL DEFAULT 0,
+            missed          INTEGER  NOT NULL DEFAULT 0,
+            pending         INTEGER  NOT NULL DEFAULT 0,
+            skipped         INTEGER  NOT NULL DEFAULT 0,
+            water_scheduled REAL     NOT NULL DEFAULT 0.0,
+            PRIMARY KEY (farmer_id, crop_id, month)
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_history_archive_summary_insert
+        AFTER INSERT ON IrrigationHistoryArchive
+        BEGIN
+            INSERT INTO FarmerSummary (farmer_id, history_events, saved_events, water_used)
+            VALUES (NEW.farmer_id, 1, NEW.water_required = 0, NEW.water_required)
+            ON CONFLICT(farmer_id) DO UPDATE SET
+                history_events = history_events + 1,
+                saved_events   = saved_events + excluded.saved_events,
+                water_used     = water_used + excluded.water_used,
+                updated_at     = excluded.updated_at;
+            INSERT INTO CropSummary (crop_id, farmer_id, history_events, saved_events, water_used)
+            SELECT NEW.crop_id, NEW.farmer_id, 1, NEW.water_required = 0, NEW.water_required
+            WHERE NEW.crop_id IN (SELECT id FROM Crops)
+            ON CONFLICT(crop_id) DO UPDATE SET
+                history_events = history_events + 1,
+                saved_events   = saved_events + excluded.saved_events,
+                water_used     = water_used + excluded.water_used,
+                updated_at     = excluded.updated_at;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_schedule_archive_summary_insert
+        AFTER INSERT ON IrrigationScheduleArchive
+        BEGIN
+            INSERT INTO FarmerSummary (farmer_id, scheduled, completed, missed, pending, skipped)
+            VALUES (NEW.farmer_id, 1, NEW.status = 'completed', NEW.status = 'missed',
+                    NEW.status = 'pending', NEW.status = 'skipped')
+            ON CONFLICT(farmer_id) DO UPDATE SET
+                scheduled  = scheduled + 1,
+                completed  = completed + excluded.completed,
+                missed     = missed + excluded.missed,
+                pending    = pending + excluded.pending,
+                skipped    = skipped + excluded.skipped,
+                updated_at = excluded.updated_at;
+            INSERT INTO CropSummary (crop_id, farmer_id, scheduled, completed, missed, pending, skipped)
+            SELECT NEW.crop_id, NEW.farmer_id, 1, NEW.status = 'completed', NEW.status = 'missed',
+                   NEW.status = 'pending', NEW.status = 'skipped'
+            WHERE NEW.crop_id IN (SELECT id FROM Crops)
+            ON CONFLICT(crop_id) DO UPDATE SET
+                scheduled  = scheduled + 1,
+                completed  = completed + excluded.completed,
+                missed     = missed + excluded.missed,
+                pending    = pending + excluded.pending,
+                skipped    = skipped + excluded.skipped,
+                updated_at = excluded.updated_at;
+        END
+        """,
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _require_sqlite():
+    """Raise RuntimeError unless the configured backend is SQLite."""
+    backend = get_dialect().name
+    if backend != "sqlite":
+        raise RuntimeError(
+            f"Schema migrations are SQLite DDL and cannot run on DB_BACKEND={backend}; "
+            "provision the schema separately and set AUTO_MIGRATE=0"
+        )
+
+
+def _applied_versions() -> set:
+    _require_sqlite()
+    execute_db(
+        """
+        CREATE TABLE IF NOT EXISTS SchemaMigrations (
+            version    INTEGER  PRIMARY KEY,
+            name       TEXT     NOT NULL,
+            applied_at DATETIME NOT NULL DEFAULT (datetime('now','localtime'))
+        )
+        """
+    )
+    return {row["version"] for row in query_db("SELECT version FROM SchemaMigrations")}
+
+
+def current_version() -> int:
+    """Highest applied migration (0 for an empty database)."""
+    return max(_applied_versions(), default=0)
+
+
+def migrate(target: int = None) -> list:
+    """
+    Apply pending migrations up to `target` (default: all), each in its own
+    transaction together with its SchemaMigrations row. Workers starting
+    at once serialize on the write lock and skip what another applied.
+    Returns the versions applied. Raises RuntimeError off SQLite.
+    """
+    done = _applied_versions()
+    applied = []
+    for version, name, statements in MIGRATIONS:
+        if target is not None and version > target:
+            break
+        if version in done:
+            continue
+        with transaction() as db:
+            # Re-check under the write lock
+            if db.execute(
+                "SELECT 1 FROM SchemaMigrations WHERE version = ?", (version,)
+            ).fetchone():
+                continue
+            for statement in statements:
+                db.execute(statement)
+            db.execute(
+                "INSERT INTO SchemaMigrations (version, name) VALUES (?, ?)",
+                (version, name),
+            )
+        applied.append(version)
+    return applied
+
+
+# ── Index checks ───────────────────────────────────────────────────────────────
+# (index, representative query, args): EXPLAIN QUERY PLAN must use the index.
+
+INDEX_CHECKS = [
+    ("idx_crops_farmer_status",
+     "SELECT * FROM Crops WHERE farmer_id = ? AND status = ? ORDER BY planting_date DESC",
+     (1, "active")),
+    ("idx_soil_crop_latest",
+     "SELECT * FROM SoilRecords WHERE crop_id = ? ORDER BY recorded_at DESC, id DESC LIMIT 1",
+     (1,)),
+    ("idx_soil_farmer_time",
+     "SELECT * FROM SoilRecords WHERE farmer_id = ? ORDER BY recorded_at DESC",
+     (1,)),
+    ("idx_irr_crop_time",
+     "SELECT * FROM IrrigationHistory WHERE crop_id = ? ORDER BY recorded_at DESC LIMIT ?",
+     (1, 20)),
+    ("idx_irr_crop_time",  # load_irrigation_state(): the season as a half-open range
+     "SELECT DISTINCT DATE(recorded_at) AS irrigated_on FROM IrrigationHistory "
+     "WHERE crop_id = ? AND recorded_at >= ? AND recorded_at < ?",
+     (1, "2024-01-01", "2024-05-01")),
+    ("idx_irr_crop_time",  # load_irrigated_dates(crop_ids)
+     "SELECT h.crop_id, DATE(h.recorded_at) AS irrigated_on FROM IrrigationHistory h "
+     "JOIN Crops c ON c.id = h.crop_id WHERE h.crop_id IN (?, ?) AND h.recorded_at < ?",
+     (1, 2, "2024-01-01")),
+    ("idx_irr_crop_time",  # get_last_irrigation_date()
+     "SELECT DATE(recorded_at) AS last_date FROM IrrigationHistory WHERE crop_id = ? ORDER BY recorded_at DESC LIMIT 1",
+     (1,)),
+    ("idx_irr_farmer_time",
+     "SELECT * FROM IrrigationHistory WHERE farmer_id = ? ORDER BY recorded_at DESC LIMIT ?",
+     (1, 50)),
+    ("idx_irr_farmer_time",  # get_history_page(): keyset seek past the previous page
+     "SELECT * FROM IrrigationHistory WHERE farmer_id = ? AND recorded_at <= ? "
+     "AND (recorded_at < ? OR id < ?) ORDER BY recorded_at DESC, id DESC LIMIT ?",
+     (1, "2024-01-01", "2024-01-01", 1, 11)),
+    ("idx_irr_time",  # archival: oldest rows past the retention horizon
+     "SELECT * FROM IrrigationHistory WHERE recorded_at < ? ORDER BY recorded_at, id LIMIT ?",
+     ("2024-01-01", 1000)),
+    ("idx_sched_date",
+     "SELECT * FROM IrrigationSchedule WHERE scheduled_date < ? AND status != 'pending' "
+     "ORDER BY scheduled_date, id LIMIT ?",
+     ("2024-01-01", 1000)),
+    ("idx_sched_farmer_status",
+     "SELECT COUNT(*) FROM IrrigationSchedule WHERE farmer_id = ? AND status = 'missed'",
+     (1,)),
+    ("uq_sched_crop_date",
+     "SELECT * FROM IrrigationSchedule WHERE crop_id = ? AND scheduled_date >= ?",
+     (1, "2024-01-01")),
+]
+
+
+def explain_query_plan(query: str, args=()) -> list:
+    """SQLite EXPLAIN QUERY PLAN detail lines for a query (RuntimeError off SQLite)."""
+    _require_sqlite()
+    return [row["detail"] for row in query_db(f"EXPLAIN QUERY PLAN {query}", args)]
+
+
+def check_indexes() -> list:
+    """[(index, used, plan lines)] for every entry in INDEX_CHECKS."""
+    results = []
+    for index, query, args in INDEX_CHECKS:
+        plan = explain_query_plan(query, args)
+        used = any(f"INDEX {index}" in line for line in plan)
+        results.append((index, used, plan))
+    return results
+
+
+def auto_migrate_enabled(config=None) -> bool:
+    """AUTO_MIGRATE, or automatically for SQLite when unset."""
+    config = config if config is not None else current_app.config
+    enabled = config.get("AUTO_MIGRATE")
+    if enabled is None:
+        return get_dialect(config).name == "sqlite"
+    return bool(enabled)
+
+
+def init_app(app):
+    """Apply pending migrations at startup (Config.AUTO_MIGRATE)."""
+    if auto_migrate_enabled(app.config):
+        with app.app_context():
+            migrate()
@@ -1,7 +1,8 @@
 """
 Crop model — CRUD for the Crops table.
 """
-from app.database import query_db, execute_db
+from app.database import query_db, execute_db, transaction
+from app.models.summary import record_history_delete, record_schedule_delete
 
 
 def add_crop(
@@ -81,10 +82,15 @@ def update_crop_status(crop_id: int, status: str):
 
 def delete_crop(crop_id: int, farmer_id: int):
     """Delete a crop (only if owned by farmer)."""
-    execute_db(
-        "DELETE FROM Crops WHERE id = ? AND farmer_id = ?",
-        (crop_id, farmer_id),
-    )
+    # Off SQLite its history and schedule rows cascade with it (MYSQL_SETUP.md)
+    owned = "WHERE crop_id IN (SELECT id FROM Crops WHERE id = ? AND farmer_id = ?)"
+    with transaction():
+        record_history_delete(owned, (crop_id, farmer_id))
+        record_schedule_delete(owned, (crop_id, farmer_id))
+        execute_db(
+            "DELETE FROM Crops WHERE id = ? AND farmer_id = ?",
+            (crop_id, farmer_id),
+        )
 
 
 def get_active_crops_count(farmer_id: int) -> int:
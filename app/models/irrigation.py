@@ -1,7 +1,20 @@
 """
 IrrigationHistory model — CRUD for the IrrigationHistory table.
 """
-from app.database import query_db, execute_db
+import base64
+
+from app.database import query_db, execute_db, iter_query, transaction
+from app.models.summary import get_farmer_summary, record_history_insert
+
+# Farmer history with crop names; pages seek idx_irr_farmer_time on (recorded_at, id)
+_FARMER_HISTORY = """
+    SELECT ih.*, c.crop_name, c.field_name
+    FROM IrrigationHistory ih
+    JOIN Crops c ON c.id = ih.crop_id
+    WHERE ih.farmer_id = ?{seek}
+    ORDER BY ih.recorded_at DESC, ih.id DESC
+"""
+_SEEK = " AND ih.recorded_at <= ? AND (ih.recorded_at < ? OR ih.id < ?)"
 
 
 def add_irrigation_record(
@@ -16,24 +29,26 @@ def add_irrigation_record(
     decision: str,
 ) -> int:
     """Insert an irrigation event and return new row id."""
-    return execute_db(
-        """
-        INSERT INTO IrrigationHistory
-            (farmer_id, crop_id, city, stage, days_after_sowing, et0, kc, water_required, decision)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            farmer_id,
-            crop_id,
-            city,
-            stage,
-            days_after_sowing,
-            round(et0, 3),
-            round(kc, 3),
-            round(water_required, 3),
-            decision,
-        ),
-    )
+    with transaction():
+        record_history_insert(farmer_id, crop_id, round(water_required, 3))
+        return execute_db(
+            """
+            INSERT INTO IrrigationHistory
+                (farmer_id, crop_id, city, stage, days_after_sowing, et0, kc, water_required, decision)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                farmer_id,
+                crop_id,
+                city,
+                stage,
+                days_after_sowing,
+                round(et0, 3),
+                round(kc, 3),
+                round(water_required, 3),
+                decision,
+            ),
+        )
 
 
 def get_history_for_farmer(farmer_id: int, limit: int = 50):
@@ -51,6 +66,48 @@ def get_history_for_farmer(farmer_id: int, limit: int = 50):
     )
 
 
+def encode_cursor(row) -> str:
+    """Opaque page cursor for the (recorded_at, id) key of a history row."""
+    key = f"{row['recorded_at']}|{row['id']}"
+    return base64.urlsafe_b64encode(key.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(recorded_at, id) from encode_cursor(); raises ValueError if malformed."""
+    try:
+        key = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        recorded_at, row_id = key.rsplit("|", 1)
+        return recorded_at, int(row_id)
+    except (TypeError, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid history cursor")
+
+
+def get_history_page(farmer_id: int, per_page: int, cursor: str = None):
+    """
+    One page of a farmer's irrigation events, newest first. `cursor` is the
+    next_cursor of the previous page: the query seeks past that row's key
+    instead of skipping OFFSET rows, so every page costs the same.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        recorded_at, row_id = decode_cursor(cursor)
+        query = _FARMER_HISTORY.format(seek=_SEEK) + " LIMIT ?"
+        args = (farmer_id, recorded_at, recorded_at, row_id, per_page + 1)
+    else:
+        query = _FARMER_HISTORY.format(seek="") + " LIMIT ?"
+        args = (farmer_id, per_page + 1)
+    rows = query_db(query, args)
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def iter_history_for_farmer(farmer_id: int, batch_size: int = 500):
+    """Stream all of a farmer's irrigation events, newest first, in batches."""
+    return iter_query(_FARMER_HISTORY.format(seek=""), (farmer_id,), batch_size)
+
+
 def get_history_for_crop(crop_id: int, limit: int = 20):
     """Return irrigation events for a specific crop, newest first."""
     return query_db(
@@ -82,13 +139,4 @@ def get_last_irrigation_date(crop_id: int):
 
 def get_total_water_saved(farmer_id: int) -> float:
     """Return total water saved (0 water events) for dashboard metric."""
-    result = query_db(
-        """
-        SELECT COALESCE(SUM(CASE WHEN water_required = 0 THEN 1 ELSE 0 END), 0) AS saved_events
-        FROM IrrigationHistory
-        WHERE farmer_id = ?
-        """,
-        (farmer_id,),
-        one=True,
-    )
-    return result["saved_events"] if result else 0
\ No newline at end of file
+    return get_farmer_summary(farmer_id)["saved_events"]
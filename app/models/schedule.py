@@ -1,7 +1,8 @@
 """
 IrrigationSchedule model — CRUD for the IrrigationSchedule table.
 """
-from app.database import query_db, execute_db
+from app.database import query_db, execute_db, transaction
+from app.models.summary import record_schedule_update
 from datetime import date, timedelta
 
 
@@ -39,42 +40,46 @@ def get_schedule_by_crop(crop_id: int, limit: int = 30):
 
 def mark_completed(schedule_id: int, actual_water: float = None):
     """Mark a schedule entry as completed."""
-    if actual_water:
-        execute_db(
-            """
-            UPDATE IrrigationSchedule
-            SET status = 'completed',
-                completed_at = datetime('now'),
-                water_amount = ?
-            WHERE id = ?
-            """,
-            (actual_water, schedule_id),
-        )
-    else:
+    with transaction():
+        record_schedule_update("WHERE id = ?", (schedule_id,), "completed")
+        if actual_water:
+            execute_db(
+                """
+                UPDATE IrrigationSchedule
+                SET status = 'completed',
+                    completed_at = datetime('now'),
+                    water_amount = ?
+                WHERE id = ?
+                """,
+                (actual_water, schedule_id),
+            )
+        else:
+            execute_db(
+                """
+                UPDATE IrrigationSchedule
+                SET status = 'completed',
+                    completed_at = datetime('now')
+                WHERE id = ?
+                """,
+                (schedule_id,),
+            )
+
+
+def mark_skipped(schedule_id: int, reason: str):
+    """Mark a schedule entry as skipped with reason."""
+    with transaction():
+        record_schedule_update("WHERE id = ?", (schedule_id,), "skipped")
         execute_db(
             """
             UPDATE IrrigationSchedule
-            SET status = 'completed',
-                completed_at = datetime('now')
+            SET status = 'skipped',
+                reason = ?
             WHERE id = ?
             """,
-            (schedule_id,),
+            (reason, schedule_id),
         )
 
 
-def mark_skipped(schedule_id: int, reason: str):
-    """Mark a schedule entry as skipped with reason."""
-    execute_db(
-        """
-        UPDATE IrrigationSchedule
-        SET status = 'skipped',
-            reason = ?
-        WHERE id = ?
-        """,
-        (reason, schedule_id),
-    )
-
-
 def get_missed_count(farmer_id: int) -> int:
     """Get count of missed irrigations."""
     result = query_db(
@@ -90,14 +95,12 @@ def get_missed_count(farmer_id: int) -> int:
 
 
 def clear_old_schedules(crop_id: int):
-    """Delete old completed/skipped schedules older than 60 days."""
+    """Archive old completed/skipped schedules older than 60 days."""
+    from app.services.archival import SCHEDULES, archive_rows
+
     cutoff_date = date.today() - timedelta(days=60)
-    execute_db(
-        """
-        DELETE FROM IrrigationSchedule
-        WHERE crop_id = ?
-          AND scheduled_date < ?
-          AND status IN ('completed', 'skipped')
-        """,
-        (crop_id, cutoff_date),
-    )
\ No newline at end of file
+    return archive_rows(
+        SCHEDULES, cutoff_date,
+        where=" AND crop_id = ? AND status IN ('completed', 'skipped')",
+        args=(crop_id,),
+    )
@@ -17,7 +17,9 @@ def add_soil_record(
     soil_fertility: str,
 ) -> int:
     """Insert a soil reading. Returns new row id."""
-    return execute_db(
+    from app.services.soil_hydraulics import invalidate_crop_hydraulics
+
+    record_id = execute_db(
         """
         INSERT INTO SoilRecords
             (farmer_id, crop_id, N, P, K, ph, moisture, sand, clay, soil_fertility)
@@ -25,6 +27,8 @@ def add_soil_record(
         """,
         (farmer_id, crop_id, N, P, K, ph, moisture, sand, clay, soil_fertility),
     )
+    invalidate_crop_hydraulics(crop_id)
+    return record_id
 
 
 def get_latest_soil_for_crop(crop_id: int):
@@ -33,7 +37,7 @@ def get_latest_soil_for_crop(crop_id: int):
         """
         SELECT * FROM SoilRecords
         WHERE crop_id = ?
-        ORDER BY recorded_at DESC
+        ORDER BY recorded_at DESC, id DESC
         LIMIT 1
         """,
         (crop_id,),
@@ -41,6 +45,31 @@ def get_latest_soil_for_crop(crop_id: int):
     )
 
 
+def get_latest_soil_for_crops(crop_ids) -> dict:
+    """
+    Return {crop_id: most recent soil record} for many crops in one query.
+    Each crop's latest id comes from one idx_soil_crop_latest entry, which
+    beats ranking every reading with a window function.
+    """
+    crop_ids = list(crop_ids)
+    if not crop_ids:
+        return {}
+    rows = query_db(
+        f"""
+        SELECT s.* FROM Crops c
+        JOIN SoilRecords s ON s.id = (
+            SELECT l.id FROM SoilRecords l
+            WHERE l.crop_id = c.id
+            ORDER BY l.recorded_at DESC, l.id DESC
+            LIMIT 1
+        )
+        WHERE c.id IN ({", ".join("?" for _ in crop_ids)})
+        """,
+        crop_ids,
+    )
+    return {row["crop_id"]: row for row in rows}
+
+
 def get_soil_records_for_farmer(farmer_id: int):
     """Return all soil records for a farmer, newest first."""
     return query_db(
@@ -0,0 +1,237 @@
+"""
+Summary model — per-farmer and per-crop dashboard counters.
+
+FarmerSummary / CropSummary make reads a single primary-key lookup. On
+SQLite they are maintained by triggers on IrrigationHistory and
+IrrigationSchedule (migration 6) and their archive tables (migration 7).
+Other backends have no such triggers (migrations are SQLite-only), so the
+write paths call the record_* helpers below, inside their own transaction
+and before the statement they describe, to apply the same deltas. Moving
+rows to the archive changes no totals, so archival records nothing.
+rebuild_summaries() — `flask rebuild-summaries` — recomputes both tables
+from the source tables in portable SQL, to backfill them.
+"""
+from collections import defaultdict
+
+from app.database import query_db, execute_db, executemany_db, get_dialect, transaction
+
+EMPTY_SUMMARY = {
+    "history_events": 0,
+    "saved_events": 0,
+    "water_used": 0.0,
+    "scheduled": 0,
+    "completed": 0,
+    "missed": 0,
+    "pending": 0,
+    "skipped": 0,
+}
+
+# One row per key: history counts and schedule status counts side by side,
+# hot and archived rows alike (summaries are lifetime totals)
+_TOTALS = """
+    SELECT {key}, COUNT(*) AS history_events,
+           SUM(CASE WHEN water_required = 0 THEN 1 ELSE 0 END) AS saved_events,
+           SUM(water_required) AS water_used,
+           0 AS scheduled, 0 AS completed, 0 AS missed, 0 AS pending, 0 AS skipped
+    FROM (
+        SELECT {key}, water_required FROM IrrigationHistory
+        UNION ALL
+        SELECT {key}, water_required FROM IrrigationHistoryArchive
+    ) h
+    WHERE {key} IS NOT NULL GROUP BY {key}
+    UNION ALL
+    SELECT {key}, 0, 0, 0, COUNT(*),
+           SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'missed' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END),
+           SUM(CASE WHEN status = 'skipped' THEN 1 ELSE 0 END)
+    FROM (
+        SELECT {key}, status FROM IrrigationSchedule
+        UNION ALL
+        SELECT {key}, status FROM IrrigationScheduleArchive
+    ) s
+    GROUP BY {key}
+"""
+
+_REBUILD_FARMERS = f"""
+    INSERT INTO FarmerSummary
+        (farmer_id, history_events, saved_events, water_used,
+         scheduled, completed, missed, pending, skipped)
+    SELECT farmer_id, SUM(history_events), SUM(saved_events), SUM(water_used),
+           SUM(scheduled), SUM(completed), SUM(missed), SUM(pending), SUM(skipped)
+    FROM ({_TOTALS.format(key="farmer_id")}) t
+    WHERE farmer_id IN (SELECT id FROM Farmers)
+    GROUP BY farmer_id
+"""
+
+_REBUILD_CROPS = f"""
+    INSERT INTO CropSummary
+        (crop_id, farmer_id, history_events, saved_events, water_used,
+         scheduled, completed, missed, pending, skipped)
+    SELECT s.crop_id, c.farmer_id, SUM(history_events), SUM(saved_events), SUM(water_used),
+           SUM(scheduled), SUM(completed), SUM(missed), SUM(pending), SUM(skipped)
+    FROM ({_TOTALS.format(key="crop_id")}) s
+    JOIN Crops c ON c.id = s.crop_id
+    GROUP BY s.crop_id, c.farmer_id
+"""
+
+
+SCHEDULE_STATUSES = ("completed", "missed", "pending", "skipped")
+
+
+# Adds signed deltas to a summary row, creating it on first use
+def _delta_upsert(table: str, key: str, extra: tuple = ()) -> str:
+    columns = (key, *extra, *EMPTY_SUMMARY)
+    return f"""
+        INSERT INTO {table} ({', '.join(columns)})
+        VALUES ({', '.join('?' for _ in columns)})
+        ON CONFLICT({key}) DO UPDATE SET
+            {', '.join(f"{c} = {table}.{c} + excluded.{c}" for c in EMPTY_SUMMARY)},
+            updated_at = NOW()
+    """
+
+
+_FARMER_DELTA = _delta_upsert("FarmerSummary", "farmer_id")
+_CROP_DELTA = _delta_upsert("CropSummary", "crop_id", ("farmer_id",))
+
+
+def _as_summary(row) -> dict:
+    return {key: row[key] for key in EMPTY_SUMMARY} if row else dict(EMPTY_SUMMARY)
+
+
+def get_farmer_summary(farmer_id: int) -> dict:
+    """Lifetime counters for a farmer (zeros when nothing is recorded yet)."""
+    return _as_summary(query_db(
+        "SELECT * FROM FarmerSummary WHERE farmer_id = ?", (farmer_id,), one=True
+    ))
+
+
+def get_crop_summary(crop_id: int) -> dict:
+    """Counters for one crop (zeros when nothing is recorded yet)."""
+    return _as_summary(query_db(
+        "SELECT * FROM CropSummary WHERE crop_id = ?", (crop_id,), one=True
+    ))
+
+
+def rebuild_summaries() -> int:
+    """
+    Recompute every summary row from the source tables (backfill, or repair
+    after out-of-band writes). Returns farmers summarized.
+    """
+    with transaction():
+        execute_db("DELETE FROM CropSummary")
+        execute_db("DELETE FROM FarmerSummary")
+        execute_db(_REBUILD_CROPS)
+        execute_db(_REBUILD_FARMERS)
+    return query_db("SELECT COUNT(*) AS n FROM FarmerSummary", one=True)["n"]
+
+
+# ── Incremental maintenance off SQLite ────────────────────────────────────────
+
+def triggers_maintain_summaries() -> bool:
+    """True where triggers keep the summaries (SQLite); record_* are no-ops there."""
+    return get_dialect().name == "sqlite"
+
+
+def _apply_deltas(deltas):
+    """deltas: ((farmer_id, crop_id), {column: change}) pairs, added to both tables."""
+    farmers = defaultdict(lambda: defaultdict(int))
+    crops = defaultdict(lambda: defaultdict(int))
+    for (farmer_id, crop_id), delta in deltas:
+        for column, change in delta.items():
+            farmers[farmer_id][column] += change
+            if crop_id is not None:
+                crops[(crop_id, farmer_id)][column] += change
+
+    if farmers:
+        executemany_db(_FARMER_DELTA, [
+            (farmer_id, *(delta[c] for c in EMPTY_SUMMARY))
+            for farmer_id, delta in farmers.items()
+        ])
+    if crops:
+        executemany_db(_CROP_DELTA, [
+            (crop_id, farmer_id, *(delta[c] for c in EMPTY_SUMMARY))
+            for (crop_id, farmer_id), delta in crops.items()
+        ])
+
+
+def _status_delta(status, sign: int, rows: int) -> dict:
+    delta = {"scheduled": sign * rows}
+    if status in SCHEDULE_STATUSES:
+        delta[status] = sign * rows
+    return delta
+
+
+def _schedule_deltas(where: str, args, new_status):
+    rows = query_db(
+        f"""
+        SELECT farmer_id, crop_id, status, COUNT(*) AS n
+        FROM IrrigationSchedule {where}
+        GROUP BY farmer_id, crop_id, status
+        """,
+        args,
+    )
+    for row in rows:
+        if row["status"] == new_status:
+            continue
+        key = (row["farmer_id"], row["crop_id"])
+        yield key, _status_delta(row["status"], -1, row["n"])
+        if new_status is not None:
+            yield key, _status_delta(new_status, 1, row["n"])
+
+
+def record_history_insert(farmer_id: int, crop_id, water_required: float):
+    """Count a new IrrigationHistory row."""
+    if triggers_maintain_summaries():
+        return
+    _apply_deltas([((farmer_id, crop_id), {
+        "history_events": 1,
+        "saved_events": int(water_required == 0),
+        "water_used": water_required,
+    })])
+
+
+def record_history_delete(where: str, args=()):
+    """Uncount the IrrigationHistory rows `where` selects, before deleting them."""
+    if triggers_maintain_summaries():
+        return
+    rows = query_db(
+        f"""
+        SELECT farmer_id, crop_id, COUNT(*) AS n,
+               SUM(CASE WHEN water_required = 0 THEN 1 ELSE 0 END) AS saved,
+               SUM(water_required) AS water
+        FROM IrrigationHistory {where}
+        GROUP BY farmer_id, crop_id
+        """,
+        args,
+    )
+    _apply_deltas(
+        ((row["farmer_id"], row["crop_id"]),
+         {"history_events": -row["n"], "saved_events": -int(row["saved"]),
+          "water_used": -float(row["water"])})
+        for row in rows
+    )
+
+
+def record_schedule_inserts(rows):
+    """Count new IrrigationSchedule rows, given as (farmer_id, crop_id, status)."""
+    if triggers_maintain_summaries():
+        return
+    _apply_deltas(
+        ((farmer_id, crop_id), _status_delta(status, 1, 1))
+        for farmer_id, crop_id, status in rows
+    )
+
+
+def record_schedule_update(where: str, args, new_status: str):
+    """Move the IrrigationSchedule rows `where` selects to new_status, before the UPDATE."""
+    if triggers_maintain_summaries():
+        return
+    _apply_deltas(_schedule_deltas(where, args, new_status))
+
+
+def record_schedule_delete(where: str, args=()):
+    """Uncount the IrrigationSchedule rows `where` selects, before deleting them."""
+    if triggers_maintain_summaries():
+        return
+    _apply_deltas(_schedule_deltas(where, args, None))
@@ -18,7 +18,7 @@ from app.services.ml_engine import (
     get_crop_duration, detect_season, soil_nature_from_texture,
     get_model_accuracies, get_all_crop_names,
 )
-from app.services.irrigation_engine import get_current_stage
+from app.services.irrigation_engine import get_current_stages
 
 crops_bp = Blueprint("crops", __name__, url_prefix="/crops")
 
@@ -30,10 +30,10 @@ crops_bp = Blueprint("crops", __name__, url_prefix="/crops")
 def my_crops():
     farmer = g.farmer
     crops = get_crops_by_farmer(farmer["id"])
-    enriched = []
-    for crop in crops:
-        stage_info = get_current_stage(crop["planting_date"], crop["growth_duration"])
-        enriched.append({**dict(crop), **stage_info})
+    enriched = [
+        {**dict(crop), **stage_info}
+        for crop, stage_info in zip(crops, get_current_stages(crops))
+    ]
     return render_template("crops/my_crops.html", crops=enriched)
 
 
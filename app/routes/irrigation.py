@@ -1,30 +1,42 @@
 """
 Irrigation routes — /irrigate/<crop_id>, /irrigate/<crop_id>/weekly, /history, /schedule
 """
+import csv
+import io
+import json
+from itertools import chain
+
 from flask import (
     Blueprint, render_template, request, redirect,
-    url_for, flash, g, jsonify,
+    url_for, flash, g, jsonify, current_app, Response, stream_with_context,
 )
 from app.routes.auth import login_required
 from app.models.crop import get_crops_by_farmer, get_crop_by_id_and_farmer
 from app.models.irrigation import (
-    add_irrigation_record, get_history_for_farmer, get_history_for_crop,
+    add_irrigation_record, get_history_for_crop, get_history_page,
+    iter_history_for_farmer,
 )
-from app.models.soil import get_latest_soil_for_crop
+from app.models.soil import get_latest_soil_for_crop, get_latest_soil_for_crops
 from app.services.weather import get_weather, get_weather_forecast
 from app.services.ml_engine import get_water_need
 from app.services.irrigation_engine import (
-    get_current_stage, calculate_irrigation, get_weekly_plan,
+    get_current_stage, get_current_stages, calculate_irrigation, get_weekly_plan,
+    get_farm_weekly_plan, WEEKLY_DECISIONS,
 )
 from app.services.advanced_scheduler import (
-    generate_full_lifecycle_schedule,
-    save_full_schedule_to_db,
+    materialize_lifecycle_schedule,
+    get_schedule_state,
+    iter_projected_schedule,
     get_full_schedule_for_crop,
     mark_irrigation_done,
     detect_and_handle_missed_irrigations,
     recalculate_after_missed_irrigation,
+    recalculate_forward,
+    get_recalc_request,
     get_schedule_statistics,
 )
+from app.services.scenario_planner import get_latest_district_forecast, run_scenarios
+from app.services.farm_optimizer import optimize_farm
 
 irrigation_bp = Blueprint("irrigation", __name__, url_prefix="/irrigation")
 
@@ -36,16 +48,50 @@ irrigation_bp = Blueprint("irrigation", __name__, url_prefix="/irrigation")
 def dashboard():
     farmer = g.farmer
     crops = get_crops_by_farmer(farmer["id"], status="active")
+    latest_soils = get_latest_soil_for_crops([crop["id"] for crop in crops])
     enriched = []
-    for crop in crops:
-        stage_info = get_current_stage(crop["planting_date"], crop["growth_duration"])
-        latest_soil = get_latest_soil_for_crop(crop["id"])
+    for crop, stage_info in zip(crops, get_current_stages(crops)):
+        latest_soil = latest_soils.get(crop["id"])
         enriched.append({
             **dict(crop),
             **stage_info,
             "last_moisture": latest_soil["moisture"] if latest_soil else "N/A",
         })
-    return render_template("irrigation/dashboard.html", crops=enriched)
+    
+    # Week-ahead plan for every crop from the stored district forecast; the
+    # forecast job keeps it fresh, so rendering never waits on the weather API
+    week_plan = None
+    forecast = get_latest_district_forecast(farmer["location"])
+    farm_plan = get_farm_weekly_plan(
+        forecast,
+        [get_water_need(c["crop_name"]) for c in enriched],
+        [c["last_moisture"] if c["last_moisture"] != "N/A" else 50.0 for c in enriched],
+    )
+    if farm_plan is not None:
+        week_plan = {
+            "dates": farm_plan["dates"],
+            "rows": [
+                {
+                    "crop": crop,
+                    "days": [
+                        {"water": water, "badge": WEEKLY_DECISIONS[code][1],
+                         "decision": WEEKLY_DECISIONS[code][0]}
+                        for water, code in zip(
+                            row["water"].tolist(), row["decision"].tolist()
+                        )
+                    ],
+                    "water_total": round(float(water_total), 2),
+                    "saved_total": round(float(saved_total), 2),
+                }
+                for crop, row, water_total, saved_total in zip(
+                    enriched, farm_plan["plan"],
+                    farm_plan["water_total"], farm_plan["saved_total"],
+                )
+            ],
+            "saved_total": round(float(farm_plan["saved_total"].sum()), 2),
+        }
+    
+    return render_template("irrigation/dashboard.html", crops=enriched, week_plan=week_plan)
 
 
 # ── Irrigation Advice for a crop ───────────────────────────────────────────────
@@ -60,7 +106,9 @@ def advice(crop_id):
         return redirect(url_for("irrigation.dashboard"))
 
     crop = dict(crop)
-    stage_info = get_current_stage(crop["planting_date"], crop["growth_duration"])
+    stage_info = get_current_stage(
+        crop["planting_date"], crop["growth_duration"], crop_name=crop["crop_name"]
+    )
 
     # Fetch weather for farmer's location
     weather = None
@@ -71,102 +119,59 @@ def advice(crop_id):
     except Exception as e:
         weather_error = str(e)
 
+    # Baseline soil moisture for display: latest soil reading, else default.
+    # Saving advice only writes IrrigationHistory, so one lookup serves every path.
+    latest_soil = get_latest_soil_for_crop(crop_id)
+    current_moisture = float(latest_soil["moisture"]) if latest_soil else 50.0
+
     result = None
     entered_moisture = None
     
-    # PART 1: Handle POST - User submitted irrigation calculation
+    # Handle POST - User submitted irrigation calculation
     if request.method == "POST" and weather:
         try:
             # CRITICAL: Capture user-entered moisture - this is the value they just typed
             entered_moisture = float(request.form["soil_moisture"])
-            soil_moisture = entered_moisture
         except (ValueError, KeyError):
             flash("Please enter a valid soil moisture value.", "danger")
-            # Get latest irrigation for display even on error
-            latest_irrigation_records = get_history_for_crop(crop_id, limit=1)
-            latest_irrigation = latest_irrigation_records[0] if latest_irrigation_records else None
-            
-            # Get baseline moisture for display
-            latest_soil = get_latest_soil_for_crop(crop_id)
-            current_moisture = float(latest_soil["moisture"]) if latest_soil else 50.0
-            
-            return render_template(
-                "irrigation/advice.html",
-                crop=crop, 
-                stage_info=stage_info,
-                current_moisture=current_moisture,
-                entered_moisture=None,
-                latest_irrigation=latest_irrigation,
-                weather=weather,
-                weather_error=weather_error, 
-                result=None,
+        
+        if entered_moisture is not None:
+            # Calculate irrigation recommendation using entered moisture
+            result = calculate_irrigation(
+                temperature=weather["temp"],
+                rainfall=weather["rain"],
+                kc=stage_info["kc"],
+                soil_moisture=entered_moisture,
             )
 
-        # Calculate irrigation recommendation using entered moisture
-        result = calculate_irrigation(
-            temperature=weather["temp"],
-            rainfall=weather["rain"],
-            kc=stage_info["kc"],
-            soil_moisture=soil_moisture,
-        )
-
-        # Save to history
-        add_irrigation_record(
-            farmer_id=farmer["id"],
-            crop_id=crop_id,
-            city=city,
-            stage=stage_info["stage_name"],
-            days_after_sowing=stage_info["days_after_sowing"],
-            et0=result["et0"],
-            kc=stage_info["kc"],
-            water_required=result["net_water"],
-            decision=result["decision"],
-        )
-        
-        # CRITICAL: Immediately fetch the latest irrigation record after saving
-        # This ensures UI shows the just-saved record
-        latest_irrigation_records = get_history_for_crop(crop_id, limit=1)
-        latest_irrigation = latest_irrigation_records[0] if latest_irrigation_records else None
-        
-        # Get baseline moisture (for reference display)
-        latest_soil = get_latest_soil_for_crop(crop_id)
-        current_moisture = float(latest_soil["moisture"]) if latest_soil else 50.0
-        
-        flash("Irrigation record saved successfully!", "success")
-        
-        # Return with all updated data
-        return render_template(
-            "irrigation/advice.html",
-            crop=crop,
-            stage_info=stage_info,
-            current_moisture=current_moisture,
-            entered_moisture=entered_moisture,  # Show the value user just entered
-            latest_irrigation=latest_irrigation,  # Show the just-saved record
-            weather=weather,
-            weather_error=weather_error,
-            result=result,
-        )
+            # Save to history
+            add_irrigation_record(
+                farmer_id=farmer["id"],
+                crop_id=crop_id,
+                city=city,
+                stage=stage_info["stage_name"],
+                days_after_sowing=stage_info["days_after_sowing"],
+                et0=result["et0"],
+                kc=stage_info["kc"],
+                water_required=result["net_water"],
+                decision=result["decision"],
+            )
+            flash("Irrigation record saved successfully!", "success")
     
-    # PART 2: Handle GET - Initial page load or refresh
-    # Get latest irrigation record
+    # Latest irrigation record, read after any save so the UI shows it
     latest_irrigation_records = get_history_for_crop(crop_id, limit=1)
     latest_irrigation = latest_irrigation_records[0] if latest_irrigation_records else None
 
-    # Determine baseline soil moisture for display
-    # Priority: 1. Latest soil reading, 2. Default
-    latest_soil = get_latest_soil_for_crop(crop_id)
-    current_moisture = float(latest_soil["moisture"]) if latest_soil else 50.0
-
     return render_template(
         "irrigation/advice.html",
         crop=crop,
         stage_info=stage_info,
         current_moisture=current_moisture,
-        entered_moisture=None,  # No entered value on GET
+        entered_moisture=entered_moisture,  # Value the user just entered (POST only)
         latest_irrigation=latest_irrigation,
         weather=weather,
         weather_error=weather_error,
-        result=None,
+        result=result,
     )
 
 
@@ -182,7 +187,9 @@ def weekly(crop_id):
         return redirect(url_for("irrigation.dashboard"))
 
     crop = dict(crop)
-    stage_info = get_current_stage(crop["planting_date"], crop["growth_duration"])
+    stage_info = get_current_stage(
+        crop["planting_date"], crop["growth_duration"], crop_name=crop["crop_name"]
+    )
     latest_soil = get_latest_soil_for_crop(crop_id)
     soil_moisture = latest_soil["moisture"] if latest_soil else 50.0
     base_water = get_water_need(crop["crop_name"])
@@ -212,12 +219,116 @@ def weekly(crop_id):
 
 # ── Irrigation History ─────────────────────────────────────────────────────────
 
+HISTORY_FIELDS = (
+    "id", "recorded_at", "crop_id", "crop_name", "field_name", "city", "stage",
+    "days_after_sowing", "et0", "kc", "water_required", "decision",
+)
+MAX_HISTORY_PER_PAGE = 100
+
+
+def _history_record(row) -> dict:
+    """JSON-ready history row (recorded_at as text on every backend)."""
+    record = {field: row[field] for field in HISTORY_FIELDS}
+    record["recorded_at"] = str(record["recorded_at"])
+    return record
+
+
+def _history_per_page() -> int:
+    per_page = request.args.get("per_page", type=int) or current_app.config["HISTORY_PER_PAGE"]
+    return min(max(per_page, 1), MAX_HISTORY_PER_PAGE)
+
+
 @irrigation_bp.route("/history")
 @login_required
 def history():
     farmer = g.farmer
-    records = get_history_for_farmer(farmer["id"], limit=100)
-    return render_template("irrigation/history.html", records=records)
+    cursor = request.args.get("cursor")
+    try:
+        records, next_cursor = get_history_page(farmer["id"], _history_per_page(), cursor)
+    except ValueError:
+        return redirect(url_for("irrigation.history"))
+    return render_template(
+        "irrigation/history.html",
+        records=records,
+        next_cursor=next_cursor,
+        is_first_page=not cursor,
+    )
+
+
+@irrigation_bp.route("/history/api")
+@login_required
+def history_api():
+    """
+    Irrigation history as JSON, newest first, one keyset page at a time.
+
+    Query: ?cursor=<next_cursor of the previous page>&per_page=<1..100>
+    """
+    try:
+        records, next_cursor = get_history_page(
+            g.farmer["id"], _history_per_page(), request.args.get("cursor")
+        )
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
+
+    return jsonify({
+        "success": True,
+        "records": [_history_record(row) for row in records],
+        "next_cursor": next_cursor,
+    })
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield line(HISTORY_FIELDS)
+    for row in rows:
+        yield line(_history_record(row).values())
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(_history_record(row)) + "\n"
+
+
+HISTORY_EXPORTS = {
+    "csv": (_csv_lines, "text/csv"),
+    "ndjson": (_ndjson_lines, "application/x-ndjson"),
+}
+
+
+@irrigation_bp.route("/history/export")
+@login_required
+def history_export():
+    """
+    Download the full irrigation history as ?format=csv (default) or ndjson.
+    Rows are streamed from a cursor as they are written, in constant memory.
+    """
+    export_format = request.args.get("format", "csv")
+    if export_format not in HISTORY_EXPORTS:
+        return jsonify({
+            "success": False,
+            "message": f"Unknown export format: {export_format}"
+        }), 400
+
+    lines, mimetype = HISTORY_EXPORTS[export_format]
+    rows = iter_history_for_farmer(g.farmer["id"])
+    return Response(
+        stream_with_context(lines(rows)),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=irrigation_history.{export_format}"
+        },
+    )
 
 
 
@@ -244,30 +355,34 @@ def full_schedule(crop_id):
         latest_soil = get_latest_soil_for_crop(crop_id)
         initial_moisture = float(latest_soil["moisture"]) if latest_soil else 60.0
         
-        new_schedule = generate_full_lifecycle_schedule(
+        materialize_lifecycle_schedule(
             farmer_id=farmer["id"],
             crop_id=crop_id,
             crop_name=crop["crop_name"],
             planting_date=crop["planting_date"],
             growth_duration=crop["growth_duration"],
             initial_soil_moisture=initial_moisture,
-            city=farmer["location"],
         )
-        
-        save_full_schedule_to_db(farmer["id"], crop_id, new_schedule)
         schedule = get_full_schedule_for_crop(crop_id)
         flash("Irrigation schedule generated successfully!", "success")
     
-    # Check for missed irrigations
-    missed_count = detect_and_handle_missed_irrigations(crop_id)
-    if missed_count > 0:
-        flash(f"Warning: {missed_count} irrigation(s) were missed. Consider recalculating schedule.", "warning")
+    # Stored rows cover the schedule window (rolled forward by the nightly
+    # jobs, never here); the rest of the season is simulated lazily from the
+    # stored generator state while rendering
+    has_rows = bool(schedule)
+    schedule = chain(schedule, iter_projected_schedule(crop, get_schedule_state(crop_id)))
+    
+    # Missed irrigations are marked by the nightly sweep; this page only reads.
+    # The template warns while the crop still has a recalculation queued.
+    missed_count = get_recalc_request(crop_id)
     
     # Get statistics
     stats = get_schedule_statistics(crop_id)
     
     # Get current stage
-    stage_info = get_current_stage(crop["planting_date"], crop["growth_duration"])
+    stage_info = get_current_stage(
+        crop["planting_date"], crop["growth_duration"], crop_name=crop["crop_name"]
+    )
     
     # Get latest soil moisture for display
     latest_soil = get_latest_soil_for_crop(crop_id)
@@ -277,6 +392,7 @@ def full_schedule(crop_id):
         "irrigation/schedule.html",
         crop=crop,
         schedule=schedule,
+        has_rows=has_rows,
         stats=stats,
         stage_info=stage_info,
         missed_count=missed_count,
@@ -311,20 +427,16 @@ def generate_schedule(crop_id):
         initial_moisture = float(latest_soil["moisture"]) if latest_soil else 60.0
         flash(f"Schedule generated using stored soil moisture: {initial_moisture}%", "info")
     
-    # Generate schedule with the correct moisture value
-    schedule = generate_full_lifecycle_schedule(
+    # Generate and save the schedule window with the correct moisture value
+    schedule = materialize_lifecycle_schedule(
         farmer_id=farmer["id"],
         crop_id=crop_id,
         crop_name=crop["crop_name"],
         planting_date=crop["planting_date"],
         growth_duration=crop["growth_duration"],
         initial_soil_moisture=initial_moisture,  # Use the correct value!
-        city=farmer["location"],
     )
     
-    # Save to database
-    save_full_schedule_to_db(farmer["id"], crop_id, schedule)
-    
     flash(f"Generated {len(schedule)} irrigation events for {crop['crop_name'].title()}!", "success")
     return redirect(url_for("irrigation.full_schedule", crop_id=crop_id))
 
@@ -337,7 +449,7 @@ def mark_complete(schedule_id):
     
     # Verify ownership
     schedule = query_db(
-        "SELECT * FROM IrrigationSchedule WHERE id = %s AND farmer_id = %s",
+        "SELECT * FROM IrrigationSchedule WHERE id = ? AND farmer_id = ?",
         (schedule_id, farmer["id"]),
         one=True
     )
@@ -384,19 +496,16 @@ def recalculate_schedule(crop_id):
         # Detect missed irrigations
         missed_count = detect_and_handle_missed_irrigations(crop_id)
         
-        # Regenerate schedule with user-provided moisture
-        new_schedule = generate_full_lifecycle_schedule(
+        # Re-simulate the remaining season from today's measured moisture
+        recalculate_forward(
             farmer_id=farmer["id"],
             crop_id=crop_id,
             crop_name=crop["crop_name"],
             planting_date=crop["planting_date"],
             growth_duration=crop["growth_duration"],
-            initial_soil_moisture=estimated_moisture,
-            city=farmer["location"],
+            current_moisture=estimated_moisture,
         )
         
-        save_full_schedule_to_db(farmer["id"], crop_id, new_schedule)
-        
         msg = f"Schedule recalculated with current moisture!"
         if missed_count > 0:
             msg += f" {missed_count} missed irrigation(s) detected."
@@ -460,3 +569,69 @@ def get_live_weather():
             "success": False,
             "message": str(e)
         }), 500
+
+
+# ── What-if Scenario Simulation API ────────────────────────────────────────────
+
+@irrigation_bp.route("/simulate", methods=["POST"])
+@login_required
+def simulate():
+    """
+    Compare irrigation scenarios without touching stored schedules.
+
+    Body: {"scenarios": [{crop_name, planting_date, growth_duration,
+    threshold, expected_rain, initial_moisture, soil_texture | sand + clay,
+    label}, ...]}
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "message": "Request body must be a JSON object"
+        }), 400
+    try:
+        forecast = get_latest_district_forecast(g.farmer["location"])
+        results = run_scenarios(data.get("scenarios"), forecast=forecast)
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
+
+    return jsonify({
+        "success": True,
+        "scenarios": results
+    })
+
+
+@irrigation_bp.route("/optimize", methods=["POST"])
+@login_required
+def optimize():
+    """
+    Share a daily water capacity across all active crops (read-only plan).
+
+    Body: {"daily_capacity": <water per day>, "days": <horizon, optional>}
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "message": "Request body must be a JSON object"
+        }), 400
+    try:
+        days = data.get("days")
+        plan = optimize_farm(
+            g.farmer["id"],
+            float(data.get("daily_capacity") or 0),
+            days=int(days) if days is not None else None,
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            "success": False,
+            "message": str(e)
+        }), 400
+
+    return jsonify({
+        "success": True,
+        "plan": plan
+    })
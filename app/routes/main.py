@@ -1,12 +1,13 @@
 """
-Main routes — /, /dashboard
+Main routes — /, /dashboard, /health/db, /health/db/pool
 """
-from flask import Blueprint, render_template, redirect, url_for, flash, g
+from flask import Blueprint, render_template, redirect, url_for, flash, g, jsonify
+from app.database import pool_stats, query_db
 from app.routes.auth import login_required
 from app.models.crop import get_crops_by_farmer
 from app.models.irrigation import get_history_for_farmer, get_total_water_saved
 from app.services.weather import get_weather
-from app.services.irrigation_engine import get_current_stage
+from app.services.irrigation_engine import get_current_stages
 
 main_bp = Blueprint("main", __name__)
 
@@ -25,10 +26,10 @@ def dashboard():
     crops = get_crops_by_farmer(farmer["id"], status="active")
 
     # Enrich each crop with its current stage info
-    enriched_crops = []
-    for crop in crops:
-        stage_info = get_current_stage(crop["planting_date"], crop["growth_duration"])
-        enriched_crops.append({**dict(crop), **stage_info})
+    enriched_crops = [
+        {**dict(crop), **stage_info}
+        for crop, stage_info in zip(crops, get_current_stages(crops))
+    ]
 
     # Recent irrigation events (last 5)
     recent_history = get_history_for_farmer(farmer["id"], limit=5)
@@ -51,3 +52,24 @@ def dashboard():
         weather=weather,
         weather_error=weather_error,
     )
+
+
+@main_bp.route("/health/db")
+def db_health():
+    """Liveness probe: can this worker run a query? (ok / fail only)"""
+    try:
+        query_db("SELECT 1")
+    except Exception:
+        return jsonify({"status": "fail"}), 503
+    return jsonify({"status": "ok"})
+
+
+@main_bp.route("/health/db/pool")
+@login_required
+def db_pool_health():
+    """Connection pool utilization and wait metrics for this worker."""
+    stats = pool_stats()
+    return jsonify({
+        "pooled": stats is not None,
+        "pool": stats,
+    })
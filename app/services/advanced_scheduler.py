@@ -4,42 +4,71 @@ Advanced Irrigation Scheduler — Full crop lifecycle scheduling with dynamic ad
 This module generates irrigation schedules from planting date to harvest,
 with automatic recalculation based on weather and irrigation history.
 """
+from collections import Counter
 from datetime import datetime, date, timedelta
-from decimal import Decimal
-from app.database import query_db, execute_db, transaction
-from app.services.irrigation_engine import generate_crop_stages
 
+from flask import current_app, has_app_context
 
-def check_if_irrigated(crop_id: int, check_date: date) -> str:
+from app.config import Config
+from app.database import query_db, execute_db, executemany_db, transaction
+from app.models.summary import (
+    record_schedule_delete, record_schedule_inserts, record_schedule_update,
+    triggers_maintain_summaries,
+)
+from app.services.schedule_engine import build_context, run_strategy, schedule_rows
+from app.services.soil_hydraulics import (
+    get_crop_hydraulics, get_soil_hydraulics, load_crop_textures,
+)
+from app.services.water_balance import replay_moisture
+
+DEFAULT_INITIAL_MOISTURE = 60.0
+
+
+def _as_date(value) -> date:
+    """Normalise a DATE column value (date object or YYYY-MM-DD string)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+
+
+def load_irrigation_state(crop_id: int, since: date, until: date):
     """
-    Check if irrigation was completed on a specific date.
-    Returns 'completed' if found in history, 'missed' otherwise.
+    Bulk-load, for every day in [since, until), the schedule status by date
+    and the set of dates with an IrrigationHistory record. Always two
+    queries, however long the range.
     """
-    # Check IrrigationSchedule table
-    existing = query_db(
+    schedule_rows = query_db(
         """
-        SELECT status FROM IrrigationSchedule
-        WHERE crop_id = %s AND scheduled_date = %s
+        SELECT scheduled_date, status FROM IrrigationSchedule
+        WHERE crop_id = ?
+          AND scheduled_date >= ? AND scheduled_date < ?
         """,
-        (crop_id, check_date),
-        one=True
+        (crop_id, since, until)
     )
-    
-    if existing:
-        return existing["status"]
-    
-    # Check IrrigationHistory table
-    history = query_db(
+    history_rows = query_db(
         """
-        SELECT id FROM IrrigationHistory
-        WHERE crop_id = %s 
-          AND DATE(recorded_at) = %s
+        SELECT DISTINCT DATE(recorded_at) AS irrigated_on
+        FROM IrrigationHistory
+        WHERE crop_id = ?
+          AND recorded_at >= ? AND recorded_at < ?
         """,
-        (crop_id, check_date),
-        one=True
+        (crop_id, since, until)
     )
     
-    return 'completed' if history else 'missed'
+    status_by_date = {_as_date(r["scheduled_date"]): r["status"] for r in schedule_rows}
+    irrigated_dates = {_as_date(r["irrigated_on"]) for r in history_rows}
+    return status_by_date, irrigated_dates
+
+
+def _normalize_planting_date(planting_date) -> date:
+    """Planting date as a date object (string YYYY-MM-DD or date accepted)."""
+    if isinstance(planting_date, str):
+        return datetime.strptime(planting_date, "%Y-%m-%d").date()
+    elif isinstance(planting_date, date):
+        return planting_date
+    return date.today()
 
 
 def generate_full_lifecycle_schedule(
@@ -51,15 +80,19 @@ def generate_full_lifecycle_schedule(
     initial_soil_moisture: float,
     base_et0: float = 5.0,
     city: str = None,
+    daily_et0=None,
+    daily_rain=None,
 ) -> list:
     """
     Generate complete irrigation schedule from planting date to harvest.
     
     FIXED: Starts from planting_date, not today
     FIXED: Generates full lifecycle (all growth_duration days)
-    FIXED: Uses Decimal for all moisture calculations (no float mixing)
     FIXED: Marks past dates as completed/missed based on history
     
+    Runs the schedule engine's "lifecycle" strategy over the crop's daily
+    context (Kc, ET0, rain arrays); this function only adds past statuses.
+    
     Args:
         farmer_id: Farmer ID
         crop_id: Crop ID
@@ -69,188 +102,569 @@ def generate_full_lifecycle_schedule(
         initial_soil_moisture: Starting soil moisture percentage
         base_et0: Base evapotranspiration rate (mm/day)
         city: City for weather data (optional)
+        daily_et0: Optional per-day ET0 (mm) from planting; base_et0 fills the rest
+        daily_rain: Optional per-day rainfall (mm) from planting
     
     Returns:
         List of schedule entries with date, water_amount, stage, reason, status
     """
-    from app.services.ml_engine import get_water_need
+    plant_date = _normalize_planting_date(planting_date)
+    context = build_context(
+        crop_name, plant_date, growth_duration,
+        base_et0=base_et0, daily_et0=daily_et0, daily_rain=daily_rain,
+        soil=get_crop_hydraulics(crop_id),
+    )
+    events = run_strategy("lifecycle", context, initial_soil_moisture)
     
-    # Normalize planting date
-    if isinstance(planting_date, str):
-        plant_date = datetime.strptime(planting_date, "%Y-%m-%d").date()
-    elif isinstance(planting_date, date):
-        plant_date = planting_date
+    # Past-day statuses come from one bulk read instead of a lookup per day,
+    # so the query count is the same however old the crop is
+    today = date.today()
+    status_by_date, irrigated_dates = load_irrigation_state(crop_id, plant_date, today)
+    
+    return schedule_rows(context, events, today, status_by_date, irrigated_dates)
+
+
+def compute_soil_state(
+    crop_name: str,
+    plant_date: date,
+    growth_duration: int,
+    irrigated_dates,
+    reading: tuple = None,
+    current_moisture: float = None,
+    base_et0: float = 5.0,
+    daily_et0=None,
+    daily_rain=None,
+    today: date = None,
+    context=None,
+) -> dict:
+    """
+    Pure part of snapshot_soil_state(): no database access, so batch workers
+    can call it with bulk-loaded inputs.
+    
+    irrigated_dates: dates irrigation was actually completed before today
+    reading: (moisture, reading_date) of the latest soil record, if any
+    context: prebuilt schedule_engine.CropContext (replaces the daily_* args)
+    """
+    today = today or date.today()
+    today_day = min(max((today - plant_date).days, 0), growth_duration + 1)
+    
+    irrigated_days = sorted((d - plant_date).days for d in irrigated_dates)
+    last_irrigation_day = irrigated_days[-1] if irrigated_days else 0
+    
+    if current_moisture is not None:
+        return {
+            "moisture": float(current_moisture),
+            "last_irrigation_day": last_irrigation_day,
+            "today_day": today_day,
+            "source": "measured",
+        }
+    
+    if reading is not None:
+        moisture, reading_date = reading
+        reading_day = min(max((reading_date - plant_date).days, 0), today_day)
+        start_day = reading_day + 1
+        source = "soil_record"
     else:
-        plant_date = date.today()
+        moisture = DEFAULT_INITIAL_MOISTURE
+        start_day = 0
+        source = "default"
+    
+    context = context or build_context(
+        crop_name, plant_date, growth_duration,
+        base_et0=base_et0, daily_et0=daily_et0, daily_rain=daily_rain,
+    )
+    moisture = replay_moisture(
+        kc=context.kc,
+        et0=context.et0,
+        rain=context.rain,
+        initial_moisture=float(moisture),
+        start_day=start_day,
+        end_day=today_day,
+        irrigated_days=irrigated_days,
+        depletion_factor=context.soil.depletion_factor,
+        refill=context.soil.refill,
+        max_moisture=context.soil.max_moisture,
+    )
     
-    # Convert to Decimal for precise calculations (FIX: No float mixing)
-    simulated_moisture = Decimal(str(initial_soil_moisture))
-    base_et0_decimal = Decimal(str(base_et0))
+    return {
+        "moisture": moisture,
+        "last_irrigation_day": last_irrigation_day,
+        "today_day": today_day,
+        "source": source,
+    }
+
+
+def snapshot_soil_state(
+    crop_id: int,
+    crop_name: str,
+    planting_date,
+    growth_duration: int,
+    current_moisture: float = None,
+    base_et0: float = 5.0,
+    daily_et0=None,
+    daily_rain=None,
+) -> dict:
+    """
+    Estimate the crop's soil state at the start of today.
     
-    # Get crop stages
-    stages = generate_crop_stages(growth_duration)
-    base_water = get_water_need(crop_name)
-    base_water_decimal = Decimal(str(base_water))
+    Starts from `current_moisture` if the farmer just measured it, otherwise
+    from the latest SoilRecords reading (or the default at planting), and
+    replays the days since then with the irrigations that were actually
+    completed. Returns moisture, last irrigation day and today's day number.
+    """
+    from app.models.soil import get_latest_soil_for_crop
     
-    schedule = []
-    harvest_date = plant_date + timedelta(days=growth_duration)
+    plant_date = _normalize_planting_date(planting_date)
     today = date.today()
     
-    # Track cumulative days for stage detection
-    cumulative_days = 0
-    stage_boundaries = []
-    for stage_name, stage_data in stages.items():
-        cumulative_days += stage_data["duration"]
-        stage_boundaries.append({
-            "name": stage_name,
-            "end_day": cumulative_days,
-            "kc": Decimal(str(stage_data["kc"])),
-            "description": stage_data["description"]
-        })
+    status_by_date, irrigated_dates = load_irrigation_state(crop_id, plant_date, today)
+    irrigated_dates |= {d for d, status in status_by_date.items() if status == "completed"}
     
-    # Generate schedule day by day from planting date (FIX: Start from planting_date)
-    last_irrigation_day = 0
+    reading = None
+    if current_moisture is None:
+        latest_soil = get_latest_soil_for_crop(crop_id)
+        if latest_soil:
+            reading = (float(latest_soil["moisture"]), _as_date(latest_soil["recorded_at"]))
     
-    for day_num in range(growth_duration + 1):
-        current_date = plant_date + timedelta(days=day_num)
-        
-        # Stop if we've reached harvest
-        if current_date > harvest_date:
-            break
-        
-        # Determine current stage
-        current_stage = None
-        for boundary in stage_boundaries:
-            if day_num < boundary["end_day"]:
-                current_stage = boundary
-                break
-        
-        if not current_stage:
-            current_stage = stage_boundaries[-1]  # Late stage
-        
-        kc = current_stage["kc"]
-        stage_name = current_stage["name"]
-        
-        # Calculate daily water consumption (all Decimal - FIX: No float mixing)
-        daily_etc = base_et0_decimal * kc
-        
-        # Simulate moisture depletion (Decimal-safe - FIX: No float mixing)
-        depletion_factor = Decimal("0.15")
-        simulated_moisture -= (daily_etc * depletion_factor)
-        simulated_moisture = max(simulated_moisture, Decimal("15"))
-        
-        # Determine if irrigation is needed
-        days_since_last_irrigation = day_num - last_irrigation_day
-        
-        # Irrigation decision logic
-        needs_irrigation = False
-        reason = f"{stage_name} stage"
-        water_amount = Decimal("0")
-        
-        # Critical moisture level
-        if simulated_moisture < Decimal("35"):
-            needs_irrigation = True
-            reason = f"{stage_name} - Critical moisture level"
-            water_amount = base_water_decimal * kc * Decimal("1.2")  # Extra water
-        # Regular irrigation needed
-        elif simulated_moisture < Decimal("50") and days_since_last_irrigation >= 3:
-            needs_irrigation = True
-            reason = f"{stage_name} - Regular irrigation"
-            water_amount = base_water_decimal * kc
-        # Maintenance irrigation
-        elif days_since_last_irrigation >= 7:
-            needs_irrigation = True
-            reason = f"{stage_name} - Maintenance irrigation"
-            water_amount = base_water_decimal * kc * Decimal("0.8")
-        
-        # Add to schedule if irrigation is needed
-        if needs_irrigation:
-            # Determine status based on date (FIX: Mark past dates properly)
-            if current_date < today:
-                # Past date - check if it was actually irrigated
-                status = check_if_irrigated(crop_id, current_date)
-            elif current_date == today:
-                status = 'pending'
-            else:
-                status = 'pending'
-            
-            schedule.append({
-                "scheduled_date": current_date,
-                "water_amount": float(round(water_amount, 2)),  # Convert back to float for DB
-                "reason": reason,
-                "stage": stage_name,
-                "kc": float(kc),
-                "days_after_sowing": day_num,
-                "estimated_moisture": float(round(simulated_moisture, 1)),
-                "status": status,
-            })
-            
-            # Reset moisture after irrigation (Decimal-safe)
-            moisture_increase = Decimal("40")
-            simulated_moisture = min(simulated_moisture + moisture_increase, Decimal("85"))
-            last_irrigation_day = day_num
+    context = build_context(
+        crop_name, plant_date, growth_duration,
+        base_et0=base_et0, daily_et0=daily_et0, daily_rain=daily_rain,
+        soil=get_crop_hydraulics(crop_id),
+    )
+    return compute_soil_state(
+        crop_name, plant_date, growth_duration, irrigated_dates,
+        reading=reading,
+        current_moisture=current_moisture,
+        today=today,
+        context=context,
+    )
+
+
+def forward_window(context, state: dict, today: date, window_days: int = None) -> tuple:
+    """
+    Pure: simulate from today for `window_days` (None = to harvest) starting
+    from a snapshot_soil_state() result. Returns (schedule rows, generator
+    state) where the generator state lets iter_projected_schedule() resume
+    the simulation where the window ends.
+    """
+    end_day = None if window_days is None else state["today_day"] + window_days
+    events = run_strategy(
+        "lifecycle", context, state["moisture"],
+        start_day=state["today_day"],
+        end_day=end_day,
+        last_irrigation_day=state["last_irrigation_day"],
+    )
+    return schedule_rows(context, events, today), _generator_state(context, events)
+
+
+def generate_forward_schedule(
+    crop_name: str,
+    planting_date,
+    growth_duration: int,
+    state: dict,
+    base_et0: float = 5.0,
+    daily_et0=None,
+    daily_rain=None,
+    today: date = None,
+    context=None,
+    window_days: int = None,
+    soil=None,
+) -> list:
+    """
+    Simulate only the remaining season, from today to harvest (or for
+    `window_days`), starting from a snapshot_soil_state() result. Every
+    entry is today or later (pending), so no database access is needed.
+    """
+    plant_date = _normalize_planting_date(planting_date)
+    context = context or build_context(
+        crop_name, plant_date, growth_duration,
+        base_et0=base_et0, daily_et0=daily_et0, daily_rain=daily_rain, soil=soil,
+    )
+    schedule, _ = forward_window(context, state, today or date.today(), window_days)
+    return schedule
+
+
+def recalculate_forward(
+    farmer_id: int,
+    crop_id: int,
+    crop_name: str,
+    planting_date,
+    growth_duration: int,
+    current_moisture: float = None,
+    base_et0: float = 5.0,
+    daily_et0=None,
+    daily_rain=None,
+) -> dict:
+    """
+    Incremental recalculation: snapshot today's soil state, re-simulate the
+    schedule window (Config.SCHEDULE_DAYS) only and write just the future
+    rows that changed. Past entries are never read back or rewritten.
+    """
+    state = snapshot_soil_state(
+        crop_id, crop_name, planting_date, growth_duration,
+        current_moisture=current_moisture,
+        base_et0=base_et0, daily_et0=daily_et0, daily_rain=daily_rain,
+    )
+    plant_date = _normalize_planting_date(planting_date)
+    context = build_context(
+        crop_name, plant_date, growth_duration,
+        base_et0=base_et0, daily_et0=daily_et0, daily_rain=daily_rain,
+        soil=get_crop_hydraulics(crop_id),
+    )
+    today = date.today()
+    schedule, generator = forward_window(context, state, today, schedule_window_days())
+    
+    # Rows past the window are dropped here and projected on read instead
+    with transaction():
+        written = save_full_schedule_to_db(farmer_id, crop_id, schedule, since=today)
+        save_schedule_states([(crop_id, farmer_id, generator, base_et0)])
+        clear_recalc_request(crop_id)
+    
+    return {
+        "estimated_moisture": round(state["moisture"], 1),
+        "source": state["source"],
+        "written": written,
+        "next_irrigation": schedule[0] if schedule else None,
+        "schedule": schedule,
+    }
+
+
+# ── Schedule window ────────────────────────────────────────────────────────────
+# Only the next SCHEDULE_DAYS of a schedule are stored. ScheduleState keeps
+# the simulator state at the end of that window; rows after it are
+# projected on read by iter_projected_schedule() and materialized as the
+# window rolls forward (extend_schedule_windows).
+
+def schedule_window_days() -> int:
+    """Days of schedule kept materialized in IrrigationSchedule."""
+    if has_app_context():
+        return current_app.config["SCHEDULE_DAYS"]
+    return Config.SCHEDULE_DAYS
+
+
+def _generator_state(context, events) -> dict:
+    """Where a simulation window ended: enough to resume it later."""
+    return {
+        "next_day": events.next_day,
+        "moisture": events.final_moisture,
+        "last_irrigation_day": events.last_irrigation_day,
+        "window_end": context.plant_date + timedelta(days=events.next_day),
+    }
+
+
+UPSERT_STATE_SQL = """
+    INSERT INTO ScheduleState
+        (crop_id, farmer_id, next_day, moisture, last_irrigation_day, base_et0, window_end)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(crop_id) DO UPDATE SET
+        next_day = excluded.next_day,
+        moisture = excluded.moisture,
+        last_irrigation_day = excluded.last_irrigation_day,
+        base_et0 = excluded.base_et0,
+        window_end = excluded.window_end,
+        updated_at = datetime('now','localtime')
+"""
+
+
+def save_schedule_states(entries):
+    """Store generator states: [(crop_id, farmer_id, generator state, base_et0)]."""
+    params = [
+        (
+            crop_id, farmer_id,
+            generator["next_day"], generator["moisture"],
+            generator["last_irrigation_day"], base_et0, generator["window_end"],
+        )
+        for crop_id, farmer_id, generator, base_et0 in entries
+    ]
+    if not params:
+        return
+    executemany_db(UPSERT_STATE_SQL, params)
+
+
+def get_schedule_state(crop_id: int):
+    """Stored generator state for a crop (None for fully materialized schedules)."""
+    return query_db(
+        "SELECT * FROM ScheduleState WHERE crop_id = ?",
+        (crop_id,),
+        one=True
+    )
+
+
+def iter_projected_schedule(crop, state, chunk_days: int = None):
+    """
+    Lazily yield the schedule beyond the materialized window, simulating
+    `chunk_days` at a time from the stored generator state. Entries look
+    like IrrigationSchedule rows with status 'projected' and no id.
+    """
+    if state is None:
+        return
+    chunk_days = chunk_days or schedule_window_days()
+    plant_date = _normalize_planting_date(crop["planting_date"])
+    growth_duration = int(crop["growth_duration"])
+    context = build_context(
+        crop["crop_name"], plant_date, growth_duration, base_et0=state["base_et0"],
+        soil=get_crop_hydraulics(crop["id"]),
+    )
+    
+    day = int(state["next_day"])
+    moisture = float(state["moisture"])
+    last = int(state["last_irrigation_day"])
+    today = date.today()
+    while day <= growth_duration:
+        events = run_strategy(
+            "lifecycle", context, moisture,
+            start_day=day, end_day=day + chunk_days, last_irrigation_day=last,
+        )
+        for entry in schedule_rows(context, events, today):
+            entry["id"] = None
+            entry["scheduled_date"] = entry["scheduled_date"].isoformat()
+            entry["status"] = "projected"
+            entry["completed_at"] = None
+            yield entry
+        day, moisture, last = events.next_day, events.final_moisture, events.last_irrigation_day
+
+
+def extend_schedule_windows(crop_ids=None, today: date = None, window_days: int = None) -> int:
+    """
+    Roll materialized windows forward so each active crop has schedule rows
+    through today + window_days, continuing from its stored generator state.
+    Rows that would fall before today are not written. Returns crops extended.
+    """
+    today = today or date.today()
+    window_days = window_days or schedule_window_days()
+    target = today + timedelta(days=window_days)
+    
+    sql = """
+        SELECT s.*, c.crop_name, c.planting_date, c.growth_duration
+        FROM ScheduleState s
+        JOIN Crops c ON c.id = s.crop_id
+        WHERE c.status = 'active'
+          AND s.window_end < ?
+          AND s.next_day <= c.growth_duration
+    """
+    args = [target]
+    if crop_ids is not None:
+        crop_ids = list(crop_ids)
+        if not crop_ids:
+            return 0
+        sql += f" AND s.crop_id IN ({', '.join('?' for _ in crop_ids)})"
+        args.extend(crop_ids)
+    
+    rows = query_db(sql, args)
+    textures = load_crop_textures([row["crop_id"] for row in rows])
+    
+    upserts, states = [], []
+    for row in rows:
+        plant_date = _normalize_planting_date(row["planting_date"])
+        context = build_context(
+            row["crop_name"], plant_date, row["growth_duration"], base_et0=row["base_et0"],
+            soil=get_soil_hydraulics(textures.get(row["crop_id"])),
+        )
+        events = run_strategy(
+            "lifecycle", context, row["moisture"],
+            start_day=row["next_day"],
+            end_day=(target - plant_date).days,
+            last_irrigation_day=row["last_irrigation_day"],
+        )
+        for entry in schedule_rows(context, events, today):
+            if entry["scheduled_date"] >= today:
+                upserts.append((
+                    row["farmer_id"], row["crop_id"], entry["scheduled_date"],
+                    entry["water_amount"], "pending", entry["reason"],
+                ))
+        states.append((
+            row["crop_id"], row["farmer_id"],
+            _generator_state(context, events), row["base_et0"],
+        ))
     
+    with transaction():
+        write_schedule_diff(upserts, [])
+        save_schedule_states(states)
+    return len(states)
+
+
+def materialize_lifecycle_schedule(
+    farmer_id: int,
+    crop_id: int,
+    crop_name: str,
+    planting_date,
+    growth_duration: int,
+    initial_soil_moisture: float,
+    base_et0: float = 5.0,
+    window_days: int = None,
+) -> list:
+    """
+    Simulate from planting to the end of the schedule window, store those
+    rows (past ones with their real statuses) and the generator state for
+    the rest of the season. Returns the stored schedule entries.
+    """
+    plant_date = _normalize_planting_date(planting_date)
+    today = date.today()
+    window_days = window_days or schedule_window_days()
+    context = build_context(
+        crop_name, plant_date, growth_duration,
+        base_et0=base_et0, soil=get_crop_hydraulics(crop_id),
+    )
+    
+    end_day = max((today - plant_date).days, 0) + window_days
+    events = run_strategy("lifecycle", context, initial_soil_moisture, end_day=end_day)
+    
+    status_by_date, irrigated_dates = {}, set()
+    if len(events.days) and plant_date + timedelta(days=int(events.days[0])) < today:
+        status_by_date, irrigated_dates = load_irrigation_state(crop_id, plant_date, today)
+    schedule = schedule_rows(context, events, today, status_by_date, irrigated_dates)
+    
+    with transaction():
+        save_full_schedule_to_db(farmer_id, crop_id, schedule)
+        save_schedule_states([
+            (crop_id, farmer_id, _generator_state(context, events), base_et0)
+        ])
     return schedule
 
 
-def save_full_schedule_to_db(farmer_id: int, crop_id: int, schedule: list):
+# Only pending rows take the new amount. The guard sits in the assignments,
+# not a trailing WHERE, because MySQL's ON DUPLICATE KEY UPDATE has no WHERE.
+UPSERT_SCHEDULE_SQL = """
+    INSERT INTO IrrigationSchedule
+        (farmer_id, crop_id, scheduled_date, water_amount, status, reason)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(crop_id, scheduled_date) DO UPDATE SET
+        water_amount = CASE WHEN IrrigationSchedule.status = 'pending'
+            THEN excluded.water_amount ELSE IrrigationSchedule.water_amount END,
+        reason = CASE WHEN IrrigationSchedule.status = 'pending'
+            THEN excluded.reason ELSE IrrigationSchedule.reason END
+"""
+
+
+def diff_schedule(
+    farmer_id: int,
+    crop_id: int,
+    existing: dict,
+    schedule: list,
+    today: date,
+) -> tuple:
+    """
+    Compare a new schedule with the crop's existing rows ({date: row}).
+    Returns (upsert params, stale row ids, counts) — only changed rows,
+    never touching completed / missed / skipped entries.
+    """
+    upserts = []
+    inserted = updated = 0
+    new_dates = set()
+    for entry in schedule:
+        scheduled_date = _as_date(entry["scheduled_date"])
+        new_dates.add(scheduled_date)
+        row = existing.get(scheduled_date)
+        
+        if row is None:
+            inserted += 1
+        elif row["status"] != "pending":
+            continue  # never overwrite completed / missed / skipped
+        elif (
+            row["reason"] == entry["reason"]
+            and abs(float(row["water_amount"]) - float(entry["water_amount"])) < 1e-6
+        ):
+            continue  # unchanged
+        else:
+            updated += 1
+        
+        upserts.append((
+            farmer_id,
+            crop_id,
+            scheduled_date,
+            entry["water_amount"],
+            entry.get("status", "pending"),
+            entry["reason"],
+        ))
+    
+    # Future pending rows that are no longer part of the schedule
+    stale = [
+        (row["id"],)
+        for scheduled_date, row in existing.items()
+        if scheduled_date >= today
+        and row["status"] == "pending"
+        and scheduled_date not in new_dates
+    ]
+    
+    counts = {"inserted": inserted, "updated": updated, "deleted": len(stale)}
+    return upserts, stale, counts
+
+
+def _inserted_rows(upserts: list) -> list:
+    """(farmer_id, crop_id, status) of the upserts that will insert a new row."""
+    crop_ids = sorted({params[1] for params in upserts})
+    dates = [params[2] for params in upserts]
+    existing = {
+        (row["crop_id"], _as_date(row["scheduled_date"]))
+        for row in query_db(
+            f"""
+            SELECT crop_id, scheduled_date FROM IrrigationSchedule
+            WHERE crop_id IN ({', '.join('?' for _ in crop_ids)})
+              AND scheduled_date BETWEEN ? AND ?
+            """,
+            (*crop_ids, min(dates), max(dates)),
+        )
+    }
+    return [
+        (farmer_id, crop_id, status)
+        for farmer_id, crop_id, scheduled_date, _, status, _ in upserts
+        if (crop_id, _as_date(scheduled_date)) not in existing
+    ]
+
+
+def write_schedule_diff(upserts: list, stale: list):
+    """
+    Apply a diff_schedule() result as two batched statements, one commit.
+    Off SQLite the summary deltas are written in the same commit.
+    """
+    if not upserts and not stale:
+        return
+    with transaction():
+        if stale:
+            record_schedule_delete(
+                f"WHERE id IN ({', '.join('?' for _ in stale)})", [row_id for row_id, in stale]
+            )
+            executemany_db("DELETE FROM IrrigationSchedule WHERE id = ?", stale)
+        if upserts:
+            if not triggers_maintain_summaries():  # skip the lookup where triggers count
+                record_schedule_inserts(_inserted_rows(upserts))
+            executemany_db(UPSERT_SCHEDULE_SQL, upserts)
+
+
+def save_full_schedule_to_db(
+    farmer_id: int,
+    crop_id: int,
+    schedule: list,
+    since: date = None,
+) -> dict:
     """
     Save complete lifecycle schedule to database.
     Preserves completed/missed status for past dates.
+    
+    Reads the crop's existing rows once, diffs them against `schedule` and
+    writes only what changed: one batched upsert (keyed on the unique
+    crop_id + scheduled_date index) and one batched delete of future pending
+    rows the new schedule dropped, committed together.
+    With `since`, only rows on or after that date are read and diffed.
+    Returns counts of inserted / updated / deleted rows.
     """
-    with transaction():
-        # Clear future pending schedules only
-        today = date.today()
-        execute_db(
+    existing = {
+        _as_date(row["scheduled_date"]): row
+        for row in query_db(
             """
-            DELETE FROM IrrigationSchedule 
-            WHERE crop_id = %s 
-              AND scheduled_date >= %s 
-              AND status = 'pending'
+            SELECT id, scheduled_date, status, water_amount, reason
+            FROM IrrigationSchedule
+            WHERE crop_id = ? AND scheduled_date >= ?
             """,
-            (crop_id, today)
+            (crop_id, since or date.min)
         )
-        
-        # Insert new schedule
-        for entry in schedule:
-            # Check if entry already exists
-            existing = query_db(
-                """
-                SELECT id, status FROM IrrigationSchedule
-                WHERE crop_id = %s AND scheduled_date = %s
-                """,
-                (crop_id, entry["scheduled_date"]),
-                one=True
-            )
-            
-            if existing:
-                # Update only if status is pending
-                if existing["status"] == "pending":
-                    execute_db(
-                        """
-                        UPDATE IrrigationSchedule
-                        SET water_amount = %s, reason = %s
-                        WHERE id = %s
-                        """,
-                        (entry["water_amount"], entry["reason"], existing["id"])
-                    )
-            else:
-                # Insert new entry with proper status
-                execute_db(
-                    """
-                    INSERT INTO IrrigationSchedule 
-                        (farmer_id, crop_id, scheduled_date, water_amount, status, reason)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    """,
-                    (
-                        farmer_id,
-                        crop_id,
-                        entry["scheduled_date"],
-                        entry["water_amount"],
-                        entry.get("status", "pending"),
-                        entry["reason"],
-                    )
-                )
+    }
+    
+    upserts, stale, counts = diff_schedule(
+        farmer_id, crop_id, existing, schedule, date.today()
+    )
+    write_schedule_diff(upserts, stale)
+    return counts
 
 
 def mark_irrigation_done(schedule_id: int, actual_water: float = None):
@@ -267,7 +681,7 @@ def mark_irrigation_done(schedule_id: int, actual_water: float = None):
         FROM IrrigationSchedule s
         JOIN Crops c ON c.id = s.crop_id
         JOIN Farmers f ON f.id = s.farmer_id
-        WHERE s.id = %s
+        WHERE s.id = ?
         """,
         (schedule_id,),
         one=True
@@ -280,13 +694,14 @@ def mark_irrigation_done(schedule_id: int, actual_water: float = None):
     
     with transaction():
         # Update schedule status
+        record_schedule_update("WHERE id = ?", (schedule_id,), "completed")
         execute_db(
             """
             UPDATE IrrigationSchedule
             SET status = 'completed', 
                 completed_at = NOW(),
-                water_amount = %s
-            WHERE id = %s
+                water_amount = ?
+            WHERE id = ?
             """,
             (water_used, schedule_id)
         )
@@ -295,7 +710,8 @@ def mark_irrigation_done(schedule_id: int, actual_water: float = None):
         from app.services.irrigation_engine import get_current_stage
         stage_info = get_current_stage(
             schedule["planting_date"],
-            schedule["growth_duration"]
+            schedule["growth_duration"],
+            crop_name=schedule["crop_name"],
         )
         
         add_irrigation_record(
@@ -313,39 +729,124 @@ def mark_irrigation_done(schedule_id: int, actual_water: float = None):
     return True
 
 
+def mark_missed_irrigations(crop_id: int, today: date = None) -> list:
+    """
+    Mark the crop's overdue pending schedule rows as missed in one
+    statement. Returns the rows that were marked, oldest first.
+    """
+    today = today or date.today()
+    overdue = """
+        WHERE crop_id = ?
+          AND scheduled_date < ?
+          AND status = 'pending'
+    """
+    
+    # Read, then update the same rows, in one transaction (no RETURNING on MySQL)
+    with transaction():
+        missed = query_db(
+            f"SELECT * FROM IrrigationSchedule {overdue} ORDER BY scheduled_date",
+            (crop_id, today)
+        )
+        if missed:
+            record_schedule_update(overdue, (crop_id, today), "missed")
+            execute_db(f"UPDATE IrrigationSchedule SET status = 'missed' {overdue}", (crop_id, today))
+    
+    return [{**dict(row), "status": "missed"} for row in missed]
+
+
 def detect_and_handle_missed_irrigations(crop_id: int):
     """
     Detect missed irrigations and mark them.
     Returns count of missed irrigations.
     """
-    today = date.today()
+    return len(mark_missed_irrigations(crop_id))
+
+
+def sweep_missed_irrigations(today: date = None) -> dict:
+    """
+    Fleet-wide missed-irrigation sweep (run nightly, see `flask sweep-missed`).
     
-    # Find pending schedules that are overdue
-    missed = query_db(
-        """
-        SELECT * FROM IrrigationSchedule
-        WHERE crop_id = %s 
-          AND scheduled_date < %s
+    Marks every overdue pending IrrigationSchedule row as missed in one
+    set-based UPDATE, then queues a recalculation for each affected active
+    crop. Returns {crop_id: newly missed count}.
+    """
+    today = today or date.today()
+    
+    overdue = """
+        WHERE scheduled_date < ?
           AND status = 'pending'
-        ORDER BY scheduled_date
+    """
+    
+    # Count, then update the same rows, in one transaction (no RETURNING on MySQL)
+    with transaction():
+        counts = Counter({
+            row["crop_id"]: row["missed"]
+            for row in query_db(
+                f"SELECT crop_id, COUNT(*) AS missed FROM IrrigationSchedule {overdue} GROUP BY crop_id",
+                (today,)
+            )
+        })
+        
+        if counts:
+            record_schedule_update(overdue, (today,), "missed")
+            execute_db(f"UPDATE IrrigationSchedule SET status = 'missed' {overdue}", (today,))
+            executemany_db(
+                """
+                INSERT INTO ScheduleRecalcQueue (crop_id, farmer_id, missed_count)
+                SELECT id, farmer_id, ? FROM Crops
+                WHERE id = ? AND status = 'active'
+                ON CONFLICT(crop_id) DO UPDATE SET
+                    missed_count = ScheduleRecalcQueue.missed_count + excluded.missed_count,
+                    enqueued_at = excluded.enqueued_at
+                """,
+                [(count, crop_id) for crop_id, count in counts.items()],
+            )
+    
+    return dict(counts)
+
+
+def get_recalc_request(crop_id: int) -> int:
+    """Missed irrigations queued for this crop that no recalculation has handled yet."""
+    row = query_db(
+        "SELECT missed_count FROM ScheduleRecalcQueue WHERE crop_id = ?",
+        (crop_id,),
+        one=True
+    )
+    return row["missed_count"] if row else 0
+
+
+def clear_recalc_request(crop_id: int):
+    """Drop the crop from the recalculation queue once its schedule is rebuilt."""
+    execute_db("DELETE FROM ScheduleRecalcQueue WHERE crop_id = ?", (crop_id,))
+
+
+def process_recalc_queue(limit: int = 500) -> int:
+    """
+    Recalculate the schedules of queued crops, oldest request first.
+    Each recalculation removes its queue entry. Returns crops processed.
+    """
+    queued = query_db(
+        """
+        SELECT c.id, c.farmer_id, c.crop_name, c.planting_date, c.growth_duration
+        FROM ScheduleRecalcQueue q
+        JOIN Crops c ON c.id = q.crop_id
+        WHERE c.status = 'active'
+        ORDER BY q.enqueued_at
+        LIMIT ?
         """,
-        (crop_id, today)
+        (limit,)
     )
     
-    if missed:
-        # Mark as missed
-        execute_db(
-            """
-            UPDATE IrrigationSchedule
-            SET status = 'missed'
-            WHERE crop_id = %s 
-              AND scheduled_date < %s
-              AND status = 'pending'
-            """,
-            (crop_id, today)
+    for crop in queued:
+        recalculate_forward(
+            farmer_id=crop["farmer_id"],
+            crop_id=crop["id"],
+            crop_name=crop["crop_name"],
+            planting_date=crop["planting_date"],
+            growth_duration=crop["growth_duration"],
         )
     
-    return len(missed) if missed else 0
+    return len(queued)
 
 
 def recalculate_after_missed_irrigation(
@@ -358,52 +859,31 @@ def recalculate_after_missed_irrigation(
 ):
     """
     Recalculate schedule after detecting missed irrigations.
-    Adjusts future schedule based on estimated soil moisture deficit.
+    Adjusts future schedule based on the soil moisture simulated up to today
+    (latest reading plus completed irrigations since).
     """
-    # Count missed irrigations
-    missed_count = detect_and_handle_missed_irrigations(crop_id)
+    # Count missed irrigations (new ones plus those the nightly sweep queued)
+    missed_count = detect_and_handle_missed_irrigations(crop_id) + get_recalc_request(crop_id)
     
     if missed_count == 0:
         return {"recalculated": False, "missed_count": 0}
     
-    # Estimate current soil moisture (pessimistic)
-    # Each missed day reduces moisture by ~5%
-    estimated_moisture = max(20, 70 - (missed_count * 5))
-    
-    # Get latest soil reading if available
-    from app.models.soil import get_latest_soil_for_crop
-    latest_soil = get_latest_soil_for_crop(crop_id)
-    if latest_soil:
-        estimated_moisture = float(latest_soil["moisture"])
-    
-    # Regenerate schedule from planting date (includes past dates)
-    new_schedule = generate_full_lifecycle_schedule(
+    # Snapshot today's soil state and re-simulate the remaining season only
+    result = recalculate_forward(
         farmer_id=farmer_id,
         crop_id=crop_id,
         crop_name=crop_name,
         planting_date=planting_date,
         growth_duration=growth_duration,
-        initial_soil_moisture=estimated_moisture,
-        city=city,
     )
-    
-    # Save new schedule
-    save_full_schedule_to_db(farmer_id, crop_id, new_schedule)
-    
-    # Get next upcoming irrigation
-    next_irrigation = None
-    today = date.today()
-    for entry in new_schedule:
-        if entry["scheduled_date"] >= today and entry.get("status") == "pending":
-            next_irrigation = entry
-            break
+    estimated_moisture = result["estimated_moisture"]
     
     return {
         "recalculated": True,
         "missed_count": missed_count,
         "estimated_moisture": estimated_moisture,
         "urgent_irrigation": estimated_moisture < 30,
-        "next_irrigation": next_irrigation,
+        "next_irrigation": result["next_irrigation"],
     }
 
 
@@ -412,7 +892,7 @@ def get_full_schedule_for_crop(crop_id: int):
     return query_db(
         """
         SELECT * FROM IrrigationSchedule
-        WHERE crop_id = %s
+        WHERE crop_id = ?
         ORDER BY scheduled_date ASC
         """,
         (crop_id,)
@@ -420,39 +900,18 @@ def get_full_schedule_for_crop(crop_id: int):
 
 
 def get_schedule_statistics(crop_id: int) -> dict:
-    """Get statistics about irrigation schedule adherence."""
-    stats = query_db(
-        """
-        SELECT 
-            COUNT(*) as total,
-            SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-            SUM(CASE WHEN status = 'missed' THEN 1 ELSE 0 END) as missed,
-            SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-            SUM(CASE WHEN status = 'skipped' THEN 1 ELSE 0 END) as skipped
-        FROM IrrigationSchedule
-        WHERE crop_id = %s
-        """,
-        (crop_id,),
-        one=True
-    )
-    
-    if not stats or stats["total"] == 0:
-        return {
-            "total": 0,
-            "completed": 0,
-            "missed": 0,
-            "pending": 0,
-            "skipped": 0,
-            "adherence_rate": 0,
-        }
-    
-    adherence_rate = (stats["completed"] / stats["total"]) * 100 if stats["total"] > 0 else 0
-    
+    """Get statistics about irrigation schedule adherence (from CropSummary)."""
+    from app.models.summary import get_crop_summary
+
+    summary = get_crop_summary(crop_id)
+    total = summary["scheduled"]
+    adherence_rate = (summary["completed"] / total) * 100 if total > 0 else 0
+
     return {
-        "total": stats["total"],
-        "completed": stats["completed"],
-        "missed": stats["missed"],
-        "pending": stats["pending"],
-        "skipped": stats["skipped"],
+        "total": total,
+        "completed": summary["completed"],
+        "missed": summary["missed"],
+        "pending": summary["pending"],
+        "skipped": summary["skipped"],
         "adherence_rate": round(adherence_rate, 1),
     }
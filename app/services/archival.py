@@ -0,0 +1,155 @@
+"""
+Archival — keep IrrigationHistory and IrrigationSchedule at a steady size.
+
+Rows older than ARCHIVE_AFTER_DAYS are copied into IrrigationHistoryArchive /
+IrrigationScheduleArchive (tagged with their season, the calendar year),
+added to the monthly IrrigationRollups, and deleted from the hot table.
+Each batch of ARCHIVE_BATCH_SIZE rows is one short transaction, oldest
+first, with a pause between batches so request writes interleave and the
+hot tables are never locked for long. Pending schedule entries are left
+for the missed-irrigation sweep. Summaries count archived rows too, so
+they are unchanged by a move: on SQLite the archive-insert triggers undo
+the delete triggers, and elsewhere archival records no summary deltas.
+"""
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from flask import current_app
+
+from app.database import query_db, executemany_db, transaction
+
+ROLLUP_COLUMNS = (
+    "history_events", "saved_events", "water_used",
+    "scheduled", "completed", "missed", "pending", "skipped", "water_scheduled",
+)
+
+_ROLLUP_UPSERT = f"""
+    INSERT INTO IrrigationRollups (farmer_id, crop_id, month, {', '.join(ROLLUP_COLUMNS)})
+    VALUES (?, ?, ?, {', '.join('?' for _ in ROLLUP_COLUMNS)})
+    ON CONFLICT(farmer_id, crop_id, month) DO UPDATE SET
+        {', '.join(f'{column} = IrrigationRollups.{column} + excluded.{column}' for column in ROLLUP_COLUMNS)}
+"""
+
+
+class ArchiveSpec(NamedTuple):
+    table: str
+    archive: str
+    columns: tuple       # copied as-is, then season
+    time_column: str     # retention horizon and batch order
+    condition: str       # extra filter on rows eligible for archiving
+    rollup: callable     # row -> {rollup column: increment}
+
+
+HISTORY = ArchiveSpec(
+    table="IrrigationHistory",
+    archive="IrrigationHistoryArchive",
+    columns=("id", "farmer_id", "crop_id", "city", "stage", "days_after_sowing",
+             "et0", "kc", "water_required", "decision", "recorded_at"),
+    time_column="recorded_at",
+    condition="",
+    rollup=lambda row: {
+        "history_events": 1,
+        "saved_events": int(row["water_required"] == 0),
+        "water_used": row["water_required"],
+    },
+)
+
+SCHEDULES = ArchiveSpec(
+    table="IrrigationSchedule",
+    archive="IrrigationScheduleArchive",
+    columns=("id", "farmer_id", "crop_id", "scheduled_date", "water_amount", "status",
+             "reason", "completed_at", "created_at"),
+    time_column="scheduled_date",
+    condition=" AND status != 'pending'",
+    rollup=lambda row: {
+        "scheduled": 1,
+        row["status"]: 1,
+        "water_scheduled": row["water_amount"],
+    },
+)
+
+
+def _month(value) -> str:
+    """'YYYY-MM' of a date / datetime or of its ISO text."""
+    return str(value)[:7]
+
+
+def _archive_batch(spec: ArchiveSpec, cutoff: date, batch_size: int,
+                   where: str = "", args=()) -> int:
+    """Move the oldest eligible rows (at most batch_size) in one transaction."""
+    with transaction():
+        rows = query_db(
+            f"""
+            SELECT * FROM {spec.table}
+            WHERE {spec.time_column} < ?{spec.condition}{where}
+            ORDER BY {spec.time_column}, id
+            LIMIT ?
+            """,
+            (cutoff, *args, batch_size),
+        )
+        if not rows:
+            return 0
+
+        totals = defaultdict(lambda: dict.fromkeys(ROLLUP_COLUMNS, 0))
+        for row in rows:
+            key = (row["farmer_id"], row["crop_id"] or 0, _month(row[spec.time_column]))
+            for column, value in spec.rollup(row).items():
+                totals[key][column] += value
+
+        columns = ", ".join(spec.columns)
+        placeholders = ", ".join("?" for _ in spec.columns)
+        executemany_db(
+            f"INSERT INTO {spec.archive} ({columns}, season) VALUES ({placeholders}, ?)",
+            [
+                tuple(row[column] for column in spec.columns) + (_month(row[spec.time_column])[:4],)
+                for row in rows
+            ],
+        )
+        executemany_db(
+            _ROLLUP_UPSERT,
+            [key + tuple(values[column] for column in ROLLUP_COLUMNS) for key, values in totals.items()],
+        )
+        executemany_db(f"DELETE FROM {spec.table} WHERE id = ?", [(row["id"],) for row in rows])
+    return len(rows)
+
+
+def archive_rows(spec: ArchiveSpec, cutoff: date, batch_size: int = None,
+                 max_batches: int = None, where: str = "", args=()) -> int:
+    """
+    Archive every eligible row of spec.table older than cutoff, batch by
+    batch (stopping after max_batches, if given). `where` / `args` narrow
+    the rows further. Returns the number of rows archived.
+    """
+    config = current_app.config
+    batch_size = batch_size or config["ARCHIVE_BATCH_SIZE"]
+    pause = config.get("ARCHIVE_BATCH_PAUSE_MS", 0) / 1000
+
+    archived = batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = _archive_batch(spec, cutoff, batch_size, where, args)
+        archived += moved
+        batches += 1
+        if moved < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return archived
+
+
+def run_retention(days: int = None, batch_size: int = None, max_batches: int = None) -> dict:
+    """
+    Archive history and settled schedule entries older than `days`
+    (default Config.ARCHIVE_AFTER_DAYS). Raises ValueError for days < 1.
+    Returns {"cutoff", "history", "schedules"}; max_batches applies per table.
+    """
+    days = days if days is not None else current_app.config["ARCHIVE_AFTER_DAYS"]
+    if days < 1:
+        raise ValueError("Retention must be at least 1 day")
+    cutoff = date.today() - timedelta(days=days)
+    return {
+        "cutoff": cutoff,
+        "history": archive_rows(HISTORY, cutoff, batch_size, max_batches),
+        "schedules": archive_rows(SCHEDULES, cutoff, batch_size, max_batches),
+    }
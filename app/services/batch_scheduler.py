@@ -0,0 +1,297 @@
+"""
+Batch Scheduler — regenerate irrigation schedules for every active crop.
+
+Used after a forecast update or model change (`flask regenerate-schedules`).
+All inputs are bulk-loaded up front, the lifecycle simulation runs in a
+process pool chunked by farmer, and results are written back per chunk
+with batched upserts.
+"""
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from app.database import query_db, executemany_db, transaction
+from app.services.advanced_scheduler import (
+    _as_date, _normalize_planting_date, compute_soil_state, diff_schedule,
+    forward_window, save_schedule_states, schedule_window_days, write_schedule_diff,
+)
+from app.services.schedule_engine import build_context
+from app.services.soil_hydraulics import get_soil_hydraulics, load_crop_textures
+from app.services.water_balance import forecast_series
+
+BASE_ET0 = 5.0
+DEFAULT_CHUNK_SIZE = 500
+
+
+# ── Bulk loading ───────────────────────────────────────────────────────────────
+
+def load_active_crops():
+    """All active crops with their farmer's district, grouped by farmer."""
+    return query_db(
+        """
+        SELECT c.id, c.farmer_id, c.crop_name, c.planting_date,
+               c.growth_duration, f.location
+        FROM Crops c
+        JOIN Farmers f ON f.id = c.farmer_id
+        WHERE c.status = 'active'
+        ORDER BY c.farmer_id, c.id
+        """
+    )
+
+
+def _crop_filter(column: str, crop_ids) -> tuple:
+    """(SQL condition, args) limiting `column` to crop_ids, or to active crops when None."""
+    if crop_ids is None:
+        return "c.status = 'active'", []
+    crop_ids = list(crop_ids)
+    return f"{column} IN ({', '.join('?' for _ in crop_ids)})", crop_ids
+
+
+def load_latest_soil_readings(crop_ids=None) -> dict:
+    """
+    {crop_id: (moisture, reading_date)} for every active crop (or just
+    crop_ids), one query.
+    """
+    if crop_ids is not None and not crop_ids:
+        return {}
+    condition, args = _crop_filter("s.crop_id", crop_ids)
+    rows = query_db(
+        f"""
+        SELECT crop_id, moisture, recorded_at FROM (
+            SELECT s.crop_id, s.moisture, s.recorded_at,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY s.crop_id
+                       ORDER BY s.recorded_at DESC, s.id DESC
+                   ) AS rn
+            FROM SoilRecords s
+            JOIN Crops c ON c.id = s.crop_id
+            WHERE {condition}
+        ) latest
+        WHERE rn = 1
+        """,
+        args,
+    )
+    return {
+        row["crop_id"]: (float(row["moisture"]), _as_date(row["recorded_at"]))
+        for row in rows
+    }
+
+
+def load_irrigated_dates(today: date, crop_ids=None) -> dict:
+    """
+    {crop_id: set of dates irrigated before today} for every active crop
+    (or just crop_ids), one query.
+    """
+    if crop_ids is not None and not crop_ids:
+        return {}
+    history, history_args = _crop_filter("h.crop_id", crop_ids)
+    schedule, schedule_args = _crop_filter("s.crop_id", crop_ids)
+    rows = query_db(
+        f"""
+        SELECT h.crop_id, DATE(h.recorded_at) AS irrigated_on
+        FROM IrrigationHistory h
+        JOIN Crops c ON c.id = h.crop_id
+        WHERE {history} AND h.recorded_at < ?
+        UNION
+        SELECT s.crop_id, s.scheduled_date AS irrigated_on
+        FROM IrrigationSchedule s
+        JOIN Crops c ON c.id = s.crop_id
+        WHERE {schedule} AND s.status = 'completed' AND s.scheduled_date < ?
+        """,
+        (*history_args, today, *schedule_args, today),
+    )
+    irrigated = defaultdict(set)
+    for row in rows:
+        irrigated[row["crop_id"]].add(_as_date(row["irrigated_on"]))
+    return irrigated
+
+
+def load_district_forecasts(districts) -> dict:
+    """
+    {district: (forecast_id, forecast list)}: one API call per district,
+    stored in DistrictForecasts. Failed fetches map to (None, []).
+    """
+    from app.services.weather import get_weather_forecast
+    from app.services.forecast_events import save_district_forecast
+
+    forecasts = {}
+    for district in districts:
+        try:
+            forecast = get_weather_forecast(district)
+        except Exception:
+            forecasts[district] = (None, [])
+            continue
+        forecasts[district] = (save_district_forecast(district, forecast), forecast)
+    return forecasts
+
+
+# ── Simulation (runs in worker processes, no database access) ──────────────────
+
+def _simulate_chunk(today: date, window_days: int, crops: list) -> list:
+    """
+    Forward-simulate the schedule window of a chunk of crops; returns
+    (crop_id, farmer_id, schedule, generator state) per crop.
+    """
+    results = []
+    for crop in crops:
+        plant_date = _normalize_planting_date(crop["planting_date"])
+        n_days = crop["growth_duration"] + 1
+        daily_et0, daily_rain = forecast_series(
+            crop["forecast"], plant_date, n_days, BASE_ET0
+        )
+        context = build_context(
+            crop["crop_name"], plant_date, crop["growth_duration"],
+            daily_et0=daily_et0, daily_rain=daily_rain,
+            soil=get_soil_hydraulics(crop["soil_texture"]),
+        )
+        state = compute_soil_state(
+            crop["crop_name"], plant_date, crop["growth_duration"],
+            crop["irrigated_dates"],
+            reading=crop["reading"],
+            today=today,
+            context=context,
+        )
+        schedule, generator = forward_window(context, state, today, window_days)
+        results.append((
+            crop["id"],
+            crop["farmer_id"],
+            [
+                {
+                    "scheduled_date": entry["scheduled_date"],
+                    "water_amount": entry["water_amount"],
+                    "reason": entry["reason"],
+                    "status": entry["status"],
+                }
+                for entry in schedule
+            ],
+            generator,
+        ))
+    return results
+
+
+def _chunk_by_farmer(crops: list, chunk_size: int):
+    """Split crops into chunks of ~chunk_size without splitting a farmer."""
+    chunk, farmer_id = [], None
+    for crop in crops:
+        if len(chunk) >= chunk_size and crop["farmer_id"] != farmer_id:
+            yield chunk
+            chunk = []
+        chunk.append(crop)
+        farmer_id = crop["farmer_id"]
+    if chunk:
+        yield chunk
+
+
+# ── Writing ────────────────────────────────────────────────────────────────────
+
+def _save_chunk(results: list, today: date, forecast_ids: dict) -> dict:
+    """Diff a chunk's schedules against stored future rows and write in one batch."""
+    from app.services.forecast_events import record_schedule_forecasts
+
+    crop_ids = [crop_id for crop_id, _, _, _ in results]
+    placeholders = ", ".join("?" for _ in crop_ids)
+    existing = defaultdict(dict)
+    for row in query_db(
+        f"""
+        SELECT id, crop_id, scheduled_date, status, water_amount, reason
+        FROM IrrigationSchedule
+        WHERE crop_id IN ({placeholders}) AND scheduled_date >= ?
+        """,
+        (*crop_ids, today),
+    ):
+        existing[row["crop_id"]][_as_date(row["scheduled_date"])] = row
+
+    totals = {"inserted": 0, "updated": 0, "deleted": 0}
+    all_upserts, all_stale = [], []
+    for crop_id, farmer_id, schedule, _ in results:
+        upserts, stale, counts = diff_schedule(
+            farmer_id, crop_id, existing[crop_id], schedule, today
+        )
+        all_upserts.extend(upserts)
+        all_stale.extend(stale)
+        for key, value in counts.items():
+            totals[key] += value
+
+    # One commit per chunk: schedules, generator states, queue and forecasts
+    with transaction():
+        write_schedule_diff(all_upserts, all_stale)
+        save_schedule_states(
+            (crop_id, farmer_id, generator, BASE_ET0)
+            for crop_id, farmer_id, _, generator in results
+        )
+        executemany_db(
+            "DELETE FROM ScheduleRecalcQueue WHERE crop_id = ?",
+            [(crop_id,) for crop_id in crop_ids],
+        )
+        record_schedule_forecasts(
+            (crop_id, forecast_ids[crop_id])
+            for crop_id in crop_ids
+            if forecast_ids.get(crop_id) is not None
+        )
+    return totals
+
+
+# ── Entry point ────────────────────────────────────────────────────────────────
+
+def regenerate_all_schedules(workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Regenerate the schedule window (Config.SCHEDULE_DAYS) of every active
+    crop and store where each window ends; the rest is projected on read.
+
+    workers: process pool size (None = CPU count, 0 or 1 = run inline)
+    Returns totals plus elapsed seconds and crops/second.
+    """
+    started = time.perf_counter()
+    today = date.today()
+    window_days = schedule_window_days()
+
+    crops = load_active_crops()
+    readings = load_latest_soil_readings()
+    irrigated = load_irrigated_dates(today)
+    textures = load_crop_textures()
+    forecasts = load_district_forecasts({crop["location"] for crop in crops})
+
+    payload = [
+        {
+            "id": crop["id"],
+            "farmer_id": crop["farmer_id"],
+            "crop_name": crop["crop_name"],
+            "planting_date": str(crop["planting_date"]),
+            "growth_duration": int(crop["growth_duration"]),
+            "reading": readings.get(crop["id"]),
+            "soil_texture": textures.get(crop["id"]),
+            "irrigated_dates": irrigated.get(crop["id"], set()),
+            "forecast": forecasts.get(crop["location"], (None, []))[1],
+        }
+        for crop in crops
+    ]
+    forecast_ids = {
+        crop["id"]: forecasts.get(crop["location"], (None, []))[0] for crop in crops
+    }
+    chunks = list(_chunk_by_farmer(payload, chunk_size))
+
+    totals = {"inserted": 0, "updated": 0, "deleted": 0}
+
+    def collect(results):
+        for key, value in _save_chunk(results, today, forecast_ids).items():
+            totals[key] += value
+
+    if workers is not None and workers <= 1:
+        for chunk in chunks:
+            collect(_simulate_chunk(today, window_days, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_simulate_chunk, today, window_days, chunk) for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    elapsed = time.perf_counter() - started
+    return {
+        **totals,
+        "crops": len(payload),
+        "seconds": round(elapsed, 2),
+        "crops_per_second": round(len(payload) / elapsed, 1) if elapsed > 0 else 0.0,
+    }
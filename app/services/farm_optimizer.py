@@ -0,0 +1,217 @@
+"""
+Farm Optimizer — share a daily water capacity across all of a farmer's fields.
+
+Each crop is simulated with its own CropContext (Kc, ET₀, rain, soil) and
+the lifecycle irrigation rules decide which fields *want* water each day.
+When the pump / borewell cannot serve them all, a priority queue hands out
+the day's capacity most-urgent first: critical fields by lowest moisture,
+then regular, then maintenance irrigations, higher Kc breaking ties. Fields
+left out keep depleting and rise in priority the next day.
+
+Water amounts use the schedule's units (water_amount per irrigation), so
+the capacity is the most scheduled water the farm can deliver in one day.
+"""
+import heapq
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.services.water_balance import (
+    CRITICAL, CRITICAL_MOISTURE, KIND_LABELS, KIND_WATER_FACTOR,
+    MAINTENANCE, MIN_MOISTURE, RAIN_EFFICIENCY, REGULAR,
+    REGULAR_INTERVAL, REGULAR_MOISTURE,
+)
+
+MAX_DAYS = 120
+
+
+def _daily_matrices(contexts, states, n_days):
+    """
+    Kc and net moisture loss as (crops × days) arrays from each crop's
+    context. Column d is day today_day + d of the season; columns before
+    planting (negative today_day) and after harvest stay zero.
+    """
+    kc = np.zeros((len(contexts), n_days))
+    net_loss = np.zeros((len(contexts), n_days))
+    for i, (context, state) in enumerate(zip(contexts, states)):
+        start = state["today_day"]
+        first = max(-start, 0)  # column of sowing day for a crop not planted yet
+        window = slice(max(start, 0), min(start + n_days, context.growth_duration + 1))
+        span = window.stop - window.start
+        if span <= 0:
+            continue  # season over (or not started within the horizon): no demand
+        kc[i, first:first + span] = context.kc[window]
+        net_loss[i, first:first + span] = (
+            context.et0[window] * context.kc[window] - context.rain[window] * RAIN_EFFICIENCY
+        ) * context.soil.depletion_factor
+    return kc, net_loss
+
+
+def optimize_allocation(contexts, states, daily_capacity: float, n_days: int) -> dict:
+    """
+    Allocate irrigation across crops and days under `daily_capacity`.
+
+    contexts: schedule_engine.CropContext per crop
+    states:   compute_soil_state() results (moisture, last_irrigation_day,
+              today_day — negative for a crop planted after today)
+    Returns per-crop events and daily totals, plus stress — the summed
+    moisture deficit below the critical level — per crop.
+    """
+    n_crops = len(contexts)
+    kc, net_loss = _daily_matrices(contexts, states, n_days)
+    base_water = np.array([context.base_water for context in contexts])
+    maintenance_gap = np.array([context.soil.maintenance_interval for context in contexts])
+    refill = np.array([context.soil.refill for context in contexts])
+    cap = np.array([context.soil.max_moisture for context in contexts])
+
+    moisture = np.array([float(state["moisture"]) for state in states])
+    first_day = np.array([state["today_day"] for state in states], dtype=np.int64)
+    last = np.array([state["last_irrigation_day"] for state in states], dtype=np.int64)
+    in_season = kc > 0
+
+    events = [[] for _ in range(n_crops)]
+    used = np.zeros(n_days)
+    stress = np.zeros(n_crops)
+    min_moisture = moisture.copy()
+
+    for day in range(n_days):
+        # Same daily depletion as simulate_lifecycle(), for every crop at once
+        loss = net_loss[:, day]
+        moisture = np.where(
+            loss >= 0,
+            np.maximum(moisture - loss, MIN_MOISTURE),
+            np.minimum(moisture - loss, cap),
+        )
+        since = first_day + day - last
+
+        critical = moisture < CRITICAL_MOISTURE
+        regular = ~critical & (moisture < REGULAR_MOISTURE) & (since >= REGULAR_INTERVAL)
+        maintenance = ~critical & ~regular & (since >= maintenance_gap)
+        kind = np.select([critical, regular, maintenance], [CRITICAL, REGULAR, MAINTENANCE], -1)
+        wanted = np.flatnonzero((kind >= 0) & in_season[:, day])
+
+        water_needed = base_water * kc[:, day] * KIND_WATER_FACTOR[np.maximum(kind, 0)]
+        queue = [
+            (int(kind[i]), float(moisture[i]), -float(kc[i, day]), int(i)) for i in wanted
+        ]
+        heapq.heapify(queue)
+
+        remaining = daily_capacity
+        while queue and remaining > 0:
+            crop_kind, crop_moisture, _, i = heapq.heappop(queue)
+            water = float(water_needed[i])
+            if water > remaining:
+                continue  # a smaller request further down may still fit
+            remaining -= water
+            used[day] += water
+            events[i].append((day, crop_kind, water, crop_moisture))
+            moisture[i] = min(crop_moisture + refill[i], cap[i])
+            last[i] = first_day[i] + day
+
+        stress += np.where(in_season[:, day], np.maximum(CRITICAL_MOISTURE - moisture, 0.0), 0.0)
+        min_moisture = np.where(in_season[:, day], np.minimum(min_moisture, moisture), min_moisture)
+
+    return {
+        "events": events,
+        "daily_water": used,
+        "stress": stress,
+        "min_moisture": min_moisture,
+    }
+
+
+def optimize_farm(farmer_id: int, daily_capacity: float, days: int = None) -> dict:
+    """
+    Plan the next `days` (default Config.SCHEDULE_DAYS) of irrigation for
+    all of a farmer's active crops within `daily_capacity`. Read-only: the
+    plan is returned, not saved. Also reports stress without the limit.
+    Raises ValueError for a non-positive capacity or horizon.
+    """
+    from app.models.crop import get_crops_by_farmer
+    from app.models.farmer import get_farmer_by_id
+    from app.services.advanced_scheduler import (
+        _normalize_planting_date, compute_soil_state, schedule_window_days,
+    )
+    from app.services.batch_scheduler import load_irrigated_dates, load_latest_soil_readings
+    from app.services.schedule_engine import build_context, stage_names
+    from app.services.scenario_planner import get_latest_district_forecast
+    from app.services.soil_hydraulics import get_soil_hydraulics, load_crop_textures
+    from app.services.water_balance import forecast_series
+
+    if not daily_capacity or daily_capacity <= 0:
+        raise ValueError("daily_capacity must be positive")
+    if days is not None and not 0 < days <= MAX_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_DAYS}")
+
+    today = date.today()  # soil state is estimated as of today
+    days = days or schedule_window_days()
+    crops = get_crops_by_farmer(farmer_id, status="active")
+    farmer = get_farmer_by_id(farmer_id)
+    forecast = get_latest_district_forecast(farmer["location"]) if farmer else []
+
+    # Same bulk inputs as the batch scheduler: one query each for the farm
+    crop_ids = [crop["id"] for crop in crops]
+    readings = load_latest_soil_readings(crop_ids)
+    irrigated = load_irrigated_dates(today, crop_ids)
+    textures = load_crop_textures(crop_ids)
+
+    contexts, states = [], []
+    for crop in crops:
+        plant_date = _normalize_planting_date(crop["planting_date"])
+        daily_et0, daily_rain = forecast_series(
+            forecast, plant_date, crop["growth_duration"] + 1, 5.0
+        )
+        context = build_context(
+            crop["crop_name"], plant_date, crop["growth_duration"],
+            daily_et0=daily_et0, daily_rain=daily_rain,
+            soil=get_soil_hydraulics(textures.get(crop["id"])),
+        )
+        contexts.append(context)
+        state = compute_soil_state(
+            crop["crop_name"], plant_date, crop["growth_duration"],
+            irrigated.get(crop["id"], ()),
+            reading=readings.get(crop["id"]),
+            today=today,
+            context=context,
+        )
+        # compute_soil_state() clamps to day 0; a crop sown later starts its
+        # window before sowing so it takes no capacity until it is planted
+        state["today_day"] = min(state["today_day"], (today - plant_date).days)
+        states.append(state)
+
+    started = time.perf_counter()
+    plan = optimize_allocation(contexts, states, daily_capacity, days)
+    solve_ms = (time.perf_counter() - started) * 1000
+    unlimited = optimize_allocation(contexts, states, float("inf"), days)
+
+    fields = []
+    for i, crop in enumerate(crops):
+        crop_events = plan["events"][i]
+        stages = stage_names(contexts[i], [states[i]["today_day"] + e[0] for e in crop_events])
+        fields.append({
+            "crop_id": crop["id"],
+            "crop_name": crop["crop_name"],
+            "field_name": crop["field_name"],
+            "irrigations": [
+                {
+                    "date": (today + timedelta(days=day)).isoformat(),
+                    "water_amount": round(water, 2),
+                    "reason": f"{stage} - {KIND_LABELS[kind]}",
+                    "moisture_before": round(moisture, 1),
+                }
+                for (day, kind, water, moisture), stage in zip(crop_events, stages)
+            ],
+            "stress": round(float(plan["stress"][i]), 1),
+            "unconstrained_stress": round(float(unlimited["stress"][i]), 1),
+            "min_moisture": round(float(plan["min_moisture"][i]), 1),
+        })
+
+    return {
+        "daily_capacity": daily_capacity,
+        "days": days,
+        "daily_water": [round(float(w), 2) for w in plan["daily_water"]],
+        "total_stress": round(float(plan["stress"].sum()), 1),
+        "unconstrained_stress": round(float(unlimited["stress"].sum()), 1),
+        "solve_ms": round(solve_ms, 1),
+        "fields": fields,
+    }
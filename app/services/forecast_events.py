@@ -0,0 +1,202 @@
+"""
+Forecast Events — recalculate schedules when a district forecast changes.
+
+New forecasts are stored in DistrictForecasts; ScheduleForecasts remembers
+which forecast each crop's schedule was computed with. When a district
+gets a new forecast, the projected water balance of every active crop there
+is compared against the forecast its schedule used, and only crops that
+shift beyond FORECAST_RECALC_THRESHOLD_MM are recalculated.
+"""
+import json
+from datetime import date
+
+import numpy as np
+from flask import current_app
+
+from app.database import query_db, execute_db, executemany_db
+from app.services.advanced_scheduler import _normalize_planting_date, recalculate_forward
+from app.services.crop_coefficients import get_daily_kc
+from app.services.water_balance import RAIN_EFFICIENCY, forecast_series
+
+BASE_ET0 = 5.0
+
+
+# ── Forecast store ─────────────────────────────────────────────────────────────
+
+def save_district_forecast(district: str, forecast: list) -> int:
+    """Store a fetched forecast for a district. Returns its id."""
+    return execute_db(
+        "INSERT INTO DistrictForecasts (district, forecast) VALUES (?, ?)",
+        (district.strip(), json.dumps(forecast)),
+    )
+
+
+def get_forecasts_by_id(forecast_ids) -> dict:
+    """{forecast_id: forecast list} for the given ids, one query."""
+    forecast_ids = list(forecast_ids)
+    if not forecast_ids:
+        return {}
+    placeholders = ", ".join("?" for _ in forecast_ids)
+    rows = query_db(
+        f"SELECT id, forecast FROM DistrictForecasts WHERE id IN ({placeholders})",
+        forecast_ids,
+    )
+    return {row["id"]: json.loads(row["forecast"]) for row in rows}
+
+
+def record_schedule_forecasts(pairs):
+    """Remember which forecast each crop's schedule used: [(crop_id, forecast_id)]."""
+    pairs = list(pairs)
+    if not pairs:
+        return
+    executemany_db(
+        """
+        INSERT INTO ScheduleForecasts (crop_id, forecast_id) VALUES (?, ?)
+        ON CONFLICT(crop_id) DO UPDATE SET
+            forecast_id = excluded.forecast_id,
+            updated_at = excluded.updated_at
+        """,
+        pairs,
+    )
+
+
+# ── Water balance delta ────────────────────────────────────────────────────────
+
+def _forecast_arrays(forecast: list, dates: list):
+    """ET0 and rain for `dates`; days missing from the forecast use the baseline."""
+    by_date = {str(day["date"])[:10]: day for day in forecast or ()}
+    et0 = np.full(len(dates), BASE_ET0)
+    rain = np.zeros(len(dates))
+    for j, day_date in enumerate(dates):
+        day = by_date.get(day_date.isoformat())
+        if day is not None:
+            et0[j] = max(0.0, 0.5 * float(day["temp"]))
+            rain[j] = float(day.get("rain", 0) or 0)
+    return et0, rain
+
+
+def water_balance_shift(crops, new_forecast: list, old_forecasts: dict, today: date = None):
+    """
+    Projected water-balance change (mm) per crop over the forecast horizon:
+    sum of Kc·ΔET0 − rain efficiency·Δrain, evaluated as a crops × days matrix.
+    `crops` rows need crop_name, planting_date, growth_duration, forecast_id.
+    """
+    today = today or date.today()
+    dates = sorted({
+        date.fromisoformat(str(day["date"])[:10]) for day in new_forecast or ()
+    })
+    dates = [d for d in dates if d >= today]
+    if not crops or not dates:
+        return np.zeros(len(crops))
+
+    new_et0, new_rain = _forecast_arrays(new_forecast, dates)
+
+    # One baseline row per distinct previous forecast, indexed per crop
+    old_ids = sorted({crop["forecast_id"] for crop in crops}, key=lambda x: (x is None, x))
+    row_of = {fid: k for k, fid in enumerate(old_ids)}
+    old_et0 = np.empty((len(old_ids), len(dates)))
+    old_rain = np.empty((len(old_ids), len(dates)))
+    for fid, k in row_of.items():
+        old_et0[k], old_rain[k] = _forecast_arrays(old_forecasts.get(fid, []), dates)
+
+    kc = np.zeros((len(crops), len(dates)))
+    for i, crop in enumerate(crops):
+        daily_kc = get_daily_kc(crop["crop_name"], int(crop["growth_duration"]))
+        plant_date = _normalize_planting_date(crop["planting_date"])
+        offsets = np.array([(d - plant_date).days for d in dates])
+        in_season = (offsets >= 0) & (offsets < len(daily_kc))
+        kc[i, in_season] = daily_kc[offsets[in_season]]
+
+    rows = np.array([row_of[crop["forecast_id"]] for crop in crops])
+    delta_et = kc * (new_et0 - old_et0[rows])
+    delta_rain = np.where(kc > 0, new_rain - old_rain[rows], 0.0) * RAIN_EFFICIENCY
+    return np.abs((delta_et - delta_rain).sum(axis=1))
+
+
+# ── Event pipeline ─────────────────────────────────────────────────────────────
+
+def handle_forecast_update(district: str, forecast_id: int, threshold: float = None) -> dict:
+    """
+    React to a new district forecast: recalculate only the active crops in
+    the district whose projected water balance shifts beyond the threshold.
+    """
+    if threshold is None:
+        threshold = current_app.config["FORECAST_RECALC_THRESHOLD_MM"]
+
+    crops = query_db(
+        """
+        SELECT c.id, c.farmer_id, c.crop_name, c.planting_date, c.growth_duration,
+               sf.forecast_id
+        FROM Crops c
+        JOIN Farmers f ON f.id = c.farmer_id
+        LEFT JOIN ScheduleForecasts sf ON sf.crop_id = c.id
+        WHERE c.status = 'active' AND LOWER(f.location) = LOWER(?)
+        """,
+        (district.strip(),),
+    )
+    old_ids = {crop["forecast_id"] for crop in crops if crop["forecast_id"] is not None}
+    forecasts = get_forecasts_by_id(old_ids | {forecast_id})
+    new_forecast = forecasts.get(forecast_id, [])
+
+    shifts = water_balance_shift(crops, new_forecast, forecasts)
+    affected = [crop for crop, shift in zip(crops, shifts) if shift > threshold]
+
+    for crop in affected:
+        plant_date = _normalize_planting_date(crop["planting_date"])
+        daily_et0, daily_rain = forecast_series(
+            new_forecast, plant_date, int(crop["growth_duration"]) + 1, BASE_ET0
+        )
+        recalculate_forward(
+            farmer_id=crop["farmer_id"],
+            crop_id=crop["id"],
+            crop_name=crop["crop_name"],
+            planting_date=crop["planting_date"],
+            growth_duration=crop["growth_duration"],
+            daily_et0=daily_et0,
+            daily_rain=daily_rain,
+        )
+    record_schedule_forecasts((crop["id"], forecast_id) for crop in affected)
+
+    return {
+        "district": district,
+        "checked": len(crops),
+        "recalculated": [crop["id"] for crop in affected],
+        "error": None,
+    }
+
+
+def refresh_district_forecasts(districts=None) -> list:
+    """
+    Fetch, store and react to the latest forecast of every farmed district
+    (or the given ones). A district whose fetch fails (network, timeout,
+    bad response) is reported with its error and the rest still refresh.
+    """
+    from app.services.weather import get_weather_forecast
+
+    if districts is None:
+        districts = [
+            row["location"]
+            for row in query_db(
+                """
+                SELECT DISTINCT f.location FROM Farmers f
+                JOIN Crops c ON c.farmer_id = f.id
+                WHERE c.status = 'active'
+                """
+            )
+        ]
+
+    reports = []
+    for district in districts:
+        try:
+            forecast = get_weather_forecast(district)
+        except Exception as e:
+            reports.append({
+                "district": district,
+                "checked": 0,
+                "recalculated": [],
+                "error": str(e),
+            })
+            continue
+        forecast_id = save_district_forecast(district, forecast)
+        reports.append(handle_forecast_update(district, forecast_id))
+    return reports
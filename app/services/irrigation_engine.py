@@ -1,99 +1,310 @@
 """
 Irrigation Engine — stage detection, ET₀ calculation, and irrigation advice.
 """
+import bisect
 from datetime import datetime, date
+from functools import lru_cache
+from typing import NamedTuple
+
+import numpy as np
+
+from app.services.crop_coefficients import (
+    get_crop_coefficients, get_daily_kc, has_crop_coefficients,
+)
 
 
 # ── Stage generation ───────────────────────────────────────────────────────────
 
-def generate_crop_stages(total_days: int) -> dict:
+# FAO-56 stage split: (name, share of season, Kc, description)
+STAGE_SPLIT = (
+    ("Initial", 0.20, 0.70, "Germination & early vegetative growth"),
+    ("Development", 0.30, 0.95, "Rapid canopy development"),
+    ("Mid-Season", 0.30, 1.15, "Full canopy – peak water demand"),
+    ("Late", 0.20, 0.80, "Ripening & senescence"),
+)
+
+HARVEST_READY_KC = 0.60
+
+
+class StageTable(NamedTuple):
+    """Precomputed stage layout for one growth duration."""
+    names: tuple
+    durations: tuple
+    ends: tuple          # cumulative end day of each stage (exclusive)
+    ends_array: np.ndarray
+    kcs: tuple
+    descriptions: tuple
+
+
+def _crop_key(crop_name):
+    """Cache key for crop-specific tables: the crop name, or None for generic."""
+    if has_crop_coefficients(crop_name):
+        return crop_name.strip().lower()
+    return None
+
+
+def get_stage_table(total_days: int, crop_name: str = None) -> StageTable:
+    """
+    Return the cached stage table for a growth duration (and crop, if known).
+    `ends` holds cumulative day boundaries for bisect / searchsorted lookups.
+    """
+    return _stage_table(int(total_days), _crop_key(crop_name))
+
+
+@lru_cache(maxsize=None)
+def _stage_table(total_days: int, crop_key) -> StageTable:
+    if crop_key is None:
+        split = STAGE_SPLIT
+    else:
+        # Crop-specific lengths; stage Kc is the mean of the FAO-56 curve
+        # over that stage (flat, rising, flat, falling).
+        coeffs = get_crop_coefficients(crop_key)
+        stage_kcs = (
+            coeffs.kc_ini,
+            (coeffs.kc_ini + coeffs.kc_mid) / 2,
+            coeffs.kc_mid,
+            (coeffs.kc_mid + coeffs.kc_end) / 2,
+        )
+        split = tuple(
+            (name, share, round(kc, 2), description)
+            for (name, _, _, description), share, kc
+            in zip(STAGE_SPLIT, coeffs.stage_split, stage_kcs)
+        )
+
+    names, durations, kcs, descriptions = [], [], [], []
+    for name, share, kc, description in split:
+        names.append(name)
+        durations.append(int(total_days * share))
+        kcs.append(kc)
+        descriptions.append(description)
+
+    ends = tuple(int(e) for e in np.cumsum(durations))
+    ends_array = np.array(ends, dtype=np.int64)
+    ends_array.flags.writeable = False
+
+    return StageTable(
+        names=tuple(names),
+        durations=tuple(durations),
+        ends=ends,
+        ends_array=ends_array,
+        kcs=tuple(kcs),
+        descriptions=tuple(descriptions),
+    )
+
+
+def generate_crop_stages(total_days: int, crop_name: str = None) -> dict:
     """
     Split total growing period into 4 FAO-56 stages with Kc coefficients.
-    Proportions: initial 20 %, development 30 %, mid-season 30 %, late 20 %.
+    Proportions: initial 20 %, development 30 %, mid-season 30 %, late 20 %,
+    unless the crop has its own stage lengths in the Kc knowledge base.
     """
+    table = get_stage_table(total_days, crop_name)
     return {
-        "Initial": {
-            "duration": int(total_days * 0.20),
-            "kc": 0.70,
-            "description": "Germination & early vegetative growth",
-        },
-        "Development": {
-            "duration": int(total_days * 0.30),
-            "kc": 0.95,
-            "description": "Rapid canopy development",
-        },
-        "Mid-Season": {
-            "duration": int(total_days * 0.30),
-            "kc": 1.15,
-            "description": "Full canopy – peak water demand",
-        },
-        "Late": {
-            "duration": int(total_days * 0.20),
-            "kc": 0.80,
-            "description": "Ripening & senescence",
-        },
+        name: {"duration": duration, "kc": kc, "description": description}
+        for name, duration, kc, description in zip(
+            table.names, table.durations, table.kcs, table.descriptions
+        )
     }
 
 
 # ── Stage detection ────────────────────────────────────────────────────────────
 
-def get_current_stage(planting_date_str, total_days: int) -> dict:
+@lru_cache(maxsize=4096)
+def _parse_planting_date(planting_date_str: str):
+    """Parse a YYYY-MM-DD string; None if it is malformed."""
+    try:
+        return datetime.strptime(planting_date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _planting_date(planting_date_str, today: date) -> date:
+    """Normalise a planting date (string or date object), defaulting to today."""
+    if isinstance(planting_date_str, str):
+        return _parse_planting_date(planting_date_str) or today
+    if isinstance(planting_date_str, date):
+        return planting_date_str
+    return today
+
+
+def _harvest_ready(days_after_sowing: int) -> dict:
+    return {
+        "stage_name": "Harvest-Ready",
+        "kc": HARVEST_READY_KC,
+        "days_after_sowing": days_after_sowing,
+        "progress_pct": 100,
+        "description": "Crop has completed its growth cycle",
+    }
+
+
+def _late_fallback(days_after_sowing: int) -> dict:
+    # Days lost to int() rounding between the last stage boundary and harvest
+    return {
+        "stage_name": "Late",
+        "kc": 0.80,
+        "days_after_sowing": days_after_sowing,
+        "progress_pct": 95,
+        "description": "Ripening & senescence",
+    }
+
+
+def _stage_kc(table: StageTable, idx: int, crop_key, total_days: int, day: int) -> float:
+    """Daily interpolated Kc for known crops, stage Kc otherwise."""
+    if crop_key is None:
+        return table.kcs[idx]
+    return round(float(get_daily_kc(crop_key, total_days)[day]), 2)
+
+
+def get_current_stage(
+    planting_date_str,
+    total_days: int,
+    today: date = None,
+    crop_name: str = None,
+) -> dict:
     """
     Given a planting date (YYYY-MM-DD string or date object) and crop duration, return:
     stage_name, kc, days_after_sowing, progress_pct, description.
+    With a known crop_name, kc follows that crop's daily FAO-56 curve.
     """
-    # Handle both string and date object inputs
-    if isinstance(planting_date_str, str):
-        try:
-            plant_dt = datetime.strptime(planting_date_str, "%Y-%m-%d").date()
-        except ValueError:
-            plant_dt = date.today()
-    elif isinstance(planting_date_str, date):
-        plant_dt = planting_date_str
-    else:
-        plant_dt = date.today()
+    today = today or date.today()
+    plant_dt = _planting_date(planting_date_str, today)
 
-    days_after_sowing = (date.today() - plant_dt).days
+    days_after_sowing = (today - plant_dt).days
     days_after_sowing = max(days_after_sowing, 0)
 
-    stages = generate_crop_stages(total_days)
-
     # Harvest-ready check
     if days_after_sowing >= total_days:
-        return {
-            "stage_name": "Harvest-Ready",
-            "kc": 0.60,
-            "days_after_sowing": days_after_sowing,
-            "progress_pct": 100,
-            "description": "Crop has completed its growth cycle",
-        }
+        return _harvest_ready(days_after_sowing)
+
+    crop_key = _crop_key(crop_name)
+    table = _stage_table(int(total_days), crop_key)
+    idx = bisect.bisect_right(table.ends, days_after_sowing)
+    if idx >= len(table.ends):
+        return _late_fallback(days_after_sowing)
 
-    cumulative = 0
-    for stage_name, data in stages.items():
-        cumulative += data["duration"]
-        if days_after_sowing < cumulative:
-            progress_pct = int((days_after_sowing / total_days) * 100)
-            return {
-                "stage_name": stage_name,
-                "kc": data["kc"],
-                "days_after_sowing": days_after_sowing,
-                "progress_pct": min(progress_pct, 99),
-                "description": data["description"],
-            }
-
-    # Fallback
+    progress_pct = int((days_after_sowing / total_days) * 100)
     return {
-        "stage_name": "Late",
-        "kc": 0.80,
+        "stage_name": table.names[idx],
+        "kc": _stage_kc(table, idx, crop_key, int(total_days), days_after_sowing),
         "days_after_sowing": days_after_sowing,
-        "progress_pct": 95,
-        "description": "Ripening & senescence",
+        "progress_pct": min(progress_pct, 99),
+        "description": table.descriptions[idx],
     }
 
 
+def get_current_stages(crops, today: date = None) -> list:
+    """
+    Batch version of get_current_stage() for a list of crop rows.
+
+    Resolves every crop in one pass: days-after-sowing and progress are computed
+    as arrays and stage indices come from one searchsorted() per distinct
+    crop/growth duration. Returns stage-info dicts in the same order as `crops`.
+    """
+    today = today or date.today()
+    crops = list(crops)
+    if not crops:
+        return []
+
+    today_ord = today.toordinal()
+    planted = np.fromiter(
+        (_planting_date(c["planting_date"], today).toordinal() for c in crops),
+        dtype=np.int64, count=len(crops),
+    )
+    totals = np.fromiter(
+        (int(c["growth_duration"]) for c in crops),
+        dtype=np.int64, count=len(crops),
+    )
+    crop_keys = [
+        _crop_key(c["crop_name"]) if "crop_name" in c.keys() else None
+        for c in crops
+    ]
+
+    das = np.maximum(today_ord - planted, 0)
+    harvested = das >= totals
+    with np.errstate(divide="ignore", invalid="ignore"):
+        progress = np.minimum(np.trunc(das / totals * 100), 99)
+
+    groups = {}
+    for i, key in enumerate(crop_keys):
+        if not harvested[i]:
+            groups.setdefault((key, int(totals[i])), []).append(i)
+
+    stage_idx = np.full(len(crops), -1, dtype=np.int64)
+    for (key, total), members in groups.items():
+        members = np.array(members, dtype=np.int64)
+        ends = _stage_table(total, key).ends_array
+        stage_idx[members] = np.searchsorted(ends, das[members], side="right")
+
+    results = []
+    for i in range(len(crops)):
+        days_after_sowing = int(das[i])
+        if harvested[i]:
+            results.append(_harvest_ready(days_after_sowing))
+            continue
+        total = int(totals[i])
+        table = _stage_table(total, crop_keys[i])
+        idx = int(stage_idx[i])
+        if idx >= len(table.ends):
+            results.append(_late_fallback(days_after_sowing))
+            continue
+        results.append({
+            "stage_name": table.names[idx],
+            "kc": _stage_kc(table, idx, crop_keys[i], total, days_after_sowing),
+            "days_after_sowing": days_after_sowing,
+            "progress_pct": int(progress[i]),
+            "description": table.descriptions[idx],
+        })
+    return results
+
+
 
 # ── ET₀ & irrigation calculation ──────────────────────────────────────────────
 
+# Decision codes of calculate_irrigation_batch(): (decision, badge) per code
+IRRIGATION_DECISIONS = (
+    ("No irrigation needed — soil moisture is adequate", "success"),
+    ("Urgent irrigation required — soil critically dry", "danger"),
+    ("No irrigation needed — rainfall is sufficient", "success"),
+    ("Light irrigation recommended", "info"),
+    ("Moderate irrigation required", "warning"),
+    ("Full irrigation required", "danger"),
+)
+IRRIGATION_DTYPE = np.dtype([
+    ("et0", "f8"), ("etc", "f8"), ("net_water", "f8"), ("decision", "i1"),
+])
+
+
+def calculate_irrigation_batch(temperature, rainfall, kc, soil_moisture) -> np.ndarray:
+    """
+    calculate_irrigation() over arrays (any broadcastable shapes, e.g.
+    crops × days). Returns a structured IRRIGATION_DTYPE array; `decision`
+    indexes IRRIGATION_DECISIONS. np.round may differ from the scalar
+    version by 0.001 on exact half-way ties.
+    """
+    temperature, rainfall, kc, soil_moisture = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (temperature, rainfall, kc, soil_moisture))
+    )
+
+    # Simplified ET₀ (Hargreaves approximation)
+    et0 = np.maximum(0.0, 0.5 * temperature)
+    crop_etc = np.round(et0 * kc, 3)
+    net_water = np.maximum(np.round(crop_etc - rainfall, 3), 0.0)
+
+    wet = soil_moisture > 70
+    decision = np.select(
+        [wet, soil_moisture < 30, net_water == 0, net_water < 3, net_water < 6],
+        [0, 1, 2, 3, 4],
+        default=5,
+    )
+
+    result = np.empty(et0.shape, dtype=IRRIGATION_DTYPE)
+    result["et0"] = np.round(et0, 3)
+    result["etc"] = crop_etc
+    result["net_water"] = np.where(wet, 0.0, net_water)
+    result["decision"] = decision
+    return result
+
+
 def calculate_irrigation(
     temperature: float,
     rainfall: float,
@@ -110,26 +321,21 @@ def calculate_irrigation(
     crop_etc = round(et0 * kc, 3)
     net_water = max(round(crop_etc - rainfall, 3), 0.0)
 
-    # Decision logic
+    # Same rules as calculate_irrigation_batch(); scalar rounding is exact here
     if soil_moisture > 70:
-        decision = "No irrigation needed — soil moisture is adequate"
-        badge = "success"
+        code = 0
         net_water = 0.0
     elif soil_moisture < 30:
-        decision = "Urgent irrigation required — soil critically dry"
-        badge = "danger"
+        code = 1
     elif net_water == 0:
-        decision = "No irrigation needed — rainfall is sufficient"
-        badge = "success"
+        code = 2
     elif net_water < 3:
-        decision = "Light irrigation recommended"
-        badge = "info"
+        code = 3
     elif net_water < 6:
-        decision = "Moderate irrigation required"
-        badge = "warning"
+        code = 4
     else:
-        decision = "Full irrigation required"
-        badge = "danger"
+        code = 5
+    decision, badge = IRRIGATION_DECISIONS[code]
 
     return {
         "et0": round(et0, 3),
@@ -142,45 +348,96 @@ def calculate_irrigation(
 
 # ── Weekly plan ────────────────────────────────────────────────────────────────
 
+# Decision codes of weekly_plan_batch(): (decision, badge) per code
+WEEKLY_DECISIONS = (
+    ("Rain expected — skip irrigation", "info"),
+    ("Soil wet — no irrigation", "success"),
+    ("Hot day — full irrigation", "danger"),
+    ("Normal irrigation", "warning"),
+)
+WEEKLY_DTYPE = np.dtype([("water", "f8"), ("saved", "f8"), ("decision", "i1")])
+
+
+def weekly_plan_batch(temp, rain, base_water, soil_moisture) -> np.ndarray:
+    """
+    Weekly plan decisions for many crops at once.
+
+    temp, rain: (crops × days) forecast arrays (or one row shared by all
+    crops); base_water, soil_moisture: one value per crop. Returns a
+    (crops × days) WEEKLY_DTYPE array; `decision` indexes WEEKLY_DECISIONS.
+    """
+    base_water = np.asarray(base_water, dtype=np.float64).reshape(-1, 1)
+    soil_moisture = np.asarray(soil_moisture, dtype=np.float64).reshape(-1, 1)
+    temp, rain, base_water, soil_moisture = np.broadcast_arrays(
+        np.atleast_2d(np.asarray(temp, dtype=np.float64)),
+        np.atleast_2d(np.asarray(rain, dtype=np.float64)),
+        base_water,
+        soil_moisture,
+    )
+
+    decision = np.select(
+        [rain > 5, soil_moisture > 70, temp > 34], [0, 1, 2], default=3
+    )
+    skipped = decision <= 1
+
+    result = np.empty(decision.shape, dtype=WEEKLY_DTYPE)
+    result["water"] = np.select(
+        [skipped, decision == 2], [0.0, np.round(base_water * 1.2, 2)], default=base_water
+    )
+    result["saved"] = np.where(skipped, base_water, 0.0)
+    result["decision"] = decision
+    return result
+
+
+def _forecast_columns(forecast: list) -> tuple:
+    """Temperature and rain of a forecast list as 1-D arrays."""
+    temp = np.array([day["temp"] for day in forecast], dtype=np.float64)
+    rain = np.array([day["rain"] for day in forecast], dtype=np.float64)
+    return temp, rain
+
+
 def get_weekly_plan(forecast: list, base_water: float, soil_moisture: float) -> list:
     """
     Build a 5-day irrigation plan from forecast data.
     Returns list of dicts: date, temp, humidity, rain, decision, water, saved.
     """
-    plan = []
-    for day in forecast:
-        rain = day["rain"]
-        temp = day["temp"]
-
-        if rain > 5:
-            decision = "Rain expected — skip irrigation"
-            water = 0.0
-            saved = base_water
-            badge = "info"
-        elif soil_moisture > 70:
-            decision = "Soil wet — no irrigation"
-            water = 0.0
-            saved = base_water
-            badge = "success"
-        elif temp > 34:
-            decision = "Hot day — full irrigation"
-            water = round(base_water * 1.2, 2)
-            saved = 0.0
-            badge = "danger"
-        else:
-            decision = "Normal irrigation"
-            water = base_water
-            saved = 0.0
-            badge = "warning"
-
-        plan.append({
+    if not forecast:
+        return []
+    temp, rain = _forecast_columns(forecast)
+    plan = weekly_plan_batch(temp, rain, [base_water], [soil_moisture])[0]
+
+    return [
+        {
             "date": day["date"],
-            "temp": temp,
+            "temp": day["temp"],
             "humidity": day["humidity"],
-            "rain": rain,
-            "decision": decision,
+            "rain": day["rain"],
+            "decision": WEEKLY_DECISIONS[code][0],
             "water": water,
             "saved": saved,
-            "badge": badge,
-        })
-    return plan
+            "badge": WEEKLY_DECISIONS[code][1],
+        }
+        for day, water, saved, code in zip(
+            forecast,
+            plan["water"].tolist(),
+            plan["saved"].tolist(),
+            plan["decision"].tolist(),
+        )
+    ]
+
+
+def get_farm_weekly_plan(forecast: list, base_water, soil_moisture) -> dict:
+    """
+    Week-ahead plan for all of a farmer's crops from one forecast: the
+    (crops × days) plan plus water and savings totals per crop.
+    """
+    if not forecast or not len(base_water):
+        return None
+    temp, rain = _forecast_columns(forecast)
+    plan = weekly_plan_batch(temp, rain, base_water, soil_moisture)
+    return {
+        "dates": [day["date"] for day in forecast],
+        "plan": plan,
+        "water_total": plan["water"].sum(axis=1),
+        "saved_total": plan["saved"].sum(axis=1),
+    }
@@ -0,0 +1,93 @@
+"""
+Query Benchmark — time history lookups on a synthetic IrrigationHistory.
+
+Builds a throwaway SQLite database with the current migrations, fills
+IrrigationHistory with `rows` synthetic events spread over `crops` crops
+and several seasons, then times each query variant and reports its plan.
+The application database is never touched.
+"""
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from app.migrations import MIGRATIONS
+
+SEASON_DAYS = 120
+
+# (label, query): args are (crop_id, season start, season end) — unused
+# trailing ones are ignored. The range forms are the ones the schedulers run.
+HISTORY_QUERIES = [
+    ("season history: DATE(recorded_at) range",
+     "SELECT DISTINCT DATE(recorded_at) AS irrigated_on FROM IrrigationHistory "
+     "WHERE crop_id = ? AND DATE(recorded_at) >= ? AND DATE(recorded_at) < ?"),
+    ("season history: half-open range (load_irrigation_state)",
+     "SELECT DISTINCT DATE(recorded_at) AS irrigated_on FROM IrrigationHistory "
+     "WHERE crop_id = ? AND recorded_at >= ? AND recorded_at < ?"),
+    ("irrigated before a day (load_irrigated_dates, per crop)",
+     "SELECT crop_id, DATE(recorded_at) AS irrigated_on FROM IrrigationHistory "
+     "WHERE crop_id IN (?) AND recorded_at < ?"),
+    ("last irrigation date",
+     "SELECT DATE(recorded_at) AS last_date FROM IrrigationHistory WHERE crop_id = ? "
+     "ORDER BY recorded_at DESC LIMIT 1"),
+]
+
+
+def _build(path: str, rows: int, crops: int, seasons_days: int):
+    conn = sqlite3.connect(path)
+    for _, _, statements in MIGRATIONS:
+        for statement in statements:
+            conn.execute(statement)
+    conn.commit()
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    # One recursive CTE keeps the fill inside SQLite (millions of rows in seconds)
+    conn.execute(
+        """
+        WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+        INSERT INTO IrrigationHistory (farmer_id, crop_id, water_required, decision, recorded_at)
+        SELECT 1 + (i % ?) / 10, 1 + i % ?, (i % 7) * 1.5, 'synthetic',
+               datetime('2020-01-01', '+' || (abs(random()) % (? * 86400)) || ' seconds')
+        FROM n
+        """,
+        (rows, crops, crops, seasons_days),
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    return conn
+
+
+def benchmark_history_queries(rows: int = 2_000_000, crops: int = 500,
+                              lookups: int = 200, seasons_days: int = 5 * 365) -> list:
+    """[(label, plan, average ms)] for each HISTORY_QUERIES entry."""
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        conn = _build(path, rows, crops, seasons_days)
+        start = date(2020, 1, 1)
+        probes = [
+            (1 + (k * 7919) % crops, start + timedelta(days=(k * 37) % seasons_days))
+            for k in range(lookups)
+        ]
+        report = []
+        for label, query in HISTORY_QUERIES:
+            n_args = query.count("?")
+            plan = " | ".join(
+                row[3] for row in conn.execute(
+                    f"EXPLAIN QUERY PLAN {query}",
+                    (1, "2020-01-01", "2020-05-01")[:n_args],
+                )
+            )
+            started = time.perf_counter()
+            for crop_id, day in probes:
+                args = (crop_id, day.isoformat(), (day + timedelta(days=SEASON_DAYS)).isoformat())
+                conn.execute(query, args[:n_args]).fetchall()
+            elapsed = (time.perf_counter() - started) * 1000 / len(probes)
+            report.append((label, plan, round(elapsed, 4)))
+        conn.close()
+        return report
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
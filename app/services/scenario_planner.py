@@ -0,0 +1,148 @@
+"""
+Scenario Planner — side-effect-free "what if" irrigation simulations.
+
+A farmer can compare crops, planting dates, irrigation thresholds and
+expected rainfall before committing to a plan. Every scenario runs through
+the same water-balance recurrence as the lifecycle scheduler, evaluated for
+all scenarios at once on (days × scenarios) arrays. Nothing is written to
+the database.
+"""
+import json
+from datetime import date
+
+import numpy as np
+
+from app.database import query_db
+from app.services.crop_coefficients import get_daily_kc
+from app.services.ml_engine import CROP_DURATION, get_crop_duration, get_water_need
+from app.services.soil_hydraulics import SOIL_HYDRAULICS, get_soil_hydraulics, texture_of
+from app.services.water_balance import (
+    CRITICAL_MOISTURE, MAX_MOISTURE, MIN_MOISTURE,
+    as_daily_array, forecast_series, simulate_scenarios,
+)
+
+BASE_ET0 = 5.0
+DEFAULT_INITIAL_MOISTURE = 60.0
+MAX_SCENARIOS = 100
+# Longest known season plus a margin; bounds the (days × scenarios) arrays
+MAX_GROWTH_DURATION = max(CROP_DURATION.values()) + 60
+
+
+def get_latest_district_forecast(district: str) -> list:
+    """Most recently stored forecast for a district (read-only, [] if none)."""
+    if not district:
+        return []
+    row = query_db(
+        """
+        SELECT forecast FROM DistrictForecasts
+        WHERE LOWER(district) = LOWER(?)
+        ORDER BY fetched_at DESC, id DESC LIMIT 1
+        """,
+        (district.strip(),),
+        one=True,
+    )
+    return json.loads(row["forecast"]) if row else []
+
+
+def _parse_scenario(raw: dict, today: date) -> dict:
+    """Validate one scenario and fill in defaults. Raises ValueError."""
+    if not isinstance(raw, dict):
+        raise ValueError("Each scenario must be an object")
+    crop_name = str(raw.get("crop_name") or "").strip().lower()
+    if not crop_name:
+        raise ValueError("crop_name is required")
+
+    planting_date = raw.get("planting_date") or today.isoformat()
+    try:
+        planting_date = date.fromisoformat(str(planting_date)[:10])
+    except ValueError:
+        raise ValueError(f"Invalid planting_date: {raw.get('planting_date')}")
+
+    growth_duration = int(raw.get("growth_duration") or get_crop_duration(crop_name))
+    if not 0 < growth_duration <= MAX_GROWTH_DURATION:
+        raise ValueError(f"growth_duration must be between 1 and {MAX_GROWTH_DURATION} days")
+
+    threshold = float(raw.get("threshold", CRITICAL_MOISTURE))
+    initial = float(raw.get("initial_moisture", DEFAULT_INITIAL_MOISTURE))
+    if not MIN_MOISTURE <= threshold <= MAX_MOISTURE:
+        raise ValueError(f"threshold must be between {MIN_MOISTURE:g} and {MAX_MOISTURE:g}")
+    if not 0 <= initial <= 100:
+        raise ValueError("initial_moisture must be between 0 and 100")
+
+    # Soil: a texture class, or sand / clay % to classify; reference loam if neither
+    texture = raw.get("soil_texture")
+    if texture is not None:
+        texture = str(texture).strip().capitalize()
+        if texture not in SOIL_HYDRAULICS:
+            raise ValueError(f"soil_texture must be one of {', '.join(SOIL_HYDRAULICS)}")
+    elif raw.get("sand") is not None or raw.get("clay") is not None:
+        sand, clay = float(raw.get("sand") or 0), float(raw.get("clay") or 0)
+        if not (0 <= sand <= 100 and 0 <= clay <= 100 and sand + clay <= 100):
+            raise ValueError("sand and clay must be percentages totalling at most 100")
+        texture = texture_of(sand, clay)
+
+    return {
+        "label": raw.get("label") or f"{crop_name} from {planting_date.isoformat()}",
+        "crop_name": crop_name,
+        "planting_date": planting_date,
+        "growth_duration": growth_duration,
+        "threshold": threshold,
+        "initial_moisture": initial,
+        "soil": get_soil_hydraulics(texture),
+        # mm/day, scalar or a list by day after sowing; overrides forecast rain
+        "expected_rain": raw.get("expected_rain"),
+    }
+
+
+def run_scenarios(raw_scenarios: list, forecast: list = None,
+                  base_et0: float = BASE_ET0, today: date = None) -> list:
+    """
+    Simulate each scenario over its full season and return per-scenario
+    total water, irrigation count and minimum soil moisture.
+
+    forecast: optional daily forecast (date/temp/rain) laid onto each
+    scenario by its planting date; days outside it use base_et0, no rain.
+    """
+    today = today or date.today()
+    if not isinstance(raw_scenarios, list) or not raw_scenarios:
+        raise ValueError("scenarios must be a non-empty list")
+    if len(raw_scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios per request")
+    scenarios = [_parse_scenario(raw, today) for raw in raw_scenarios]
+
+    n_days = max(s["growth_duration"] for s in scenarios) + 1
+    kc = np.full((n_days, len(scenarios)), np.nan)
+    et0 = np.full((n_days, len(scenarios)), base_et0)
+    rain = np.zeros((n_days, len(scenarios)))
+
+    for j, scenario in enumerate(scenarios):
+        season = scenario["growth_duration"] + 1
+        kc[:season, j] = get_daily_kc(scenario["crop_name"], scenario["growth_duration"])
+        et0[:season, j], rain[:season, j] = forecast_series(
+            forecast, scenario["planting_date"], season, base_et0
+        )
+        if scenario["expected_rain"] is not None:
+            rain[:season, j] = as_daily_array(scenario["expected_rain"], season)
+
+    summary = simulate_scenarios(
+        kc, et0, rain,
+        initial_moisture=[s["initial_moisture"] for s in scenarios],
+        base_water=[get_water_need(s["crop_name"]) for s in scenarios],
+        critical_moisture=[s["threshold"] for s in scenarios],
+        soils=[s["soil"] for s in scenarios],
+    )
+
+    return [
+        {
+            "label": scenario["label"],
+            "crop_name": scenario["crop_name"],
+            "planting_date": scenario["planting_date"].isoformat(),
+            "growth_duration": scenario["growth_duration"],
+            "threshold": scenario["threshold"],
+            "soil_texture": scenario["soil"].texture,
+            "total_water": round(float(summary.total_water[j]), 2),
+            "irrigation_count": int(summary.irrigation_count[j]),
+            "min_moisture": round(float(summary.min_moisture[j]), 1),
+        }
+        for j, scenario in enumerate(scenarios)
+    ]
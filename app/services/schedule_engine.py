@@ -0,0 +1,323 @@
+"""
+Schedule Engine — one scheduling core with pluggable strategies.
+
+Every schedule view builds a CropContext once per crop: daily Kc, ET₀ and
+rain arrays indexed by day after sowing, plus the stage table, base
+water need and soil hydraulic parameters. A strategy turns that context and a starting soil state into
+irrigation events; schedule_rows() turns events into schedule entries.
+
+Strategies:
+    lifecycle  critical / regular / maintenance rules (full-season schedules)
+    threshold  irrigate only when moisture drops below the critical level
+    interval   the 30-day interval planner (skip on rain or wet soil)
+"""
+import time
+from datetime import date, timedelta
+from typing import NamedTuple
+
+import numpy as np
+
+from app.services.crop_coefficients import get_daily_kc
+from app.services.irrigation_engine import StageTable, get_stage_table
+from app.services.soil_hydraulics import DEFAULT_HYDRAULICS, SoilHydraulics
+from app.services.water_balance import (
+    CRITICAL, KIND_LABELS, as_daily_array, simulate_lifecycle,
+)
+
+BASE_ET0 = 5.0
+
+
+class CropContext(NamedTuple):
+    """Per-crop daily inputs shared by every strategy."""
+    crop_name: str
+    plant_date: date
+    growth_duration: int
+    kc: np.ndarray          # daily Kc, days 0..growth_duration
+    et0: np.ndarray         # daily ET₀ (mm), same length
+    rain: np.ndarray        # daily rainfall (mm), same length
+    base_water: float
+    table: StageTable
+    soil: SoilHydraulics    # texture-dependent simulator parameters
+
+
+class ScheduleEvents(NamedTuple):
+    """Irrigation decisions produced by a strategy."""
+    days: np.ndarray             # day after sowing of each entry (int64)
+    water: np.ndarray            # water per entry (0 for skip entries)
+    reasons: list                # schedule reason per entry
+    moisture_before: np.ndarray  # simulated moisture at each decision
+    last_irrigation_day: int
+    next_day: int                # day the strategy would resume at
+    final_moisture: float        # simulated moisture at the start of next_day
+
+
+def build_context(
+    crop_name: str,
+    plant_date: date,
+    growth_duration: int,
+    base_et0: float = BASE_ET0,
+    daily_et0=None,
+    daily_rain=None,
+    soil: SoilHydraulics = None,
+) -> CropContext:
+    """
+    Precompute the daily arrays for a crop (daily_* are per day after sowing).
+    soil defaults to the reference loam when the crop's texture is unknown.
+    """
+    from app.services.ml_engine import get_water_need
+
+    growth_duration = int(growth_duration)
+    n_days = growth_duration + 1
+    return CropContext(
+        crop_name=crop_name,
+        plant_date=plant_date,
+        growth_duration=growth_duration,
+        kc=get_daily_kc(crop_name, growth_duration),
+        et0=as_daily_array(daily_et0, n_days, default=base_et0),
+        rain=as_daily_array(daily_rain, n_days),
+        base_water=get_water_need(crop_name),
+        table=get_stage_table(growth_duration, crop_name),
+        soil=soil or DEFAULT_HYDRAULICS,
+    )
+
+
+def stage_names(context: CropContext, days) -> list:
+    """Stage name for each day after sowing (past the last boundary = Late)."""
+    table = context.table
+    idx = np.minimum(
+        np.searchsorted(table.ends_array, days, side="right"),
+        len(table.names) - 1,
+    )
+    return [table.names[i] for i in idx.tolist()]
+
+
+# ── Strategies ─────────────────────────────────────────────────────────────────
+
+def _simulated_events(result, reasons: list, start_day: int, end_day: int,
+                      moisture: float) -> ScheduleEvents:
+    """Wrap a simulate_lifecycle() result that covered [start_day, end_day)."""
+    return ScheduleEvents(
+        days=result.days,
+        water=result.water,
+        reasons=reasons,
+        moisture_before=result.moisture_before,
+        last_irrigation_day=result.last_irrigation_day,
+        next_day=max(end_day, start_day),
+        final_moisture=float(result.moisture[-1]) if len(result.moisture) else moisture,
+    )
+
+
+def lifecycle_strategy(context: CropContext, start_day: int, end_day: int,
+                       moisture: float, last_irrigation_day: int = None) -> ScheduleEvents:
+    """Critical / regular / maintenance irrigation rules."""
+    result = simulate_lifecycle(
+        kc=context.kc[:end_day],
+        et0=context.et0[:end_day],
+        rain=context.rain[:end_day],
+        initial_moisture=moisture,
+        base_water=context.base_water,
+        start_day=start_day,
+        last_irrigation_day=last_irrigation_day,
+        maintenance_interval=context.soil.maintenance_interval,
+        depletion_factor=context.soil.depletion_factor,
+        refill=context.soil.refill,
+        max_moisture=context.soil.max_moisture,
+    )
+    reasons = [
+        f"{stage} - {KIND_LABELS[kind]}"
+        for stage, kind in zip(stage_names(context, result.days), result.kinds.tolist())
+    ]
+    return _simulated_events(result, reasons, start_day, end_day, moisture)
+
+
+def threshold_strategy(context: CropContext, start_day: int, end_day: int,
+                       moisture: float, last_irrigation_day: int = None) -> ScheduleEvents:
+    """Irrigate only when simulated moisture falls below the critical level."""
+    result = simulate_lifecycle(
+        kc=context.kc[:end_day],
+        et0=context.et0[:end_day],
+        rain=context.rain[:end_day],
+        initial_moisture=moisture,
+        base_water=context.base_water,
+        start_day=start_day,
+        last_irrigation_day=last_irrigation_day,
+        regular_moisture=0.0,
+        maintenance_interval=end_day + 1,
+        depletion_factor=context.soil.depletion_factor,
+        refill=context.soil.refill,
+        max_moisture=context.soil.max_moisture,
+    )
+    reasons = [
+        f"{stage} - {KIND_LABELS[CRITICAL]}" for stage in stage_names(context, result.days)
+    ]
+    return _simulated_events(result, reasons, start_day, end_day, moisture)
+
+
+def calculate_irrigation_interval(
+    kc: float,
+    et0: float,
+    soil_moisture: float,
+    rainfall: float = 0,
+    field_capacity: float = 100,
+) -> int:
+    """
+    Calculate days until next irrigation based on water balance.
+
+    Returns number of days before next irrigation is needed.
+    """
+    # Daily water consumption (mm/day)
+    daily_etc = et0 * kc
+
+    # Available water in soil (as percentage of field capacity)
+    available_water = soil_moisture
+
+    # Adjust for rainfall
+    effective_rain = rainfall * 0.8  # 80% efficiency
+
+    # Calculate depletion rate
+    if daily_etc <= 0:
+        return 7  # Default interval if no consumption
+
+    # Days until soil reaches 30% moisture (critical threshold)
+    critical_threshold = 30
+    water_to_deplete = available_water - critical_threshold + effective_rain
+
+    days_until_irrigation = max(1, int(water_to_deplete / daily_etc))
+
+    # Cap between 2-10 days for practical scheduling
+    return min(max(days_until_irrigation, 2), 10)
+
+
+def interval_strategy(context: CropContext, start_day: int, end_day: int,
+                      moisture: float, last_irrigation_day: int = None) -> ScheduleEvents:
+    """
+    Jump from one decision date to the next by a computed interval, skipping
+    when rain is expected or the soil is still wet. Uses each decision
+    date's own stage and Kc.
+    """
+    kc_by_day = context.kc.tolist()
+    et0_by_day = context.et0.tolist()
+    rain_by_day = context.rain.tolist()
+    end_day = min(end_day, context.growth_duration)
+
+    days, water, reasons, before = [], [], [], []
+    day = max(int(start_day), 0)
+    last = last_irrigation_day if last_irrigation_day is not None else day
+    while day < end_day:
+        kc, et0, rainfall = kc_by_day[day], et0_by_day[day], rain_by_day[day]
+        days.append(day)
+        before.append(moisture)
+
+        if rainfall > 5:
+            reasons.append(f"Rain expected ({rainfall:g}mm) - Skip irrigation")
+            water.append(0.0)
+            interval = 5  # Check again after rain
+        elif moisture > 70:
+            reasons.append("Soil moisture adequate - Skip irrigation")
+            water.append(0.0)
+            interval = 4
+        else:
+            reasons.append(f"{stage_names(context, [day])[0]} stage - Irrigation required")
+            water.append(context.base_water * kc)
+            interval = calculate_irrigation_interval(kc, et0, moisture, rainfall)
+            moisture = 80  # Reset after irrigation
+            last = day
+
+        # Simplified depletion until the next decision date
+        moisture = max(moisture - et0 * kc * interval * 0.5, 20)
+        day += interval
+
+    return ScheduleEvents(
+        days=np.array(days, dtype=np.int64),
+        water=np.array(water, dtype=np.float64),
+        reasons=reasons,
+        moisture_before=np.array(before, dtype=np.float64),
+        last_irrigation_day=last,
+        next_day=day,
+        final_moisture=moisture,
+    )
+
+
+STRATEGIES = {
+    "lifecycle": lifecycle_strategy,
+    "threshold": threshold_strategy,
+    "interval": interval_strategy,
+}
+
+
+def run_strategy(name: str, context: CropContext, moisture: float,
+                 start_day: int = 0, end_day: int = None,
+                 last_irrigation_day: int = None) -> ScheduleEvents:
+    """Run a named strategy over days [start_day, end_day) of the season."""
+    try:
+        strategy = STRATEGIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown scheduling strategy: {name}")
+    season = context.growth_duration + 1
+    end_day = season if end_day is None else min(int(end_day), season)
+    return strategy(context, max(int(start_day), 0), end_day, float(moisture),
+                    last_irrigation_day)
+
+
+# ── Schedule rows ──────────────────────────────────────────────────────────────
+
+def schedule_rows(
+    context: CropContext,
+    events: ScheduleEvents,
+    today: date,
+    status_by_date: dict = None,
+    irrigated_dates: set = None,
+) -> list:
+    """Turn strategy events into schedule entries with statuses."""
+    schedule = []
+    status_by_date = status_by_date or {}
+    irrigated_dates = irrigated_dates or set()
+
+    for day_num, water, reason, moisture, stage_name in zip(
+        events.days.tolist(),
+        events.water.tolist(),
+        events.reasons,
+        events.moisture_before.tolist(),
+        stage_names(context, events.days),
+    ):
+        current_date = context.plant_date + timedelta(days=day_num)
+
+        # Past dates take their status from what actually happened
+        if current_date < today:
+            status = status_by_date.get(current_date)
+            if status is None:
+                status = 'completed' if current_date in irrigated_dates else 'missed'
+        else:
+            status = 'pending'
+
+        schedule.append({
+            "scheduled_date": current_date,
+            "water_amount": round(water, 2),
+            "reason": reason,
+            "stage": stage_name,
+            "kc": round(float(context.kc[day_num]), 3),
+            "days_after_sowing": day_num,
+            "estimated_moisture": round(moisture, 1),
+            "status": status,
+        })
+
+    return schedule
+
+
+def compare_strategies(context: CropContext, moisture: float, start_day: int = 0,
+                       end_day: int = None, names=None) -> dict:
+    """
+    Run several strategies on the same context and report irrigations,
+    total water and runtime for each — for benchmarking strategies.
+    """
+    report = {}
+    for name in names or STRATEGIES:
+        started = time.perf_counter()
+        events = run_strategy(name, context, moisture, start_day, end_day)
+        elapsed = time.perf_counter() - started
+        report[name] = {
+            "irrigations": int(np.count_nonzero(events.water)),
+            "total_water": round(float(events.water.sum()), 2),
+            "milliseconds": round(elapsed * 1000, 3),
+        }
+    return report
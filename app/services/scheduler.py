@@ -3,41 +3,12 @@ Irrigation Scheduler — 30-day schedule generation and missed irrigation handli
 """
 from datetime import datetime, date, timedelta
 from app.database import query_db, execute_db, transaction
-
-
-def calculate_irrigation_interval(
-    kc: float,
-    et0: float,
-    soil_moisture: float,
-    rainfall: float = 0,
-    field_capacity: float = 100,
-) -> int:
-    """
-    Calculate days until next irrigation based on water balance.
-    
-    Returns number of days before next irrigation is needed.
-    """
-    # Daily water consumption (mm/day)
-    daily_etc = et0 * kc
-    
-    # Available water in soil (as percentage of field capacity)
-    available_water = soil_moisture
-    
-    # Adjust for rainfall
-    effective_rain = rainfall * 0.8  # 80% efficiency
-    
-    # Calculate depletion rate
-    if daily_etc <= 0:
-        return 7  # Default interval if no consumption
-    
-    # Days until soil reaches 30% moisture (critical threshold)
-    critical_threshold = 30
-    water_to_deplete = available_water - critical_threshold + effective_rain
-    
-    days_until_irrigation = max(1, int(water_to_deplete / daily_etc))
-    
-    # Cap between 2-10 days for practical scheduling
-    return min(max(days_until_irrigation, 2), 10)
+from app.models.summary import record_schedule_update
+from app.services.schedule_engine import (
+    build_context, calculate_irrigation_interval, run_strategy, schedule_rows,  # noqa: F401
+)
+from app.services.soil_hydraulics import get_crop_hydraulics
+from app.services.water_balance import forecast_series
 
 
 def generate_30day_schedule(
@@ -54,112 +25,44 @@ def generate_30day_schedule(
     """
     Generate a 30-day irrigation schedule for a crop.
     
+    Runs the schedule engine's "interval" strategy, so every decision date
+    uses its own growth stage and Kc.
     Returns list of schedule entries: {date, water_amount, reason, interval_days}
     """
-    from app.services.irrigation_engine import get_current_stage, generate_crop_stages
-    from app.services.ml_engine import get_water_need
-    
-    schedule = []
-    current_date = date.today()
-    end_date = current_date + timedelta(days=30)
-    
-    # Get crop stages
-    stages = generate_crop_stages(growth_duration)
-    base_water = get_water_need(crop_name)
+    plant_date = datetime.strptime(planting_date, "%Y-%m-%d").date()
+    today = date.today()
+    n_days = growth_duration + 1
     
-    # Simulate soil moisture over 30 days
-    simulated_moisture = current_soil_moisture
-    next_irrigation_date = current_date
+    daily_et0, daily_rain = forecast_series(forecast_data, plant_date, n_days, base_et0)
+    context = build_context(
+        crop_name, plant_date, growth_duration,
+        daily_et0=daily_et0, daily_rain=daily_rain,
+        soil=get_crop_hydraulics(crop_id),
+    )
     
-    day_count = 0
-    while next_irrigation_date <= end_date and day_count < 30:
-        # Get current stage for this date
-        days_from_planting = (next_irrigation_date - datetime.strptime(planting_date, "%Y-%m-%d").date()).days
-        stage_info = get_current_stage(planting_date, growth_duration)
-        
-        # Check if crop is harvest-ready
-        if days_from_planting >= growth_duration:
-            break
-        
-        kc = stage_info["kc"]
-        
-        # Get forecast rainfall if available
-        rainfall = 0
-        if forecast_data:
-            for forecast in forecast_data:
-                if forecast.get("date") == str(next_irrigation_date):
-                    rainfall = forecast.get("rain", 0)
-                    break
-        
-        # Calculate water requirement
-        daily_etc = base_et0 * kc
-        water_amount = round(base_water * kc, 2)
-        
-        # Determine if irrigation is needed
-        reason = f"{stage_info['stage_name']} stage"
-        
-        if rainfall > 5:
-            reason = f"Rain expected ({rainfall}mm) - Skip irrigation"
-            water_amount = 0
-            interval = 5  # Check again after rain
-        elif simulated_moisture > 70:
-            reason = "Soil moisture adequate - Skip irrigation"
-            water_amount = 0
-            interval = 4
-        else:
-            reason = f"{stage_info['stage_name']} stage - Irrigation required"
-            interval = calculate_irrigation_interval(kc, base_et0, simulated_moisture, rainfall)
-            simulated_moisture = 80  # Reset after irrigation
-        
-        schedule.append({
-            "scheduled_date": next_irrigation_date,
-            "water_amount": water_amount,
-            "reason": reason,
-            "interval_days": interval,
-            "stage": stage_info["stage_name"],
-            "kc": kc,
-        })
-        
-        # Move to next irrigation date
-        next_irrigation_date += timedelta(days=interval)
-        
-        # Simulate moisture depletion
-        simulated_moisture -= (daily_etc * interval * 0.5)  # Simplified depletion
-        simulated_moisture = max(simulated_moisture, 20)
-        
-        day_count += interval
+    start_day = (today - plant_date).days
+    events = run_strategy(
+        "interval", context, current_soil_moisture,
+        start_day=start_day, end_day=start_day + 30,
+    )
+    schedule = schedule_rows(context, events, today)
     
+    # Days until the following decision (the last one runs to the horizon)
+    next_days = events.days.tolist()[1:] + [start_day + 30]
+    for entry, day, next_day in zip(schedule, events.days.tolist(), next_days):
+        entry["interval_days"] = next_day - day
     return schedule
 
 
 def save_schedule_to_db(farmer_id: int, crop_id: int, schedule: list):
     """
     Save generated schedule to IrrigationSchedule table.
-    Clears existing pending schedules for the crop first.
+    Future pending rows are diffed against the new schedule and only the
+    changes are written (see advanced_scheduler.save_full_schedule_to_db).
     """
-    with transaction():
-        # Clear old pending schedules
-        execute_db(
-            "DELETE FROM IrrigationSchedule WHERE crop_id = %s AND status = 'pending'",
-            (crop_id,)
-        )
-        
-        # Insert new schedule
-        for entry in schedule:
-            execute_db(
-                """
-                INSERT INTO IrrigationSchedule 
-                    (farmer_id, crop_id, scheduled_date, water_amount, status, reason)
-                VALUES (%s, %s, %s, %s, 'pending', %s)
-                """,
-                (
-                    farmer_id,
-                    crop_id,
-                    entry["scheduled_date"],
-                    entry["water_amount"],
-                    entry["reason"],
-                )
-            )
+    from app.services.advanced_scheduler import save_full_schedule_to_db
+    
+    return save_full_schedule_to_db(farmer_id, crop_id, schedule, since=date.today())
 
 
 def get_schedule_for_crop(crop_id: int, days: int = 30):
@@ -170,8 +73,8 @@ def get_schedule_for_crop(crop_id: int, days: int = 30):
     return query_db(
         """
         SELECT * FROM IrrigationSchedule
-        WHERE crop_id = %s 
-          AND scheduled_date BETWEEN %s AND %s
+        WHERE crop_id = ? 
+          AND scheduled_date BETWEEN ? AND ?
         ORDER BY scheduled_date ASC
         """,
         (crop_id, today, end_date)
@@ -187,8 +90,8 @@ def get_todays_schedule(farmer_id: int):
         SELECT s.*, c.crop_name, c.field_name
         FROM IrrigationSchedule s
         JOIN Crops c ON c.id = s.crop_id
-        WHERE s.farmer_id = %s 
-          AND s.scheduled_date = %s
+        WHERE s.farmer_id = ? 
+          AND s.scheduled_date = ?
           AND s.status = 'pending'
         ORDER BY c.field_name
         """,
@@ -198,59 +101,36 @@ def get_todays_schedule(farmer_id: int):
 
 def mark_irrigation_completed(schedule_id: int, actual_water: float = None):
     """Mark a scheduled irrigation as completed."""
-    if actual_water is None:
-        execute_db(
-            """
-            UPDATE IrrigationSchedule 
-            SET status = 'completed', completed_at = NOW()
-            WHERE id = %s
-            """,
-            (schedule_id,)
-        )
-    else:
-        execute_db(
-            """
-            UPDATE IrrigationSchedule 
-            SET status = 'completed', completed_at = NOW(), water_amount = %s
-            WHERE id = %s
-            """,
-            (actual_water, schedule_id)
-        )
+    with transaction():
+        record_schedule_update("WHERE id = ?", (schedule_id,), "completed")
+        if actual_water is None:
+            execute_db(
+                """
+                UPDATE IrrigationSchedule 
+                SET status = 'completed', completed_at = NOW()
+                WHERE id = ?
+                """,
+                (schedule_id,)
+            )
+        else:
+            execute_db(
+                """
+                UPDATE IrrigationSchedule 
+                SET status = 'completed', completed_at = NOW(), water_amount = ?
+                WHERE id = ?
+                """,
+                (actual_water, schedule_id)
+            )
 
 
 def detect_missed_irrigations(crop_id: int):
     """
     Detect and mark missed irrigation schedules.
-    Returns list of missed irrigation dates.
+    Returns list of missed irrigation rows.
     """
-    today = date.today()
-    
-    # Find pending schedules that are overdue
-    missed = query_db(
-        """
-        SELECT * FROM IrrigationSchedule
-        WHERE crop_id = %s 
-          AND scheduled_date < %s
-          AND status = 'pending'
-        ORDER BY scheduled_date
-        """,
-        (crop_id, today)
-    )
-    
-    # Mark them as missed
-    if missed:
-        execute_db(
-            """
-            UPDATE IrrigationSchedule
-            SET status = 'missed'
-            WHERE crop_id = %s 
-              AND scheduled_date < %s
-              AND status = 'pending'
-            """,
-            (crop_id, today)
-        )
+    from app.services.advanced_scheduler import mark_missed_irrigations
     
-    return missed
+    return mark_missed_irrigations(crop_id)
 
 
 def recalculate_schedule_after_missed(
@@ -316,8 +196,8 @@ def get_schedule_summary(farmer_id: int):
             s.reason
         FROM IrrigationSchedule s
         JOIN Crops c ON c.id = s.crop_id
-        WHERE s.farmer_id = %s 
-          AND s.scheduled_date BETWEEN %s AND %s
+        WHERE s.farmer_id = ? 
+          AND s.scheduled_date BETWEEN ? AND ?
           AND s.status IN ('pending', 'missed')
         ORDER BY s.scheduled_date, c.field_name
         """,
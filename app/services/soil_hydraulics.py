@@ -0,0 +1,165 @@
+"""
+Soil Hydraulics — water-holding parameters per soil texture class.
+
+Field capacity and wilting point come from the Saxton & Rawls (2006)
+pedotransfer equations, evaluated once per texture class returned by
+ml_engine.soil_nature_from_texture() at a representative sand / clay mix.
+The simulator's parameters scale with total available water (TAW, field
+capacity minus wilting point) relative to loam: a soil that holds more
+plant-available water loses a smaller share per mm of ETc, goes longer
+between maintenance irrigations, takes a larger refill per irrigation and
+drains less above it (a higher moisture cap). Loamy soil is the reference
+the water-balance constants were tuned for, so it (and unknown soil) keeps
+them.
+"""
+from typing import NamedTuple
+
+from flask import g, has_app_context
+
+from app.database import query_db
+from app.services.water_balance import (
+    DEPLETION_FACTOR, IRRIGATION_REFILL, MAINTENANCE_INTERVAL, MAX_MOISTURE, REGULAR_MOISTURE,
+)
+
+ORGANIC_MATTER = 2.5            # % by weight, typical cultivated topsoil
+REFERENCE_TEXTURE = "Loamy"
+
+# Representative (sand %, clay %) of each soil_nature_from_texture() class
+TEXTURE_COMPOSITION = {
+    "Sandy":  (80.0, 5.0),
+    "Loamy":  (40.0, 20.0),
+    "Clayey": (25.0, 50.0),
+}
+
+
+class SoilHydraulics(NamedTuple):
+    texture: str
+    field_capacity: float         # volumetric water content at −33 kPa (m³/m³)
+    wilting_point: float          # volumetric water content at −1500 kPa (m³/m³)
+    total_available_water: float  # mm per metre of root zone
+    depletion_factor: float       # simulator: % moisture lost per mm of ETc
+    maintenance_interval: int     # simulator: max days without irrigation
+    refill: float                 # simulator: % moisture added per irrigation
+    max_moisture: float           # simulator: % moisture held after drainage
+
+
+def pedotransfer(sand: float, clay: float, organic_matter: float = ORGANIC_MATTER) -> tuple:
+    """Saxton & Rawls (2006) field capacity and wilting point from sand / clay (%)."""
+    S, C, OM = sand / 100.0, clay / 100.0, organic_matter
+
+    theta_1500t = (-0.024 * S + 0.487 * C + 0.006 * OM + 0.005 * S * OM
+                   - 0.013 * C * OM + 0.068 * S * C + 0.031)
+    wilting_point = theta_1500t + (0.14 * theta_1500t - 0.02)
+
+    theta_33t = (-0.251 * S + 0.195 * C + 0.011 * OM + 0.006 * S * OM
+                 - 0.027 * C * OM + 0.452 * S * C + 0.299)
+    field_capacity = theta_33t + (1.283 * theta_33t ** 2 - 0.374 * theta_33t - 0.015)
+
+    return field_capacity, wilting_point
+
+
+def _build_table() -> dict:
+    reference_fc, reference_wp = pedotransfer(*TEXTURE_COMPOSITION[REFERENCE_TEXTURE])
+    reference_taw = reference_fc - reference_wp
+    table = {}
+    for texture, (sand, clay) in TEXTURE_COMPOSITION.items():
+        fc, wp = pedotransfer(sand, clay)
+        storage = (fc - wp) / reference_taw  # plant-available water vs the reference
+        table[texture] = SoilHydraulics(
+            texture=texture,
+            field_capacity=round(fc, 3),
+            wilting_point=round(wp, 3),
+            total_available_water=round(1000 * (fc - wp), 1),
+            depletion_factor=DEPLETION_FACTOR / storage,
+            maintenance_interval=min(max(round(MAINTENANCE_INTERVAL * storage), 3), 14),
+            refill=IRRIGATION_REFILL * storage,
+            max_moisture=min(max(100 - (100 - MAX_MOISTURE) / storage, REGULAR_MOISTURE + 10), 95),
+        )
+    return table
+
+
+SOIL_HYDRAULICS = _build_table()
+DEFAULT_HYDRAULICS = SOIL_HYDRAULICS[REFERENCE_TEXTURE]
+
+
+def get_soil_hydraulics(texture: str = None) -> SoilHydraulics:
+    """Hydraulic parameters of a texture class (reference loam if unknown)."""
+    return SOIL_HYDRAULICS.get(texture, DEFAULT_HYDRAULICS)
+
+
+def texture_of(sand, clay) -> str:
+    """Texture class of a soil record, or None when sand / clay were not recorded."""
+    from app.services.ml_engine import soil_nature_from_texture
+
+    if sand is None or clay is None or (not sand and not clay):
+        return None
+    return soil_nature_from_texture(float(sand), float(clay))
+
+
+# ── Per-crop lookup ────────────────────────────────────────────────────────────
+
+def _texture_cache() -> dict:
+    """
+    crop_id -> texture class, kept for the current request / CLI command
+    only: each worker re-reads SoilRecords on its next request, so a soil
+    record added elsewhere is never masked by a stale process-wide entry.
+    """
+    if not has_app_context():
+        return {}
+    if "crop_textures" not in g:
+        g.crop_textures = {}
+    return g.crop_textures
+
+
+def invalidate_crop_hydraulics(crop_id: int):
+    """Forget a crop's cached texture (call when a soil record is added)."""
+    _texture_cache().pop(crop_id, None)
+
+
+def get_crop_hydraulics(crop_id: int) -> SoilHydraulics:
+    """Hydraulic parameters for a crop's soil (one lookup per crop per request)."""
+    cache = _texture_cache()
+    if crop_id not in cache:
+        row = query_db(
+            """
+            SELECT sand, clay FROM SoilRecords
+            WHERE crop_id = ? AND (sand > 0 OR clay > 0)
+            ORDER BY recorded_at DESC, id DESC
+            LIMIT 1
+            """,
+            (crop_id,),
+            one=True,
+        )
+        cache[crop_id] = texture_of(row["sand"], row["clay"]) if row else None
+    return get_soil_hydraulics(cache[crop_id])
+
+
+def load_crop_textures(crop_ids=None) -> dict:
+    """
+    {crop_id: texture class} from each crop's latest soil record with
+    sand / clay, in one query (all active crops when crop_ids is None).
+    Jobs load this once and pass textures along rather than caching them.
+    """
+    sql = """
+        SELECT crop_id, sand, clay FROM (
+            SELECT s.crop_id, s.sand, s.clay,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY s.crop_id
+                       ORDER BY s.recorded_at DESC, s.id DESC
+                   ) AS rn
+            FROM SoilRecords s
+            JOIN Crops c ON c.id = s.crop_id
+            WHERE (s.sand > 0 OR s.clay > 0)
+    """
+    args = []
+    if crop_ids is None:
+        sql += " AND c.status = 'active'"
+    else:
+        crop_ids = list(crop_ids)
+        if not crop_ids:
+            return {}
+        sql += f" AND s.crop_id IN ({', '.join('?' for _ in crop_ids)})"
+        args = crop_ids
+    sql += ") latest WHERE rn = 1"
+
+    return {row["crop_id"]: texture_of(row["sand"], row["clay"]) for row in query_db(sql, args)}
@@ -0,0 +1,288 @@
+"""
+Water Balance — array-based soil moisture simulation over a crop season.
+
+The simulator works on float64 arrays indexed by day after sowing
+(daily Kc, ET₀ and rain) and returns the irrigation events as arrays, so
+the schedulers only have to turn the result into rows.
+"""
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+
+
+# ── Simulation constants (moisture in % of field capacity) ────────────────────
+
+DEPLETION_FACTOR = 0.15      # % moisture lost per mm of crop ETc
+RAIN_EFFICIENCY = 0.8        # share of rainfall that reaches the root zone
+MIN_MOISTURE = 15.0
+CRITICAL_MOISTURE = 35.0
+REGULAR_MOISTURE = 50.0
+REGULAR_INTERVAL = 3         # days between regular irrigations
+MAINTENANCE_INTERVAL = 7     # max days without irrigation
+IRRIGATION_REFILL = 40.0
+MAX_MOISTURE = 85.0
+
+# Water multipliers per irrigation kind
+CRITICAL, REGULAR, MAINTENANCE = 0, 1, 2
+KIND_LABELS = ("Critical moisture level", "Regular irrigation", "Maintenance irrigation")
+KIND_WATER_FACTOR = np.array([1.2, 1.0, 0.8])
+
+
+class LifecycleResult(NamedTuple):
+    """Irrigation events and daily moisture from one simulation run."""
+    days: np.ndarray             # day after sowing of each irrigation (int64)
+    kinds: np.ndarray            # CRITICAL / REGULAR / MAINTENANCE (int8)
+    water: np.ndarray            # water applied per event (float64)
+    moisture_before: np.ndarray  # simulated moisture when irrigation was triggered
+    moisture: np.ndarray         # end-of-day moisture for every simulated day
+    last_irrigation_day: int     # day of the last event (or the value passed in)
+
+
+def as_daily_array(values, length: int, default: float = 0.0) -> np.ndarray:
+    """Broadcast a scalar / short sequence to a float64 array of `length` days."""
+    if values is None:
+        return np.full(length, default, dtype=np.float64)
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 0:
+        return np.full(length, float(arr), dtype=np.float64)
+    if len(arr) >= length:
+        return arr[:length]
+    # Forecasts are shorter than the season: pad with the default
+    return np.concatenate([arr, np.full(length - len(arr), default)])
+
+
+def simulate_lifecycle(
+    kc: np.ndarray,
+    et0,
+    rain,
+    initial_moisture: float,
+    base_water: float,
+    start_day: int = 0,
+    last_irrigation_day: int = None,
+    critical_moisture: float = CRITICAL_MOISTURE,
+    regular_moisture: float = REGULAR_MOISTURE,
+    maintenance_interval: int = MAINTENANCE_INTERVAL,
+    depletion_factor: float = DEPLETION_FACTOR,
+    refill: float = IRRIGATION_REFILL,
+    max_moisture: float = MAX_MOISTURE,
+) -> LifecycleResult:
+    """
+    Run the moisture / irrigation recurrence from `start_day` to the end of `kc`.
+
+    kc, et0 and rain are indexed by day after sowing (et0/rain may be scalars).
+    Per-day depletion is computed for the whole window as one array
+    expression; only the threshold recurrence runs as a scalar loop.
+    The thresholds default to the lifecycle rules; strategies that only
+    irrigate below a threshold pass their own. depletion_factor,
+    maintenance_interval, refill and max_moisture come from the soil
+    texture (see soil_hydraulics).
+    """
+    n_days = len(kc)
+    start_day = max(int(start_day), 0)
+    if last_irrigation_day is None:
+        last_irrigation_day = start_day
+
+    kc = np.asarray(kc, dtype=np.float64)[start_day:]
+    et0 = as_daily_array(et0, n_days)[start_day:]
+    rain = as_daily_array(rain, n_days)[start_day:]
+
+    # Net moisture change per day (positive = depletion)
+    net_loss = ((et0 * kc - rain * RAIN_EFFICIENCY) * depletion_factor).tolist()
+
+    # Thresholds bound to locals: this loop is the hot path
+    floor, cap = MIN_MOISTURE, max_moisture
+    critical, regular = critical_moisture, regular_moisture
+    regular_gap, maintenance_gap = REGULAR_INTERVAL, maintenance_interval
+
+    moisture = float(initial_moisture)
+    last = int(last_irrigation_day)
+    trajectory = []
+    days, kinds, before = [], [], []
+
+    for day, loss in enumerate(net_loss, start_day):
+        if loss >= 0:
+            moisture = moisture - loss
+            if moisture < floor:
+                moisture = floor
+        else:
+            moisture = min(moisture - loss, cap)
+
+        since = day - last
+        if moisture < critical:
+            kind = CRITICAL
+        elif moisture < regular and since >= regular_gap:
+            kind = REGULAR
+        elif since >= maintenance_gap:
+            kind = MAINTENANCE
+        else:
+            trajectory.append(moisture)
+            continue
+
+        days.append(day)
+        kinds.append(kind)
+        before.append(moisture)
+        moisture = min(moisture + refill, cap)
+        last = day
+        trajectory.append(moisture)
+
+    days = np.array(days, dtype=np.int64)
+    kinds = np.array(kinds, dtype=np.int8)
+    water = base_water * kc[days - start_day] * KIND_WATER_FACTOR[kinds]
+
+    return LifecycleResult(
+        days=days,
+        kinds=kinds,
+        water=water,
+        moisture_before=np.array(before, dtype=np.float64),
+        moisture=np.array(trajectory, dtype=np.float64),
+        last_irrigation_day=last,
+    )
+
+
+def replay_moisture(
+    kc: np.ndarray,
+    et0,
+    rain,
+    initial_moisture: float,
+    start_day: int,
+    end_day: int,
+    irrigated_days,
+    depletion_factor: float = DEPLETION_FACTOR,
+    refill: float = IRRIGATION_REFILL,
+    max_moisture: float = MAX_MOISTURE,
+) -> float:
+    """
+    Advance soil moisture over days [start_day, end_day) applying only the
+    irrigations that actually happened (`irrigated_days`), not the
+    simulator's own decisions. Used to bring a soil reading forward to today.
+    The soil parameters are those of simulate_lifecycle().
+    """
+    n_days = len(kc)
+    start_day = max(int(start_day), 0)
+    end_day = min(max(int(end_day), start_day), n_days)
+
+    kc = np.asarray(kc, dtype=np.float64)[start_day:end_day]
+    et0 = as_daily_array(et0, n_days)[start_day:end_day]
+    rain = as_daily_array(rain, n_days)[start_day:end_day]
+    net_loss = ((et0 * kc - rain * RAIN_EFFICIENCY) * depletion_factor).tolist()
+
+    irrigated_days = set(irrigated_days)
+    moisture = float(initial_moisture)
+    for day, loss in enumerate(net_loss, start_day):
+        if loss >= 0:
+            moisture = max(moisture - loss, MIN_MOISTURE)
+        else:
+            moisture = min(moisture - loss, max_moisture)
+        if day in irrigated_days:
+            moisture = min(moisture + refill, max_moisture)
+    return moisture
+
+
+def forecast_series(forecast: list, plant_date, n_days: int, base_et0: float):
+    """
+    Lay a daily forecast (dicts with date, temp, rain) onto day-after-sowing
+    arrays. ET₀ uses the same 0.5 × temperature approximation as
+    irrigation_engine.calculate_irrigation(); days outside the forecast keep
+    base_et0 and no rain.
+    """
+    et0 = np.full(n_days, base_et0, dtype=np.float64)
+    rain = np.zeros(n_days, dtype=np.float64)
+    for day in forecast or ():
+        day_date = day["date"]
+        if isinstance(day_date, str):
+            day_date = date.fromisoformat(day_date[:10])
+        idx = (day_date - plant_date).days
+        if 0 <= idx < n_days:
+            et0[idx] = max(0.0, 0.5 * float(day["temp"]))
+            rain[idx] = float(day.get("rain", 0) or 0)
+    return et0, rain
+
+
+class ScenarioSummary(NamedTuple):
+    """Per-scenario totals from simulate_scenarios()."""
+    total_water: np.ndarray
+    irrigation_count: np.ndarray
+    min_moisture: np.ndarray
+
+
+def simulate_scenarios(
+    kc: np.ndarray,
+    et0: np.ndarray,
+    rain: np.ndarray,
+    initial_moisture: np.ndarray,
+    base_water: np.ndarray,
+    critical_moisture: np.ndarray = None,
+    soils=None,
+) -> ScenarioSummary:
+    """
+    Run the simulate_lifecycle() recurrence for many scenarios at once.
+
+    kc, et0 and rain are (days × scenarios) arrays indexed by day after
+    sowing; days past a scenario's season carry NaN Kc and are skipped.
+    Each day is one set of vector operations across all scenarios.
+    critical_moisture optionally overrides the irrigation threshold per scenario.
+    soils: optional soil_hydraulics.SoilHydraulics per scenario (depletion,
+    maintenance interval, refill and cap); the reference constants otherwise.
+    """
+    kc = np.asarray(kc, dtype=np.float64)
+    n_days, n_scenarios = kc.shape
+    active = ~np.isnan(kc)
+    kc = np.where(active, kc, 0.0)
+
+    def per_soil(field, default):
+        if soils is None:
+            return np.full(n_scenarios, default, dtype=np.float64)
+        return np.array([getattr(soil, field) for soil in soils], dtype=np.float64)
+
+    depletion = per_soil("depletion_factor", DEPLETION_FACTOR)
+    maintenance_gap = per_soil("maintenance_interval", MAINTENANCE_INTERVAL)
+    refill = per_soil("refill", IRRIGATION_REFILL)
+    cap = per_soil("max_moisture", MAX_MOISTURE)
+
+    net_loss = (np.asarray(et0) * kc - np.asarray(rain) * RAIN_EFFICIENCY) * depletion
+    critical = np.full(n_scenarios, CRITICAL_MOISTURE) if critical_moisture is None \
+        else np.asarray(critical_moisture, dtype=np.float64)
+    regular = np.maximum(critical, REGULAR_MOISTURE)
+    base_water = np.asarray(base_water, dtype=np.float64)
+
+    moisture = np.asarray(initial_moisture, dtype=np.float64).copy()
+    last = np.zeros(n_scenarios, dtype=np.int64)
+    total_water = np.zeros(n_scenarios)
+    count = np.zeros(n_scenarios, dtype=np.int64)
+    min_moisture = moisture.copy()
+
+    for day in range(n_days):
+        on = active[day]
+        loss = net_loss[day]
+        moisture = np.where(
+            on,
+            np.where(loss >= 0,
+                     np.maximum(moisture - loss, MIN_MOISTURE),
+                     np.minimum(moisture - loss, cap)),
+            moisture,
+        )
+
+        since = day - last
+        is_critical = moisture < critical
+        is_regular = ~is_critical & (moisture < regular) & (since >= REGULAR_INTERVAL)
+        is_maintenance = ~is_critical & ~is_regular & (since >= maintenance_gap)
+        irrigate = on & (is_critical | is_regular | is_maintenance)
+
+        factor = np.select(
+            [is_critical, is_regular, is_maintenance],
+            KIND_WATER_FACTOR,
+            default=0.0,
+        )
+        total_water += np.where(irrigate, base_water * kc[day] * factor, 0.0)
+        count += irrigate
+        min_moisture = np.where(on, np.minimum(min_moisture, moisture), min_moisture)
+
+        moisture = np.where(irrigate, np.minimum(moisture + refill, cap), moisture)
+        last = np.where(irrigate, day, last)
+
+    return ScenarioSummary(
+        total_water=total_water,
+        irrigation_count=count,
+        min_moisture=min_moisture,
+    )
@@ -0,0 +1,71 @@
+"""
+Shared fixtures: an app on a fresh, fully migrated SQLite database per test.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import create_app
+from app.config import Config
+from app import database
+from app.database import execute_db, query_db
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        DB_BACKEND = "sqlite"
+        DB_PATH = str(tmp_path / "farming.db")
+        AUTO_MIGRATE = True
+        ARCHIVE_BATCH_PAUSE_MS = 0
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def statements(monkeypatch):
+    """Record every statement sent through database.Connection, in order."""
+    sent = []
+    execute, executemany = database.Connection.execute, database.Connection.executemany
+
+    def recorded_execute(self, query, args=()):
+        sent.append(query)
+        return execute(self, query, args)
+
+    def recorded_executemany(self, query, seq_of_args):
+        sent.append(query)
+        return executemany(self, query, seq_of_args)
+
+    monkeypatch.setattr(database.Connection, "execute", recorded_execute)
+    monkeypatch.setattr(database.Connection, "executemany", recorded_executemany)
+    return sent
+
+
+def add_farmer(username: str = "farmer", location: str = "Hyderabad") -> int:
+    return execute_db(
+        "INSERT INTO Farmers (username, password_hash, full_name, location) VALUES (?, 'x', ?, ?)",
+        (username, username.title(), location),
+    )
+
+
+def add_crop(farmer_id: int, crop_name: str = "rice", days_ago: int = 20,
+             growth_duration: int = 120) -> int:
+    return execute_db(
+        """
+        INSERT INTO Crops (farmer_id, crop_name, field_name, planting_date, growth_duration)
+        VALUES (?, ?, 'Field', ?, ?)
+        """,
+        (farmer_id, crop_name, date.today() - timedelta(days=days_ago), growth_duration),
+    )
+
+
+def summaries():
+    """Both summary tables as plain rows, minus their updated_at stamps."""
+    return [
+        [{k: v for k, v in dict(row).items() if k != "updated_at"}
+         for row in query_db(f"SELECT * FROM {table} ORDER BY {key}")]
+        for table, key in (("FarmerSummary", "farmer_id"), ("CropSummary", "crop_id"))
+    ]
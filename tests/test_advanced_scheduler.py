@@ -0,0 +1,55 @@
+from datetime import date, timedelta
+
+from app.database import execute_db
+from app.services.advanced_scheduler import generate_full_lifecycle_schedule, recalculate_forward
+from conftest import add_crop, add_farmer
+
+
+CROP_AGES = (0, 30, 120)
+
+
+def add_aged_crop(farmer_id: int, days_ago: int) -> int:
+    """A 150-day crop planted days_ago, irrigated every third day since."""
+    crop_id = add_crop(farmer_id, days_ago=days_ago, growth_duration=150)
+    for day in range(0, days_ago, 3):
+        execute_db(
+            "INSERT INTO IrrigationHistory (farmer_id, crop_id, city, water_required, decision, recorded_at) "
+            "VALUES (?, ?, 'Hyderabad', 2.0, 'x', ?)",
+            (farmer_id, crop_id, date.today() - timedelta(days=day)),
+        )
+    return crop_id
+
+
+def test_lifecycle_schedule_query_count_ignores_crop_age(app, statements):
+    farmer_id = add_farmer()
+    counts = []
+    for days_ago in CROP_AGES:
+        crop_id = add_aged_crop(farmer_id, days_ago)
+        statements.clear()
+        schedule = generate_full_lifecycle_schedule(
+            farmer_id, crop_id, "rice", date.today() - timedelta(days=days_ago), 150, 60.0,
+        )
+        assert schedule
+        irrigation_reads = [
+            query for query in statements
+            if "IrrigationHistory" in query or "IrrigationSchedule" in query
+        ]
+        assert len(irrigation_reads) == 2  # load_irrigation_state()
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1] == counts[2]
+
+
+def test_recalculation_query_count_ignores_crop_age(app, statements):
+    farmer_id = add_farmer()
+    counts = []
+    for days_ago in CROP_AGES:
+        crop_id = add_aged_crop(farmer_id, days_ago)
+        statements.clear()
+        recalculate_forward(
+            farmer_id=farmer_id, crop_id=crop_id, crop_name="rice",
+            planting_date=date.today() - timedelta(days=days_ago), growth_duration=150,
+        )
+        counts.append(len(statements))
+
+    assert counts[0] == counts[1] == counts[2]
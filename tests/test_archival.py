@@ -0,0 +1,60 @@
+from datetime import date, datetime, timedelta
+
+from app.database import execute_db, query_db
+from app.models.summary import rebuild_summaries
+from app.services.archival import run_retention
+from conftest import add_crop, add_farmer, summaries
+
+
+def seed(farmer_id, crop_id, days_ago, index):
+    recorded_at = datetime.now() - timedelta(days=days_ago, hours=index)
+    execute_db(
+        "INSERT INTO IrrigationHistory (farmer_id, crop_id, city, water_required, decision, recorded_at) "
+        "VALUES (?, ?, 'Hyderabad', ?, 'x', ?)",
+        (farmer_id, crop_id, float(index % 4), recorded_at.strftime("%Y-%m-%d %H:%M:%S")),
+    )
+    execute_db(
+        "INSERT INTO IrrigationSchedule (farmer_id, crop_id, scheduled_date, water_amount, status) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (farmer_id, crop_id, date.today() - timedelta(days=days_ago + index), 1.5 + index,
+         ("completed", "missed", "skipped", "pending")[index % 4]),
+    )
+
+
+def test_archive_keeps_summaries_and_rolls_up_moved_rows(app):
+    farmer_id = add_farmer()
+    crops = [add_crop(farmer_id), add_crop(farmer_id, crop_name="wheat")]
+    for index in range(12):
+        seed(farmer_id, crops[index % 2], 400, index)   # past the horizon
+        seed(farmer_id, crops[index % 2], 10, index)    # recent, stays hot
+
+    before = summaries()
+    old_history = query_db(
+        "SELECT COUNT(*) AS n, SUM(water_required) AS water FROM IrrigationHistory WHERE recorded_at < ?",
+        (date.today() - timedelta(days=365),), one=True,
+    )
+    old_schedules = query_db(
+        "SELECT COUNT(*) AS n, SUM(water_amount) AS water FROM IrrigationSchedule "
+        "WHERE scheduled_date < ? AND status != 'pending'",
+        (date.today() - timedelta(days=365),), one=True,
+    )
+
+    report = run_retention(days=365, batch_size=5)
+    assert report["history"] == old_history["n"] == 12
+    assert report["schedules"] == old_schedules["n"] == 9  # pending rows stay
+
+    # Summaries are lifetime totals: moving rows to the archive changes nothing
+    assert summaries() == before
+    rebuild_summaries()
+    assert summaries() == before
+
+    rollups = query_db(
+        "SELECT SUM(history_events) AS history, SUM(water_used) AS water_used, "
+        "SUM(scheduled) AS scheduled, SUM(water_scheduled) AS water_scheduled "
+        "FROM IrrigationRollups",
+        one=True,
+    )
+    assert rollups["history"] == old_history["n"]
+    assert rollups["water_used"] == old_history["water"]
+    assert rollups["scheduled"] == old_schedules["n"]
+    assert rollups["water_scheduled"] == old_schedules["water"]
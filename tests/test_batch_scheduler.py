@@ -0,0 +1,34 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.services import weather
+from app.services.batch_scheduler import regenerate_all_schedules
+from conftest import add_crop, add_farmer
+
+
+@pytest.fixture(autouse=True)
+def forecast(monkeypatch):
+    days = [
+        {"date": str(date.today() + timedelta(days=i)), "temp": 30, "humidity": 50, "rain": 0}
+        for i in range(5)
+    ]
+    monkeypatch.setattr(weather, "get_weather_forecast", lambda city: days)
+
+
+def test_regenerate_all_schedules_query_count_is_constant(app, statements):
+    farmers = [add_farmer(f"farmer{i}") for i in range(3)]
+    for farmer_id in farmers:
+        add_crop(farmer_id)
+    statements.clear()
+    regenerate_all_schedules(workers=0)
+    baseline = len(statements)
+
+    for i in range(40):
+        add_crop(farmers[i % 3], days_ago=i)
+    statements.clear()
+    result = regenerate_all_schedules(workers=0)
+
+    assert result["crops"] == 43
+    assert result["inserted"] > 0
+    assert len(statements) == baseline
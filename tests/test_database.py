@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+from app.database import executemany_db, query_db, translate
+from app.services.advanced_scheduler import UPSERT_SCHEDULE_SQL
+from app.services.archival import _ROLLUP_UPSERT
+from conftest import add_crop, add_farmer
+
+
+def test_translate_upsert_for_mysql():
+    query = translate(UPSERT_SCHEDULE_SQL, "mysql")
+    assert "ON CONFLICT" not in query and "excluded." not in query
+    assert "ON DUPLICATE KEY UPDATE" in query
+    assert "THEN VALUES(water_amount)" in query
+    assert "?" not in query
+
+    # MySQL has no WHERE on ON DUPLICATE KEY UPDATE; the guard is in the assignments
+    assert "WHERE" not in query.split("ON DUPLICATE KEY UPDATE", 1)[1]
+
+
+def test_schedule_upsert_only_changes_pending_rows(app):
+    farmer_id = add_farmer()
+    crop_id = add_crop(farmer_id)
+    days = [date.today() + timedelta(days=i) for i in range(2)]
+    executemany_db(UPSERT_SCHEDULE_SQL, [
+        (farmer_id, crop_id, days[0], 1.0, "pending", "old"),
+        (farmer_id, crop_id, days[1], 1.0, "completed", "old"),
+    ])
+    executemany_db(UPSERT_SCHEDULE_SQL, [
+        (farmer_id, crop_id, day, 5.0, "pending", "new") for day in days
+    ])
+
+    rows = query_db(
+        "SELECT water_amount, status, reason FROM IrrigationSchedule ORDER BY scheduled_date"
+    )
+    assert [tuple(row) for row in rows] == [(5.0, "pending", "new"), (1.0, "completed", "old")]
+
+
+def test_translate_keeps_native_upsert():
+    for dialect in ("sqlite", "postgresql"):
+        query = translate(_ROLLUP_UPSERT, dialect)
+        assert "ON CONFLICT(farmer_id, crop_id, month) DO UPDATE SET" in query
+        assert "water_used = IrrigationRollups.water_used + excluded.water_used" in query
+
+
+def test_translate_leaves_literals_alone():
+    query = "UPDATE t SET note = 'excluded.x ON CONFLICT(a) DO UPDATE SET 5%' WHERE id = ?"
+    assert translate(query, "mysql") == (
+        "UPDATE t SET note = 'excluded.x ON CONFLICT(a) DO UPDATE SET 5%%' WHERE id = %s"
+    )
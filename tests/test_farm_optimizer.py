@@ -0,0 +1,49 @@
+import time
+from datetime import date, timedelta
+
+from app.services.farm_optimizer import optimize_allocation, optimize_farm
+from app.services.schedule_engine import build_context
+from app.services.soil_hydraulics import SOIL_HYDRAULICS
+from conftest import add_crop, add_farmer
+
+
+CROPS = ("rice", "wheat", "maize", "cotton", "sugarcane")
+
+
+def test_fifty_fields_thirty_days_within_capacity(app):
+    today = date.today()
+    soils = list(SOIL_HYDRAULICS.values())
+    contexts, states = [], []
+    for i in range(50):
+        days_ago = (i * 7) % 110
+        contexts.append(build_context(
+            CROPS[i % len(CROPS)], today - timedelta(days=days_ago), 120,
+            daily_et0=[4.0 + (day % 5) for day in range(121)],
+            soil=soils[i % len(soils)],
+        ))
+        states.append({
+            "moisture": 40.0 + (i % 30),
+            "last_irrigation_day": max(days_ago - i % 6, 0),
+            "today_day": days_ago,
+        })
+
+    started = time.perf_counter()
+    plan = optimize_allocation(contexts, states, daily_capacity=60.0, n_days=30)
+    assert time.perf_counter() - started < 1.0
+
+    assert len(plan["daily_water"]) == 30
+    assert all(water <= 60.0 + 1e-9 for water in plan["daily_water"])
+    assert plan["daily_water"].sum() > 0
+
+
+def test_crop_planted_later_waits_for_sowing(app):
+    farmer_id = add_farmer()
+    add_crop(farmer_id, days_ago=10)
+    later = add_crop(farmer_id, crop_name="wheat", days_ago=-10)
+
+    plan = optimize_farm(farmer_id, daily_capacity=1000.0, days=30)
+    field = next(f for f in plan["fields"] if f["crop_id"] == later)
+    sowing = date.today() + timedelta(days=10)
+
+    assert field["irrigations"]
+    assert all(date.fromisoformat(event["date"]) >= sowing for event in field["irrigations"])
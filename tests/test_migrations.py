@@ -0,0 +1,36 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+from app.migrations import LATEST_VERSION, check_indexes, current_version, migrate
+
+
+def make_app(**settings):
+    config = type("TestConfig", (Config,), {"TESTING": True, **settings})
+    return create_app(config)
+
+
+def test_migrate_fresh_database(tmp_path):
+    app = make_app(DB_BACKEND="sqlite", DB_PATH=str(tmp_path / "farming.db"), AUTO_MIGRATE=False)
+    with app.app_context():
+        assert current_version() == 0
+        assert migrate() == list(range(1, LATEST_VERSION + 1))
+        assert current_version() == LATEST_VERSION
+        assert migrate() == []
+
+
+def test_every_index_check_uses_its_index(app):
+    missed = [(index, plan) for index, used, plan in check_indexes() if not used]
+    assert not missed
+
+
+def test_migrations_refuse_other_backends():
+    app = make_app(DB_BACKEND="mysql", AUTO_MIGRATE=None)  # unset: not run at startup
+    with app.app_context():
+        with pytest.raises(RuntimeError, match="SQLite DDL"):
+            migrate()
+        with pytest.raises(RuntimeError, match="SQLite DDL"):
+            check_indexes()
+
+    with pytest.raises(RuntimeError, match="SQLite DDL"):
+        make_app(DB_BACKEND="mysql", AUTO_MIGRATE=True)
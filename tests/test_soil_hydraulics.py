@@ -0,0 +1,54 @@
+import numpy as np
+
+from app.services.crop_coefficients import get_daily_kc
+from app.services.scenario_planner import run_scenarios
+from app.services.soil_hydraulics import DEFAULT_HYDRAULICS, SOIL_HYDRAULICS
+from app.services.water_balance import (
+    DEPLETION_FACTOR, IRRIGATION_REFILL, MAINTENANCE_INTERVAL, MAX_MOISTURE,
+    simulate_lifecycle, simulate_scenarios,
+)
+
+
+def test_parameters_follow_available_water():
+    soils = sorted(SOIL_HYDRAULICS.values(), key=lambda soil: soil.total_available_water)
+    for drier, wetter in zip(soils, soils[1:]):
+        assert drier.depletion_factor > wetter.depletion_factor
+        assert drier.refill < wetter.refill
+        assert drier.max_moisture < wetter.max_moisture
+        assert drier.maintenance_interval <= wetter.maintenance_interval
+
+    assert DEFAULT_HYDRAULICS.depletion_factor == DEPLETION_FACTOR
+    assert DEFAULT_HYDRAULICS.maintenance_interval == MAINTENANCE_INTERVAL
+    assert DEFAULT_HYDRAULICS.refill == IRRIGATION_REFILL
+    assert DEFAULT_HYDRAULICS.max_moisture == MAX_MOISTURE
+
+
+def test_scenarios_match_lifecycle_for_every_texture():
+    kc = get_daily_kc("rice", 120)
+    soils = list(SOIL_HYDRAULICS.values())
+    n = len(soils)
+    summary = simulate_scenarios(
+        np.repeat(kc[:, None], n, axis=1), np.full((len(kc), n), 5.0), np.zeros((len(kc), n)),
+        initial_moisture=[60.0] * n, base_water=[10.0] * n, soils=soils,
+    )
+    for j, soil in enumerate(soils):
+        result = simulate_lifecycle(
+            kc, 5.0, 0.0, 60.0, 10.0,
+            maintenance_interval=soil.maintenance_interval,
+            depletion_factor=soil.depletion_factor,
+            refill=soil.refill,
+            max_moisture=soil.max_moisture,
+        )
+        assert summary.irrigation_count[j] == len(result.days)
+        assert np.isclose(summary.total_water[j], result.water.sum())
+
+
+def test_run_scenarios_uses_soil_texture():
+    results = run_scenarios([
+        {"crop_name": "rice", "soil_texture": "sandy"},
+        {"crop_name": "rice", "sand": 40, "clay": 20},
+        {"crop_name": "rice"},
+    ])
+    assert [r["soil_texture"] for r in results] == ["Sandy", "Loamy", "Loamy"]
+    assert results[0]["irrigation_count"] > results[2]["irrigation_count"]
+    assert results[1]["total_water"] == results[2]["total_water"]
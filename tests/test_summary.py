@@ -0,0 +1,80 @@
+from datetime import date, timedelta
+
+from app.database import execute_db
+from app.models.summary import rebuild_summaries
+from conftest import add_crop, add_farmer, summaries
+
+
+def test_triggers_match_rebuild(app):
+    farmer_id = add_farmer()
+    crops = [add_crop(farmer_id), add_crop(farmer_id, crop_name="wheat")]
+    for i, crop_id in enumerate(crops * 3):
+        execute_db(
+            "INSERT INTO IrrigationHistory (farmer_id, crop_id, city, water_required, decision) "
+            "VALUES (?, ?, 'Hyderabad', ?, 'x')",
+            (farmer_id, crop_id, float(i % 3)),
+        )
+        execute_db(
+            "INSERT INTO IrrigationSchedule (farmer_id, crop_id, scheduled_date, water_amount) "
+            "VALUES (?, ?, ?, 2.0)",
+            (farmer_id, crop_id, date.today() + timedelta(days=i)),
+        )
+    execute_db("UPDATE IrrigationSchedule SET status = 'completed' WHERE id % 2 = 0")
+    execute_db("UPDATE IrrigationHistory SET water_required = 0 WHERE id = 2")
+    execute_db("DELETE FROM IrrigationSchedule WHERE id = 1")
+
+    maintained = summaries()
+    assert maintained[0][0]["history_events"] == 6
+
+    assert rebuild_summaries() == 1
+    assert summaries() == maintained
+
+
+def test_write_paths_keep_summaries_without_triggers(app, monkeypatch):
+    from app.database import DIALECTS, query_db
+    from app.models import summary
+    from app.models.crop import delete_crop
+    from app.models.irrigation import add_irrigation_record
+    from app.models.schedule import mark_skipped
+    from app.services.advanced_scheduler import (
+        extend_schedule_windows, mark_irrigation_done, materialize_lifecycle_schedule,
+        sweep_missed_irrigations,
+    )
+    from app.services.archival import run_retention
+    from test_archival import seed
+
+    farmer_id = add_farmer()
+    crops = [add_crop(farmer_id, days_ago=30), add_crop(farmer_id, crop_name="wheat", days_ago=5)]
+    doomed = add_crop(farmer_id, days_ago=10)
+    for index in range(4):
+        seed(farmer_id, crops[index % 2], 400, index)  # old rows, counted by the triggers
+
+    # From here on, the write paths alone keep the summaries (as on MySQL / PostgreSQL)
+    for row in query_db("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%summary%'"):
+        execute_db(f"DROP TRIGGER {row['name']}")
+    monkeypatch.setattr(summary, "get_dialect", lambda: DIALECTS["mysql"])
+
+    for crop_id, days_ago in zip(crops, (30, 5)):
+        plant_date = date.today() - timedelta(days=days_ago)
+        add_irrigation_record(farmer_id, crop_id, "Hyderabad", "Initial", days_ago, 5.0, 1.0, 2.5, "x")
+        add_irrigation_record(farmer_id, crop_id, "Hyderabad", "Initial", days_ago, 5.0, 1.0, 0.0, "x")
+        materialize_lifecycle_schedule(farmer_id, crop_id, "rice", plant_date, 120, 60.0, window_days=7)
+        materialize_lifecycle_schedule(farmer_id, crop_id, "rice", plant_date, 120, 35.0, window_days=10)
+    materialize_lifecycle_schedule(farmer_id, doomed, "rice", date.today() - timedelta(days=10), 120, 50.0)
+    extend_schedule_windows(today=date.today() + timedelta(days=5), window_days=10)
+
+    pending = query_db(
+        "SELECT id FROM IrrigationSchedule WHERE crop_id = ? AND status = 'pending' ORDER BY scheduled_date",
+        (crops[0],),
+    )
+    mark_irrigation_done(pending[0]["id"], 3.0)
+    mark_skipped(pending[1]["id"], "rain")
+    sweep_missed_irrigations(date.today() + timedelta(days=3))
+    run_retention(days=365, batch_size=2)
+    delete_crop(doomed, farmer_id + 1)  # not the owner: nothing happens
+    delete_crop(doomed, farmer_id)  # history would be kept on SQLite (SET NULL), so none here
+
+    maintained = summaries()
+    assert maintained[0][0]["scheduled"] > 0
+    rebuild_summaries()
+    assert summaries() == maintained